@@ -0,0 +1,95 @@
+import argparse
+import time
+from datetime import date
+from decimal import Decimal
+
+from database.connection import DatabaseConnection
+from dtos.lancamento_dto import ItemNotaDTO
+from models.lancamento_model import LancamentoModel
+
+SQL_NOTA = """
+    INSERT INTO notas_fiscais
+    (numero_nota, data_nota, cnpj_cliente, cnpj_remetente, data_recebimento, data_lancamento)
+    VALUES ('BENCH', %s, NULL, NULL, %s, %s) RETURNING id
+"""
+
+SQL_ITEM_POR_LINHA = """
+    INSERT INTO itens_notas
+    (id_nota_fiscal, codigo_item, valor_item, ressarcimento, codigo_analise, status, data_recebimento)
+    VALUES (%s, %s, %s, %s, %s, 'Pendente', %s)
+"""
+
+
+def inserir_por_linha(cursor, id_nota, itens, data_lancamento, data_recebimento):
+    """Caminho antigo: um INSERT (uma ida ao banco) por unidade física."""
+    total = sum(item.quantidade for item in itens)
+    codigos = iter(LancamentoModel.reservar_codigos_analise(
+        cursor, data_lancamento.year, data_lancamento.month, total
+    ))
+    for item in itens:
+        for _ in range(item.quantidade):
+            cursor.execute(SQL_ITEM_POR_LINHA, (
+                id_nota, item.codigo, item.valor, item.ressarcimento, next(codigos), data_recebimento
+            ))
+    return total
+
+
+def montar_itens(unidades, linhas):
+    por_linha, resto = divmod(unidades, linhas)
+    return [
+        ItemNotaDTO(codigo=f"BENCH-{i}", quantidade=por_linha + (1 if i < resto else 0),
+                    valor=Decimal("120.50") + i, ressarcimento=Decimal("0.00"))
+        for i in range(linhas)
+    ]
+
+
+def medir(db, funcao, itens):
+    """Roda o caminho dentro de uma transação desfeita no final (o banco não guarda nada)."""
+    hoje = date.today()
+    with db.get_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(SQL_NOTA, (hoje, hoje, hoje))
+            id_nota = cursor.fetchone()[0]
+            inicio = time.perf_counter()
+            inseridos = funcao(cursor, id_nota, itens, hoje, hoje)
+            duracao = time.perf_counter() - inicio
+            cursor.execute(
+                "SELECT codigo_analise FROM itens_notas WHERE id_nota_fiscal = %s ORDER BY id", (id_nota,)
+            )
+            codigos = [r[0] for r in cursor.fetchall()]
+        conn.rollback()
+    return duracao, inseridos, codigos
+
+
+def validar_sequencia(codigos):
+    numeros = [int(c.split("-")[1]) for c in codigos]
+    return numeros == list(range(numeros[0], numeros[0] + len(numeros)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compara o INSERT por unidade com o INSERT em massa (unnest + generate_series)."
+    )
+    parser.add_argument("--unidades", type=int, default=2000, help="Total de unidades físicas da nota")
+    parser.add_argument("--linhas", type=int, default=5, help="Linhas (produtos) da nota")
+    parser.add_argument("--repeticoes", type=int, default=3, help="Rodadas por caminho (vale a melhor)")
+    args = parser.parse_args()
+
+    db = DatabaseConnection()
+    itens = montar_itens(args.unidades, args.linhas)
+    print(f"Nota com {args.linhas} linhas e {args.unidades} unidades (melhor de {args.repeticoes}):")
+
+    resultados = {}
+    for nome, funcao in (("INSERT por unidade", inserir_por_linha),
+                         ("INSERT em massa", LancamentoModel.inserir_itens)):
+        melhor = None
+        for _ in range(args.repeticoes):
+            duracao, inseridos, codigos = medir(db, funcao, itens)
+            assert inseridos == args.unidades == len(codigos), "quantidade de unidades divergente"
+            assert validar_sequencia(codigos), "códigos de análise fora de sequência"
+            melhor = duracao if melhor is None else min(melhor, duracao)
+        resultados[nome] = melhor
+        print(f"  {nome:<20} {melhor * 1000:9.1f} ms  {args.unidades / melhor:>10,.0f} unidades/s")
+
+    antes, depois = resultados.values()
+    print(f"  ganho: {antes / depois:.1f}x")
@@ -0,0 +1,116 @@
+import argparse
+import gc
+import time
+from collections import namedtuple
+from datetime import date
+from decimal import Decimal
+
+from database.connection import DatabaseConnection, MapeadorLinhas
+from dtos.ajuste_dto import AjusteItemDTO
+from dtos.relatorio_dto import RelatorioItemDTO
+from models.ajuste_model import AjusteModel
+from models.relatorio_model import RelatorioModel
+
+# Colunas na mesma ordem do SELECT de AjusteModel.SQL_AJUSTE
+COLUNAS_AJUSTE = (
+    'id_item', 'id_nota', 'status', 'codigo_analise', 'data_lancamento', 'data_recebimento',
+    'data_analise', 'cnpj', 'nome_cliente', 'grupo_cliente', 'cidade', 'estado', 'regiao',
+    'cnpj_remetente', 'nome_remetente', 'data_emissao', 'nf_entrada', 'codigo_item',
+    'grupo_item', 'numero_serie', 'codigo_avaria', 'descricao_avaria', 'valor_item',
+    'ressarcimento', 'nf_retorno', 'tipo_retorno', 'data_retorno',
+)
+
+# Imita o cursor.description do psycopg2 (só o atributo name é usado)
+Coluna = namedtuple('Coluna', 'name')
+
+
+def linhas_sinteticas(quantidade):
+    """Gera tuplas no formato do SQL de ajuste, com alguns NULLs como no banco real."""
+    linhas = []
+    for i in range(quantidade):
+        sem_retorno = i % 3 != 0
+        linhas.append((
+            i, i // 4, 'Procedente', f"A{i:05d}", date(2026, 1, 5), date(2026, 1, 3), date(2026, 1, 10),
+            '12345678000199', 'CLIENTE TESTE', 'Varejo', 'São Paulo', 'SP', 'Sudeste',
+            '98765432000111', None if i % 5 == 0 else 'REMETENTE', date(2026, 1, 2), f"{i // 4:06d}",
+            f"IT-{i % 50}", 'Bombas', f"SN{i}", 'AV01', 'Vazamento', Decimal(150 + i % 7), Decimal('0.00'),
+            None if sem_retorno else f"R{i}", None if sem_retorno else 'Crédito',
+            None if sem_retorno else date(2026, 1, 20),
+        ))
+    return linhas
+
+
+def medir(nome, funcao, linhas):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    duracao = time.perf_counter() - inicio
+    print(f"  {nome:<32} {duracao:8.3f}s  {linhas / duracao:>12,.0f} linhas/s")
+    return resultado
+
+
+def bench_sintetico(quantidade, repeticoes):
+    linhas = linhas_sinteticas(quantidade)
+    dicts = [dict(zip(COLUNAS_AJUSTE, linha)) for linha in linhas]
+    description = [Coluna(nome) for nome in COLUNAS_AJUSTE]
+
+    for classe in (RelatorioItemDTO, AjusteItemDTO):
+        mapeador = MapeadorLinhas(classe)
+        print(f"\n{classe.__name__} ({quantidade} linhas sintéticas, melhor de {repeticoes}):")
+        antes = min(
+            _tempo(lambda: [classe.from_dict(d) for d in dicts]) for _ in range(repeticoes)
+        )
+        depois = min(
+            _tempo(lambda: mapeador.mapear(description, linhas)) for _ in range(repeticoes)
+        )
+        print(f"  {'dict + from_dict':<32} {quantidade / antes:>12,.0f} linhas/s")
+        print(f"  {'tupla + MapeadorLinhas':<32} {quantidade / depois:>12,.0f} linhas/s")
+        print(f"  ganho: {antes / depois:.1f}x")
+
+        # Os dois caminhos precisam produzir DTOs idênticos
+        assert [classe.from_dict(d) for d in dicts[:500]] == mapeador.mapear(description, linhas[:500])
+
+
+def _tempo(funcao):
+    # Como o timeit: GC desligado durante a medição para não misturar o custo das coletas
+    gc.collect()
+    gc.disable()
+    try:
+        inicio = time.perf_counter()
+        funcao()
+        return time.perf_counter() - inicio
+    finally:
+        gc.enable()
+
+
+def bench_banco():
+    """Mede as consultas reais (relatório e ajuste) pelos dois caminhos."""
+    db = DatabaseConnection()
+    consultas = [
+        ("relatório", RelatorioModel.SQL_RELATORIO, RelatorioItemDTO, RelatorioModel.MAPEADOR),
+        ("ajuste", AjusteModel.SQL_AJUSTE, AjusteItemDTO, AjusteModel.MAPEADOR),
+    ]
+    for nome, sql, classe, mapeador in consultas:
+        total = sum(len(lote) for lote in db.stream_query(sql))
+        if not total:
+            print(f"\n{nome}: consulta sem linhas, nada a medir.")
+            continue
+        print(f"\n{nome} ({total} linhas do banco):")
+        medir("RealDictCursor + from_dict",
+              lambda: [classe.from_dict(d) for lote in db.stream_query(sql) for d in lote], total)
+        medir("tuplas + MapeadorLinhas",
+              lambda: [dto for lote in db.stream_query(sql, mapeador=mapeador) for dto in lote], total)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compara linhas/s do mapeamento dict + from_dict contra o MapeadorLinhas."
+    )
+    parser.add_argument("--linhas", type=int, default=200000, help="Linhas sintéticas por rodada")
+    parser.add_argument("--repeticoes", type=int, default=3, help="Rodadas sintéticas (vale a melhor)")
+    parser.add_argument("--banco", action="store_true",
+                        help="Mede também as consultas reais de relatório e ajuste no banco configurado")
+    args = parser.parse_args()
+
+    bench_sintetico(args.linhas, args.repeticoes)
+    if args.banco:
+        bench_banco()
@@ -1,12 +1,58 @@
+from database import ler_do_primario
 from models.ajuste_model import AjusteModel
+from controllers.tarefas import Tarefa
 
 class AjusteController:
     def __init__(self):
+        # A listagem lê o esquema estrela, atualizado em segundo plano pelo feed de alterações
         self.model = AjusteModel()
 
     def buscar_dados(self):
         return self.model.get_dados_ajuste()
 
+    def buscar_dados_em_lotes(self):
+        yield from self.model.iter_dados_ajuste()
+
+    def buscar_dados_async(self) -> Tarefa:
+        """Tarefa (não iniciada) que entrega os DTOs pelo sinal `lote`."""
+        return Tarefa(self.buscar_dados_em_lotes, em_lotes=True)
+
+    def buscar_pagina(self, apos=None, tamanho=50):
+        """Uma página (dtos, tem_mais) a partir da chave `apos` (None = primeira)."""
+        return self.model.get_pagina(apos, tamanho)
+
+    def buscar_pagina_async(self, apos=None, tamanho=50) -> Tarefa:
+        """Tarefa (não iniciada) que entrega (dtos, tem_mais) pelo sinal `concluido`."""
+        return Tarefa(self.buscar_pagina, apos, tamanho)
+
+    def chave_pagina(self, dtos):
+        """Chave para buscar a página seguinte à que terminou em dtos[-1]."""
+        return self.model.ORDEM.chave(dtos[-1])
+
+    def estimar_total_async(self) -> Tarefa:
+        """Tarefa (não iniciada) com o total aproximado de linhas."""
+        return Tarefa(self.model.estimar_total)
+
+    def buscar_itens(self, ids):
+        """
+        DTOs atuais dos itens alterados que ainda estão na listagem.
+        Lidos do primário: a réplica pode ainda não ter a alteração avisada.
+        """
+        with ler_do_primario():
+            return self.model.get_itens(ids)
+
+    def buscar_itens_async(self, ids) -> Tarefa:
+        """Tarefa (não iniciada) que entrega os DTOs dos itens alterados pelo sinal `concluido`."""
+        return Tarefa(self.buscar_itens, ids)
+
+    def mesclar_alteracoes(self, paginas, chaves, tem_mais, ids, atuais):
+        """Aplica os itens alterados às páginas carregadas; retorna (páginas alteradas, saldo de linhas)."""
+        return self.model.ORDEM.mesclar(paginas, chaves, tem_mais, ids, atuais, lambda dto: dto.id_item)
+
+    def buscar_item_async(self, id_item) -> Tarefa:
+        """Tarefa (não iniciada) que entrega o DTO do item (ou None) pelo sinal `concluido`."""
+        return Tarefa(self.model.get_item, id_item)
+
     def salvar_edicao(self, dto_original, form_data):
         """
         Recebe o DTO original e um dicionário com os dados editados do formulário.
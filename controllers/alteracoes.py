@@ -0,0 +1,141 @@
+from PySide6.QtCore import QObject, QTimer, Signal, Slot
+
+from controllers.tarefas import Tarefa
+from database.notificacoes import OuvinteAlteracoes
+from models.fato_model import FatoModel
+
+# Avisos que chegam dentro desta janela (ms) viram uma única entrega por tabela
+JANELA_AGRUPAMENTO_MS = 300
+
+# Espera antes de repetir a carga do fato quando outra estação já a está rodando
+ESPERA_CARGA_FATO_MS = 1000
+
+# Rodada periódica da carga do fato (gravações feitas com o app fechado, scripts)
+INTERVALO_CARGA_FATO_MS = 60000
+
+_feed = None
+
+def get_feed() -> "FeedAlteracoes":
+    global _feed
+    if _feed is None:
+        _feed = FeedAlteracoes()
+    return _feed
+
+
+class FeedAlteracoes(QObject):
+    """
+    Ponte entre o ouvinte do banco (thread própria) e as telas.
+
+    As telas conectam `alterado(tabela, ids)` e aplicam só as linhas avisadas:
+      - ids: set de ids alterados (inseridos, atualizados ou excluídos);
+      - ids None: recarregar por completo (carga em massa, reconexão).
+    Enquanto iniciar() não for chamado (ex: scripts), nada é emitido.
+
+    As telas que leem o esquema estrela (Relatório, Ajustes) conectam
+    `fato_alterado`: o mesmo aviso, entregue depois que a carga incremental do
+    fato os incluiu. A carga roda aqui, uma por app, em segundo plano; se outra
+    estação já estiver carregando, tenta de novo em seguida.
+    """
+    alterado = Signal(str, object)
+    fato_alterado = Signal(str, object)
+
+    # Emitido pela thread do ouvinte, tratado na thread da UI
+    _aviso_worker = Signal(object, object)
+
+    def __init__(self):
+        super().__init__()
+        self.ouvinte = None
+        self._pendentes = {}   # tabela -> set de ids (None = recarga completa)
+        self._recarregar_tudo = False
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(JANELA_AGRUPAMENTO_MS)
+        self._timer.timeout.connect(self._entregar)
+        self._aviso_worker.connect(self._acumular)
+
+        self._pendentes_fato = {}  # Avisos entregues que esperam a próxima carga do fato
+        self._tarefa_fato = None
+        self._timer_fato = QTimer(self)
+        self._timer_fato.timeout.connect(self._carregar_fato)
+
+    def iniciar(self):
+        if self.ouvinte is None:
+            self.ouvinte = OuvinteAlteracoes(self._aviso_worker.emit)
+            self.ouvinte.start()
+            # Traz o que foi gravado com o app fechado e segue em intervalos fixos
+            self._timer_fato.start(INTERVALO_CARGA_FATO_MS)
+            self._carregar_fato()
+        return self
+
+    def parar(self):
+        if self.ouvinte is not None:
+            self.ouvinte.parar()
+            self.ouvinte = None
+            self._timer_fato.stop()
+
+    @staticmethod
+    def _juntar(pendentes, tabela, ids):
+        if ids is None:
+            pendentes[tabela] = None
+        elif pendentes.get(tabela, set()) is not None:
+            pendentes.setdefault(tabela, set()).update(ids)
+
+    @Slot(object, object)
+    def _acumular(self, tabela, ids):
+        if tabela is None:
+            self._recarregar_tudo = True
+        else:
+            self._juntar(self._pendentes, tabela, ids)
+        if not self._timer.isActive():
+            self._timer.start()
+
+    @Slot()
+    def _entregar(self):
+        pendentes, self._pendentes = self._pendentes, {}
+        if self._recarregar_tudo:
+            self._recarregar_tudo = False
+            # Sem saber o que mudou: todas as tabelas conhecidas recarregam
+            pendentes = {"itens_notas": None}
+        for tabela, ids in pendentes.items():
+            self.alterado.emit(tabela, ids)
+            self._juntar(self._pendentes_fato, tabela, ids)
+        self._carregar_fato()
+
+    # --- CARGA DO FATO (Relatório/Ajustes) ---
+    @Slot()
+    def _carregar_fato(self):
+        if self._tarefa_fato is not None:
+            return  # Ao terminar, a rodada em andamento dispara outra se chegaram avisos
+        avisos, self._pendentes_fato = self._pendentes_fato, {}
+        tarefa = Tarefa(FatoModel().processar_pendentes)
+        tarefa.concluido.connect(lambda itens: self._fato_carregado(avisos, itens))
+        tarefa.erro.connect(lambda mensagem: self._fato_falhou(avisos, mensagem))
+        self._tarefa_fato = tarefa.iniciar()
+
+    def _fato_carregado(self, avisos, itens):
+        self._tarefa_fato = None
+        if itens is None:
+            # Outra estação está carregando: os avisos esperam a próxima rodada
+            for tabela, ids in avisos.items():
+                self._juntar(self._pendentes_fato, tabela, ids)
+            self._timer_fato.start(ESPERA_CARGA_FATO_MS)
+            return
+        if not avisos and itens:
+            # Rodada sem aviso (abertura, intervalo) que achou itens: as telas recarregam
+            avisos = {"itens_notas": None}
+        self._avisar_fato(avisos)
+
+    def _fato_falhou(self, avisos, mensagem):
+        # Sem permissão/primário indisponível: as telas mostram o que o fato já tem
+        print(f"Erro ao atualizar a base do relatório: {mensagem}")
+        self._tarefa_fato = None
+        self._avisar_fato(avisos)
+
+    def _avisar_fato(self, avisos):
+        if self._timer_fato.interval() != INTERVALO_CARGA_FATO_MS:
+            self._timer_fato.start(INTERVALO_CARGA_FATO_MS)
+        for tabela, ids in avisos.items():
+            self.fato_alterado.emit(tabela, ids)
+        if self._pendentes_fato:
+            self._carregar_fato()
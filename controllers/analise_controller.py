@@ -1,5 +1,6 @@
 from datetime import datetime
 from models import AnaliseModel
+from controllers.tarefas import Tarefa
 from dtos.analise_dto import ItemPendenteDTO, ResultadoAnaliseDTO
 
 class AnaliseController:
@@ -8,8 +9,9 @@ class AnaliseController:
     def __init__(self):
         self.model = AnaliseModel()
 
-    def listar_pendentes(self) -> list[ItemPendenteDTO]:
-        dados_brutos = self.model.get_itens_pendentes()
+    def listar_pendentes(self, ids=None) -> list[ItemPendenteDTO]:
+        """Itens aguardando análise; com `ids`, só esses (os que saíram da fila não voltam)."""
+        dados_brutos = self.model.get_itens_pendentes(ids)
         
         lista_dto = []
         for row in dados_brutos:
@@ -18,7 +20,7 @@ class AnaliseController:
                 numero_nota=row['numero_nota'],
                 codigo_item=row['codigo_item'],
                 descricao=row['descricao'],
-                data_fmt=row['data_fmt'],
+                data_lancamento=row['data_lancamento'],
                 codigo_analise=row['codigo_analise'],
                 ressarcimento=row['ressarcimento']
             )
@@ -26,6 +28,10 @@ class AnaliseController:
             
         return lista_dto
 
+    def listar_pendentes_async(self, ids=None) -> Tarefa:
+        """Tarefa (não iniciada) que entrega a lista de pendentes pelo sinal `concluido`."""
+        return Tarefa(self.listar_pendentes, ids)
+
     def salvar_analise(self, id_item, dados_dict):
         """Prepara o DTO com o resultado da análise técnica e envia para persistência."""
         dto = ResultadoAnaliseDTO(
@@ -0,0 +1,39 @@
+from models.busca_model import BuscaModel
+from controllers.tarefas import Tarefa
+
+# Abaixo disso o termo não gera trigramas e a busca não usaria os índices
+MIN_CARACTERES = 3
+
+# Telas de destino de um resultado
+ANALISE = "analise"
+AJUSTES = "ajustes"
+RETORNO = "retorno"
+
+class BuscaController:
+    """Busca global da janela principal (notas, códigos de análise, séries e clientes)."""
+
+    def __init__(self):
+        self.model = BuscaModel()
+
+    def buscar(self, termo, limite=10):
+        termo = (termo or "").strip()
+        if len(termo) < MIN_CARACTERES:
+            return []
+        return self.model.buscar(termo, limite)
+
+    def buscar_async(self, termo, limite=10) -> Tarefa:
+        """Tarefa (não iniciada) que entrega os resultados pelo sinal `concluido`."""
+        return Tarefa(self.buscar, termo, limite)
+
+    def destino(self, resultado) -> str:
+        """
+        Tela onde o resultado é aberto:
+          - item pendente -> Análise; demais itens -> Ajustes (edição);
+          - nota com saldo em aberto e cliente -> Retorno (busca pelo CNPJ);
+          - nota já retornada -> Ajustes, no primeiro item.
+        """
+        if resultado.tipo == "item":
+            return ANALISE if resultado.status == "Pendente" else AJUSTES
+        if resultado.tipo == "nota" and not resultado.itens_abertos:
+            return AJUSTES
+        return RETORNO
@@ -2,6 +2,7 @@ from models import DashboardModel
 from dtos.dashboard_dto import (
     DashboardDTO, ComparativoFinDTO, StatusDTO, RetornoMensalDTO
 )
+from controllers.tarefas import Tarefa
 
 class DashboardController:
     """
@@ -10,12 +11,24 @@ class DashboardController:
     def __init__(self):
         self.model = DashboardModel()
 
+    def get_kpis_async(self) -> Tarefa:
+        """Tarefa (não iniciada) que entrega o DashboardDTO pelo sinal `concluido`."""
+        return Tarefa(self.get_kpis)
+
     def get_kpis(self) -> DashboardDTO:
-        # Busca dados brutos para os gráficos principais
-        val_gap = self.model.get_gap_atual_recebimento()
-        raw_fin = self.model.get_comparativo_financeiro()
-        raw_status = self.model.get_status_geral()
-        raw_retornos = self.model.get_historico_retornos_mes()
+        # Atualiza os rollups só nos meses que mudaram desde a última abertura
+        try:
+            self.model.processar_pendentes()
+        except Exception as e:
+            # Sem permissão/primário indisponível: mostra o que já está consolidado
+            print(f"Erro ao atualizar os indicadores: {e}")
+
+        # Busca dados brutos para os gráficos principais (uma única consulta)
+        painel = self.model.get_painel()
+        val_gap = painel['gap']
+        raw_fin = painel['comparativo']
+        raw_status = painel['status']
+        raw_retornos = painel['retornos']
 
         # Serialização para DTOs
         list_fin = [
@@ -1,3 +1,5 @@
+from decimal import Decimal
+
 from models import LancamentoModel
 from dtos.lancamento_dto import NotaFiscalDTO, ItemNotaDTO
 
@@ -49,8 +51,8 @@ class LancamentoController:
             itens_dtos.append(ItemNotaDTO(
                 codigo=item['codigo'],
                 quantidade=int(item['qtd']),
-                valor=float(item['valor']),
-                ressarcimento=float(item['ressarcimento'])
+                valor=Decimal(str(item['valor'])),
+                ressarcimento=Decimal(str(item['ressarcimento']))
             ))
 
         self.model.salvar_entrada_completa(nota_dto, itens_dtos)
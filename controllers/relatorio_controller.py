@@ -1,12 +1,73 @@
+from database import ConsultaCancelada, ler_do_primario
 from models import RelatorioModel
+from controllers.tarefas import Tarefa
 
 class RelatorioController:
     def __init__(self):
+        # O fato é atualizado em segundo plano pelo feed de alterações (controllers.alteracoes)
         self.model = RelatorioModel()
+        # Datas até onde há itens arquivados (preenchido a cada carga)
+        self.limites_arquivo = {}
 
     def buscar_dados(self):
         return self.model.get_dados_relatorio()
 
+    def atualizar_limites_arquivo(self):
+        try:
+            self.limites_arquivo = self.model.get_limites_arquivo()
+        except ConsultaCancelada:
+            raise
+        except Exception as e:
+            # Sem a tabela de arquivo: trata como nada arquivado
+            print(f"Erro ao consultar o arquivo do relatório: {e}")
+            self.limites_arquivo = {}
+
+    def buscar_dados_em_lotes(self, incluir_arquivo=False, filtros=None):
+        self.atualizar_limites_arquivo()
+        yield from self.model.iter_dados_relatorio(incluir_arquivo=incluir_arquivo, filtros=filtros)
+
+    def buscar_dados_async(self, incluir_arquivo=False, filtros=None) -> Tarefa:
+        """Tarefa (não iniciada) que entrega os DTOs pelo sinal `lote`."""
+        return Tarefa(self.buscar_dados_em_lotes, incluir_arquivo, filtros, em_lotes=True)
+
+    def buscar_pagina(self, apos=None, incluir_arquivo=False, tamanho=50, atualizar=False, filtros=None):
+        """
+        Uma página (dtos, tem_mais) a partir da chave `apos` (None = primeira),
+        já filtrada no banco. atualizar: relê antes os limites do arquivo (abertura da tela).
+        """
+        if atualizar:
+            self.atualizar_limites_arquivo()
+        return self.model.get_pagina(apos, tamanho, incluir_arquivo, filtros)
+
+    def buscar_pagina_async(self, apos=None, incluir_arquivo=False, tamanho=50, atualizar=False,
+                            filtros=None) -> Tarefa:
+        """Tarefa (não iniciada) que entrega (dtos, tem_mais) pelo sinal `concluido`."""
+        return Tarefa(self.buscar_pagina, apos, incluir_arquivo, tamanho, atualizar, filtros)
+
+    def chave_pagina(self, dtos):
+        """Chave para buscar a página seguinte à que terminou em dtos[-1]."""
+        return self.model.ORDEM.chave(dtos[-1])
+
+    def buscar_itens(self, ids, incluir_arquivo=False, filtros=None):
+        """
+        DTOs atuais dos itens alterados que ainda entram na consulta da tela.
+        Lidos do primário: a réplica pode ainda não ter a alteração avisada.
+        """
+        with ler_do_primario():
+            return self.model.get_itens(ids, incluir_arquivo, filtros)
+
+    def buscar_itens_async(self, ids, incluir_arquivo=False, filtros=None) -> Tarefa:
+        """Tarefa (não iniciada) que entrega os DTOs dos itens alterados pelo sinal `concluido`."""
+        return Tarefa(self.buscar_itens, ids, incluir_arquivo, filtros)
+
+    def mesclar_alteracoes(self, paginas, chaves, tem_mais, ids, atuais):
+        """Aplica os itens alterados às páginas carregadas; retorna (páginas alteradas, saldo de linhas)."""
+        return self.model.ORDEM.mesclar(paginas, chaves, tem_mais, ids, atuais, lambda dto: dto.id_item)
+
+    def estimar_total_async(self, incluir_arquivo=False, filtros=None) -> Tarefa:
+        """Tarefa (não iniciada) com o total (total, exato) das linhas filtradas."""
+        return Tarefa(self.model.estimar_total, incluir_arquivo, filtros)
+
     # AGORA RECEBE A LISTA DIRETO DA VIEW
     def exportar_excel(self, caminho, dados_lista, colunas_lista):
         return self.model.gerar_excel_da_lista(caminho, dados_lista, colunas_lista)
\ No newline at end of file
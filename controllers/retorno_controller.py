@@ -1,4 +1,10 @@
+from decimal import Decimal
+
 from models.retorno_model import RetornoModel
+from controllers.tarefas import Tarefa
+
+TOLERANCIA_GIRO = Decimal("10.00")
+TOLERANCIA_PADRAO = Decimal("0.10")
 
 class RetornoController:
     """
@@ -11,6 +17,13 @@ class RetornoController:
     def buscar_pendencias(self, termo, modo, nf=None):
         return self.model.buscar_itens_pendentes(termo, modo, nf)
 
+    def buscar_pendencias_async(self, termo, modo, nf=None, ids=None) -> Tarefa:
+        """
+        Tarefa (não iniciada) que entrega a lista de pendências pelo sinal `concluido`.
+        ids: só esses itens (alterações avisadas pelo feed).
+        """
+        return Tarefa(self.model.buscar_itens_pendentes, termo, modo, nf, ids)
+
     def salvar_processo(self, header, itens):
         """
         Valida os valores selecionados contra o valor total da nota antes de salvar.
@@ -19,18 +32,18 @@ class RetornoController:
         - Itens de Giro: Permite diferença de até R$ 10,00 (ajustes de arredondamento/pacote).
         - Outros: Tolerância rígida de R$ 0,10.
         """
-        total_sel = sum(i.valor_a_abater for i in itens)
+        total_sel = sum((i.valor_a_abater for i in itens), Decimal("0.00"))
         diff = header.valor_total - total_sel
         
         # Validação de Business Logic para tolerância
         if header.tipo_retorno == "Itens de Giro":
-            if abs(diff) > 10.0:
+            if abs(diff) > TOLERANCIA_GIRO:
                  return False, f"Diferença de valor muito alta (R$ {diff:.2f}). Ajuste os itens."
         else:
             # Validação Rígida
-            if diff > 0.10: 
+            if diff > TOLERANCIA_PADRAO: 
                 return False, f"Valor selecionado menor que a nota. Faltam R$ {diff:.2f}"
-            if diff < -0.10: 
+            if diff < -TOLERANCIA_PADRAO: 
                 return False, f"Valor selecionado excede a nota em R$ {abs(diff):.2f}"
 
         return self.model.salvar_retorno(header, itens)
\ No newline at end of file
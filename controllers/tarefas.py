@@ -0,0 +1,144 @@
+import contextvars
+import threading
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal, Slot
+
+from database.cancelamento import TokenCancelamento, definir_token
+
+# Threads dedicadas às consultas. Fica abaixo do máximo do pool de conexões
+# (POOL_CONFIG['maximo']) para sobrar conexão para o restante da aplicação.
+MAX_THREADS_CONSULTA = 4
+
+_thread_pool = None
+
+def get_thread_pool() -> QThreadPool:
+    global _thread_pool
+    if _thread_pool is None:
+        _thread_pool = QThreadPool()
+        _thread_pool.setMaxThreadCount(MAX_THREADS_CONSULTA)
+    return _thread_pool
+
+
+class _Executor(QRunnable):
+    """Parte da tarefa que roda na thread de trabalho."""
+
+    def __init__(self, tarefa):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.tarefa = tarefa
+
+    def run(self):
+        tarefa = self.tarefa
+        try:
+            if tarefa.cancelada:
+                return
+            # Roda no contexto de quem criou a tarefa (ex: ler_do_primario())
+            contexto = tarefa.contexto
+            resultado = contexto.run(tarefa.funcao, *tarefa.args, **tarefa.kwargs)
+            if tarefa.em_lotes:
+                try:
+                    iterador = iter(resultado)
+                    while True:
+                        try:
+                            lote = contexto.run(next, iterador)
+                        except StopIteration:
+                            break
+                        if tarefa.cancelada:
+                            return
+                        tarefa._lote_worker.emit(lote)
+                finally:
+                    # Fecha o gerador: libera o cursor server-side e devolve a conexão
+                    if hasattr(resultado, 'close'):
+                        contexto.run(resultado.close)
+                resultado = None
+            tarefa._concluido_worker.emit(resultado)
+        except Exception as e:
+            tarefa._erro_worker.emit(str(e))
+        finally:
+            tarefa._fim_worker.emit()
+
+
+class Tarefa(QObject):
+    """
+    Executa uma chamada de model/controller fora da thread da interface.
+
+    A tarefa vive na thread da UI; o trabalho roda em um QThreadPool e os
+    resultados voltam pelos sinais (entregues na thread da UI):
+      - lote(obj):      cada lote, quando a função é um gerador (em_lotes=True)
+      - concluido(obj): resultado da função (None quando em lotes)
+      - erro(str):      mensagem da exceção
+      - cancelado():    emitido uma vez por cancelar()
+
+    Depois de cancelar() nada mais é entregue. A consulta em andamento é
+    interrompida no servidor (token de cancelamento da tarefa, que as consultas
+    feitas por DatabaseConnection usam), então a conexão volta logo ao pool; em
+    tarefas por lotes o gerador também é fechado.
+    """
+    lote = Signal(object)
+    concluido = Signal(object)
+    erro = Signal(str)
+    cancelado = Signal()
+
+    # Sinais internos: emitidos pela thread de trabalho, tratados na thread da UI
+    _lote_worker = Signal(object)
+    _concluido_worker = Signal(object)
+    _erro_worker = Signal(str)
+    _fim_worker = Signal()
+
+    # Tarefas em andamento (evita que sejam coletadas antes de terminar)
+    _ativas = set()
+
+    def __init__(self, funcao, *args, em_lotes=False, **kwargs):
+        super().__init__()
+        self.funcao = funcao
+        self.args = args
+        self.kwargs = kwargs
+        self.em_lotes = em_lotes
+        self.token = TokenCancelamento()
+        self.contexto = contextvars.copy_context()
+        self.contexto.run(definir_token, self.token)
+        self._cancelada = threading.Event()
+        self._executor = None
+
+        self._lote_worker.connect(self._repassar_lote)
+        self._concluido_worker.connect(self._repassar_concluido)
+        self._erro_worker.connect(self._repassar_erro)
+        self._fim_worker.connect(self._finalizar)
+
+    @property
+    def cancelada(self) -> bool:
+        return self._cancelada.is_set()
+
+    def iniciar(self):
+        """Agenda a execução e retorna a própria tarefa."""
+        Tarefa._ativas.add(self)
+        self._executor = _Executor(self)
+        get_thread_pool().start(self._executor)
+        return self
+
+    def cancelar(self):
+        if self.cancelada:
+            return
+        self._cancelada.set()
+        self.token.cancelar()
+        self.cancelado.emit()
+
+    @Slot(object)
+    def _repassar_lote(self, lote):
+        if not self.cancelada:
+            self.lote.emit(lote)
+
+    @Slot(object)
+    def _repassar_concluido(self, resultado):
+        if not self.cancelada:
+            self.concluido.emit(resultado)
+
+    @Slot(str)
+    def _repassar_erro(self, mensagem):
+        if not self.cancelada:
+            self.erro.emit(mensagem)
+
+    @Slot()
+    def _finalizar(self):
+        self._executor = None
+        Tarefa._ativas.discard(self)
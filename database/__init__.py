@@ -1 +1,3 @@
-from .connection import DatabaseConnection
\ No newline at end of file
+from .connection import DatabaseConnection
+from .roteamento import ler_do_primario
+from .cancelamento import ConsultaCancelada, TempoConsultaEsgotado, TokenCancelamento, usar_token
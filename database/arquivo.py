@@ -0,0 +1,55 @@
+import sys
+
+from .cli import Comando, main_comandos
+
+SQL_STATUS = """
+    SELECT COUNT(*), COALESCE(SUM(notas), 0), COALESCE(SUM(itens), 0), COALESCE(SUM(conciliacoes), 0),
+           MAX(executado_em), MAX(ate_recebimento), MAX(ate_lancamento)
+    FROM arquivo_execucoes
+"""
+
+
+def _status(conn, cursor, args):
+    cursor.execute(SQL_STATUS)
+    lotes, notas, itens, conciliacoes, ultima, ate_recebimento, ate_lancamento = cursor.fetchone()
+    if not lotes:
+        print("Nada arquivado.")
+        return
+    print(f"{notas} nota(s), {itens} item(ns), {conciliacoes} conciliação(ões) em {lotes} lote(s).")
+    print(f"Recebimentos até {ate_recebimento}, lançamentos até {ate_lancamento}. Última execução: {ultima}.")
+
+
+def _mover(conn, cursor, args):
+    total = 0
+    # Um lote por transação: as travas nas tabelas quentes duram pouco
+    while True:
+        cursor.execute(
+            "SELECT arquivo_mover_lote(make_interval(months => %s), %s)",
+            (args.idade_meses, args.lote)
+        )
+        movidas = cursor.fetchone()[0]
+        conn.commit()
+        if not movidas:
+            break
+        total += movidas
+        print(f"{total} nota(s) arquivadas...")
+    return f"{total} nota(s) arquivadas"
+
+
+COMANDOS = [
+    Comando("mover", "Arquiva as notas encerradas mais antigas que a idade informada", _mover, [
+        (("--idade-meses",), dict(type=int, default=12, help="Idade mínima do recebimento, em meses")),
+        (("--lote",), dict(type=int, default=200, help="Notas por transação")),
+    ]),
+    Comando("status", "Mostra o total arquivado e até que datas", _status),
+]
+
+
+def main(argv=None):
+    return main_comandos("python -m database.arquivo",
+                         "Move notas encerradas (itens conciliados e com saldo zerado) para as tabelas de arquivo.",
+                         COMANDOS, argv)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+import contextvars
+import fnmatch
+import threading
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2 import errors
+
+# Classes de consulta, cada uma com seu limite de tempo (statement_timeout)
+INTERATIVA = "interativa"   # telas esperando a resposta: busca, paginação, gravação
+RELATORIO = "relatorio"     # agregações do dashboard e contagens
+EXPORTACAO = "exportacao"   # leituras completas em lotes (exportação, carga para filtro)
+
+# Ativado por usar_token(); as Tarefas definem o próprio token no contexto que copiam
+_token_atual = contextvars.ContextVar("partlog_token_cancelamento", default=None)
+
+
+class ConsultaCancelada(Exception):
+    """A consulta foi interrompida a pedido do usuário (TokenCancelamento.cancelar)."""
+
+
+class TempoConsultaEsgotado(Exception):
+    """A consulta passou do statement_timeout da sua classe e foi interrompida pelo servidor."""
+
+
+class TokenCancelamento:
+    """
+    Permite interromper, de outra thread, as consultas em andamento de uma operação.
+
+    Enquanto uma consulta roda, a conexão fica vinculada ao token; cancelar()
+    pede ao servidor (conn.cancel()) que pare o comando na hora. A consulta falha
+    com ConsultaCancelada e a conexão volta ao pool já livre, sem esperar o fim
+    do comando. Consultas iniciadas depois de cancelar() nem chegam ao banco.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._conexoes = set()
+        self._cancelado = False
+
+    @property
+    def cancelado(self) -> bool:
+        return self._cancelado
+
+    def cancelar(self):
+        with self._lock:
+            self._cancelado = True
+            # Sob o lock: uma conexão desvinculada já pode estar com outra consulta
+            for conn in self._conexoes:
+                try:
+                    conn.cancel()
+                except psycopg2.Error as e:
+                    print(f"Erro ao cancelar consulta: {e}")
+
+    @contextmanager
+    def vincular(self, conn):
+        """Liga a conexão ao token durante o bloco (o comando que roda nela pode ser cancelado)."""
+        with self._lock:
+            if self._cancelado:
+                raise ConsultaCancelada("Consulta cancelada pelo usuário.")
+            self._conexoes.add(conn)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._conexoes.discard(conn)
+
+
+def token_atual():
+    return _token_atual.get()
+
+
+def definir_token(token):
+    """Define o token do contexto atual (usado pela Tarefa no contexto que ela copia)."""
+    _token_atual.set(token)
+
+
+@contextmanager
+def usar_token(token):
+    """As consultas do bloco passam a poder ser interrompidas por `token.cancelar()`."""
+    marca = _token_atual.set(token)
+    try:
+        yield token
+    finally:
+        _token_atual.reset(marca)
+
+
+class PoliticaTimeouts:
+    """
+    Decide o statement_timeout de cada consulta pela classe dela.
+
+    A classe vem do primeiro padrão (fnmatch sobre o `nome=`, ex: "dashboard.*")
+    que casar; sem padrão, leituras em lotes (stream_query) são exportação e o
+    resto é interativo. `limites`: {classe: segundos}; None deixa sem limite.
+    """
+
+    def __init__(self, padroes=(), limites=None):
+        self.padroes = tuple(padroes)
+        self.limites = dict(limites or {})
+
+    def classe(self, nome: str, em_lotes=False) -> str:
+        for padrao, classe in self.padroes:
+            if nome and fnmatch.fnmatchcase(nome, padrao):
+                return classe
+        return EXPORTACAO if em_lotes else INTERATIVA
+
+    def limite_ms(self, classe: str):
+        segundos = self.limites.get(classe)
+        return None if segundos is None else int(segundos * 1000)
+
+    @contextmanager
+    def aplicar(self, conn, nome: str, em_lotes=False):
+        """
+        Roda o bloco com o statement_timeout da classe da consulta (SET LOCAL: vale só
+        para a transação em curso) e com a conexão vinculada ao token do contexto.
+        Traduz o cancelamento do servidor em ConsultaCancelada ou TempoConsultaEsgotado.
+        """
+        classe = self.classe(nome, em_lotes)
+        limite = self.limite_ms(classe)
+        token = token_atual()
+        vinculo = token.vincular(conn) if token else _sem_vinculo()
+        with vinculo:
+            try:
+                if limite is not None:
+                    with conn.cursor() as cursor:
+                        cursor.execute("SET LOCAL statement_timeout = %s", (limite,))
+                yield
+            except errors.QueryCanceled as e:
+                if token and token.cancelado:
+                    raise ConsultaCancelada("Consulta cancelada pelo usuário.") from e
+                if limite is None:
+                    raise
+                raise TempoConsultaEsgotado(
+                    f"A consulta '{nome}' passou do limite de {limite / 1000:g}s ({classe}) e foi interrompida."
+                ) from e
+
+
+@contextmanager
+def _sem_vinculo():
+    yield
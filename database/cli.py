@@ -0,0 +1,53 @@
+import argparse
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+import psycopg2
+
+
+@dataclass
+class Comando:
+    """
+    Um subcomando de `python -m database.<módulo>`.
+
+    `executar(conn, cursor, args)` roda dentro de uma conexão do pool. Se devolver um
+    resumo (ex: "3 mês(es) recalculados"), ele é impresso com o tempo gasto; comandos
+    de consulta (status) imprimem o que quiserem e devolvem None.
+    `argumentos`: [(flags, opções do add_argument)].
+    """
+    nome: str
+    ajuda: str
+    executar: Callable[..., Optional[str]]
+    argumentos: tuple = ()
+
+
+def main_comandos(prog: str, descricao: str, comandos: list, argv=None) -> int:
+    """
+    Esqueleto comum das ferramentas de manutenção: lê o subcomando, roda-o em uma
+    conexão do pool, confirma a transação e traduz erros do banco em código de saída 1.
+    """
+    from .connection import DatabaseConnection
+
+    parser = argparse.ArgumentParser(prog=prog, description=descricao)
+    sub = parser.add_subparsers(dest="comando", required=True)
+    for comando in comandos:
+        p = sub.add_parser(comando.nome, help=comando.ajuda)
+        for flags, opcoes in comando.argumentos:
+            p.add_argument(*flags, **opcoes)
+    args = parser.parse_args(argv)
+    comando = next(c for c in comandos if c.nome == args.comando)
+
+    db = DatabaseConnection()
+    try:
+        with db.get_connection() as conn:
+            with conn.cursor() as cursor:
+                inicio = time.perf_counter()
+                resumo = comando.executar(conn, cursor, args)
+            conn.commit()
+    except psycopg2.Error as e:
+        print(f"Erro: {e}")
+        return 1
+    if resumo:
+        print(f"{resumo} em {(time.perf_counter() - inicio) * 1000:.0f} ms.")
+    return 0
@@ -1,7 +1,21 @@
+import atexit
+import itertools
+import os
+import threading
+import time
+import typing
+from dataclasses import fields, MISSING
+from decimal import Decimal
 import psycopg2
 from psycopg2.extras import RealDictCursor
 from contextlib import contextmanager
 
+from .pool import PoolConexoes
+from .consultas import REGISTRO
+from .metricas import MetricasConsultas, nome_padrao
+from .roteamento import LEITURA, PRIMARIO, PoliticaRoteamento
+from .cancelamento import EXPORTACAO, INTERATIVA, RELATORIO, PoliticaTimeouts
+
 # Configuração de Banco de Dados
 DB_CONFIG = {
     'dbname': 'partlogui_db',
@@ -11,141 +25,405 @@ DB_CONFIG = {
     'port': '5432'
 }
 
+# Réplica somente leitura para as consultas analíticas (None = tudo no primário).
+# Ex: PARTLOG_LEITURA_PORTA=5433 para o serviço "replica" do docker-compose.
+DB_CONFIG_LEITURA = {
+    **DB_CONFIG,
+    'host': os.getenv('PARTLOG_LEITURA_HOST', DB_CONFIG['host']),
+    'port': os.getenv('PARTLOG_LEITURA_PORTA'),
+} if os.getenv('PARTLOG_LEITURA_PORTA') else None
+
+# Consultas (pelo `nome=`) que podem ir para a réplica
+ROTEAMENTO_LEITURA = [
+    'dashboard.*',
+    'relatorio.*',
+    'ajuste.dados',
+    'ajuste.pagina',
+    'ajuste.estimativa',
+]
+
+# Segundos após uma escrita desta estação em que as leituras ficam no primário
+JANELA_LEITURA_PROPRIA = 5.0
+
+# Limite de execução (statement_timeout) por classe de consulta, em segundos (None = sem limite).
+# Vale para execute_query, executar_preparada e stream_query; rotinas de manutenção
+# (migrações, ETL, KPIs, arquivo) usam get_connection direto e não são limitadas,
+# exceto a carga incremental do fato que o app dispara em segundo plano (etl.processar).
+TIMEOUTS_CONSULTA = {
+    INTERATIVA: 15.0,
+    RELATORIO: 120.0,
+    EXPORTACAO: 1800.0,
+}
+
+# Classe de cada consulta pelo `nome=` (primeiro padrão que casar). Sem padrão:
+# stream_query é exportação e o resto é interativo.
+CLASSES_CONSULTA = [
+    ('dashboard.*', RELATORIO),
+    ('relatorio.contagem', RELATORIO),
+    ('etl.*', RELATORIO),
+]
+
+# Configuração do Pool compartilhado (tempos em segundos)
+POOL_CONFIG = {
+    'minimo': 2,              # Conexões mantidas abertas mesmo ociosas
+    'maximo': 10,             # Teto de conexões simultâneas do app
+    'timeout_checkout': 30.0, # Espera máxima por uma conexão livre
+    'verificar_apos': 30.0,   # Ociosidade a partir da qual faz health check no checkout
+    'ocioso_max': 300.0,      # Fecha conexões ociosas acima do mínimo após esse tempo
+    'vida_max': 3600.0,       # Recicla conexões mais velhas que isso
+}
+
+# Instrumentação das consultas
+METRICAS_CONFIG = {
+    'limite_lenta_ms': 500.0,                # A partir daqui a consulta vai para o log de lentas
+    'arquivo_log': 'consultas_lentas.log',   # None = só o logger "partlog.consultas_lentas"
+    'amostra_explain': 0.0,                  # Fração (0 a 1) das lentas que ganham EXPLAIN (ANALYZE, BUFFERS)
+}
+
+# Quantidade de linhas trazidas do servidor por ida e volta nos cursores nomeados
+TAMANHO_LOTE_PADRAO = 2000
+
+_pools = {}
+_pool_lock = threading.Lock()
+_seq_cursor = itertools.count(1)
+
+METRICAS = MetricasConsultas(**METRICAS_CONFIG)
+ROTEAMENTO = PoliticaRoteamento(ROTEAMENTO_LEITURA, JANELA_LEITURA_PROPRIA)
+TIMEOUTS = PoliticaTimeouts(CLASSES_CONSULTA, TIMEOUTS_CONSULTA)
+
+def get_pool(papel=PRIMARIO) -> PoolConexoes:
+    """
+    Retorna o pool da aplicação para o papel pedido (primário ou leitura),
+    criando-o no primeiro uso. Sem réplica configurada, leitura usa o primário.
+    """
+    if papel == LEITURA and DB_CONFIG_LEITURA is None:
+        papel = PRIMARIO
+    pool = _pools.get(papel)
+    if pool is None:
+        with _pool_lock:
+            pool = _pools.get(papel)
+            if pool is None:
+                config = DB_CONFIG_LEITURA if papel == LEITURA else DB_CONFIG
+                pool = PoolConexoes(config, **POOL_CONFIG)
+                _pools[papel] = pool
+                atexit.register(pool.fechar)
+    return pool
+
+class MapeadorLinhas:
+    """
+    Converte as tuplas de um cursor comum direto em DTOs (dataclasses),
+    sem passar por RealDictCursor + from_dict.
+
+    Para cada combinação de colunas retornada (cursor.description) é
+    compilada uma única função `linha -> DTO` com as conversões já resolvidas
+    pelo tipo do campo:
+      - str   -> valor or ''
+      - float -> float(valor or 0.0)
+      - Decimal -> valor or Decimal('0.00')
+      - int   -> valor or 0
+      - demais (Optional, date...) -> valor sem conversão
+    Colunas que não são campos do DTO são ignoradas; campos sem coluna
+    ficam com o default da dataclass.
+    """
+
+    def __init__(self, classe_dto):
+        self.classe_dto = classe_dto
+        self._tipos = typing.get_type_hints(classe_dto)
+        self._campos = {f.name: f for f in fields(classe_dto)}
+        self._compilados = {}
+        self._lock = threading.Lock()
+
+    def _expressao(self, campo, indice):
+        tipo = self._tipos.get(campo)
+        if tipo is str:
+            return f"(r[{indice}] or '')"
+        if tipo is float:
+            return f"float(r[{indice}] or 0.0)"
+        if tipo is Decimal:
+            return f"(r[{indice}] or _ZERO)"
+        if tipo is int:
+            return f"(r[{indice}] or 0)"
+        return f"r[{indice}]"
+
+    def _compilar(self, colunas):
+        expressoes = {}
+        for indice, coluna in enumerate(colunas):
+            if coluna in self._campos:
+                expressoes[coluna] = self._expressao(coluna, indice)
+
+        constantes = {}
+        faltando = []
+        for nome, f in self._campos.items():
+            if nome in expressoes:
+                continue
+            if f.default is not MISSING:
+                constantes[nome] = f.default
+            elif f.default_factory is not MISSING:
+                expressoes[nome] = f"_fabricas[{nome!r}]()"
+            else:
+                faltando.append(nome)
+        if faltando:
+            raise ValueError(
+                f"A consulta não traz os campos obrigatórios de {self.classe_dto.__name__}: {', '.join(faltando)}"
+            )
+
+        escopo = {
+            '_dto': self.classe_dto,
+            '_novo': object.__new__,
+            '_ZERO': Decimal('0.00'),
+            '_const': constantes,
+            '_fabricas': {n: f.default_factory for n, f in self._campos.items()},
+        }
+        if hasattr(self.classe_dto, '__post_init__'):
+            # Respeita validações do DTO: passa pelo __init__ normal
+            argumentos = ', '.join(f"{n}={e}" for n, e in expressoes.items())
+            argumentos += ''.join(f", {n}=_const[{n!r}]" for n in constantes)
+            return eval(f"lambda r: _dto({argumentos})", escopo)
+
+        # Caminho rápido: monta o __dict__ da instância direto, sem o __init__ por keywords
+        itens = ', '.join(f"{n!r}: {e}" for n, e in expressoes.items())
+        codigo = (
+            "def _mapear(r):\n"
+            "    obj = _novo(_dto)\n"
+            f"    obj.__dict__ = {{**_const, {itens}}}\n"
+            "    return obj\n"
+        )
+        exec(codigo, escopo)
+        return escopo['_mapear']
+
+    def para_colunas(self, colunas: tuple):
+        """Retorna (compilando na primeira vez) a função que mapeia uma linha."""
+        funcao = self._compilados.get(colunas)
+        if funcao is None:
+            with self._lock:
+                funcao = self._compilados.get(colunas)
+                if funcao is None:
+                    funcao = self._compilar(colunas)
+                    self._compilados[colunas] = funcao
+        return funcao
+
+    def mapear(self, description, linhas) -> list:
+        """Mapeia as linhas (tuplas) de um cursor cujo `description` foi informado."""
+        funcao = self.para_colunas(tuple(col.name for col in description))
+        return list(map(funcao, linhas))
+
 class DatabaseConnection:
     """
     Gerencia a conexão com o banco de dados PostgreSQL.
-    Utiliza o padrão Context Manager para garantir o fechamento seguro das conexões.
+    Utiliza o padrão Context Manager para garantir a devolução segura das conexões
+    ao pool compartilhado (thread-safe, pode ser usado a partir de workers).
     """
 
     @contextmanager
-    def get_connection(self):
+    def get_connection(self, papel=PRIMARIO):
         """
-        Generator que fornece uma conexão segura com o banco.
+        Generator que empresta uma conexão do pool e a devolve ao final.
+        Transações não confirmadas são desfeitas na devolução.
+        Com papel=LEITURA usa a réplica; se ela estiver fora, cai no primário.
         """
-        conn = psycopg2.connect(**DB_CONFIG)
+        pool = get_pool(papel)
+        try:
+            conn = pool.obter()
+        except psycopg2.OperationalError as e:
+            if papel != LEITURA or pool is get_pool(PRIMARIO):
+                raise
+            print(f"Réplica de leitura indisponível, usando o primário: {e}")
+            pool = get_pool(PRIMARIO)
+            conn = pool.obter()
         try:
             yield conn
         finally:
-            conn.close()
+            pool.devolver(conn)
+
+    def conexao_para(self, nome: str, somente_leitura: bool):
+        """Conexão escolhida pela política de roteamento para a consulta `nome`."""
+        return self.get_connection(ROTEAMENTO.destino(nome, somente_leitura))
+
+    def marcar_escrita(self):
+        """
+        Avisa a política de roteamento que esta estação acabou de gravar:
+        as leituras seguintes ficam no primário durante a janela de read-your-writes.
+        Já é chamado pelas escritas feitas via execute_query.
+        """
+        ROTEAMENTO.marcar_escrita()
+
+    def estatisticas_pool(self, papel=PRIMARIO) -> dict:
+        """
+        Métricas do pool (conexões abertas, em uso, esperas, health checks...).
+        """
+        return get_pool(papel).estatisticas()
 
-    def execute_query(self, query: str, params=None, fetch=False):
+    def execute_query(self, query: str, params=None, fetch=False, mapeador: MapeadorLinhas = None,
+                      nome: str = None):
         """
         Executa uma query SQL de forma segura.
+        Com `mapeador`, usa um cursor de tuplas e devolve a lista de DTOs já mapeados;
+        sem ele, devolve as linhas como dicts (RealDictCursor).
+        `nome` identifica a consulta nas métricas (padrão: hash do SQL), na
+        política de roteamento (leituras listadas em ROTEAMENTO_LEITURA vão para a réplica)
+        e na de timeouts (CLASSES_CONSULTA). Estourar o limite levanta TempoConsultaEsgotado;
+        o cancelamento pelo token do contexto (ver database.cancelamento), ConsultaCancelada.
         """
-        with self.get_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-                cursor.execute(query, params)
-                if fetch:
-                    return cursor.fetchall()
-                conn.commit()
+        nome = nome or nome_padrao(query)
+        inicio = fim = None
+        linhas = 0
+        try:
+            with self.conexao_para(nome, somente_leitura=fetch) as conn, TIMEOUTS.aplicar(conn, nome):
+                fabrica = None if mapeador else RealDictCursor
+                with conn.cursor(cursor_factory=fabrica) as cursor:
+                    inicio = time.perf_counter()
+                    cursor.execute(query, params)
+                    if fetch:
+                        resultado = cursor.fetchall()
+                        fim = time.perf_counter()
+                        linhas = len(resultado)
+                        return mapeador.mapear(cursor.description, resultado) if mapeador else resultado
+                    conn.commit()
+                    fim = time.perf_counter()
+                    linhas = max(cursor.rowcount, 0)
+            self.marcar_escrita()
+        finally:
+            if inicio is not None:
+                self._registrar_metrica(nome, query, params,
+                                        (fim or time.perf_counter()) - inicio, linhas, erro=fim is None)
 
-    def setup_database(self):
+    def estimar_linhas(self, query: str, params=None, nome: str = None) -> int:
         """
-        Executa a Auto-Migração do banco de dados.
-        """
-        # Estrutura inicial das tabelas (ATUALIZADA)
-        queries_creation = [
-            '''CREATE TABLE IF NOT EXISTS clientes (
-                cnpj TEXT PRIMARY KEY,
-                cliente TEXT,
-                grupo TEXT,
-                cidade TEXT,
-                estado TEXT,
-                regiao TEXT
-            )''',
-            '''CREATE TABLE IF NOT EXISTS itens (
-                codigo_item TEXT PRIMARY KEY,
-                descricao_item TEXT,
-                grupo_item TEXT
-            )''',
-            '''CREATE TABLE IF NOT EXISTS avarias (
-                codigo_avaria TEXT PRIMARY KEY,
-                descricao_avaria TEXT,
-                status_avaria TEXT
-            )''',
-            '''CREATE TABLE IF NOT EXISTS notas_fiscais (
-                id SERIAL PRIMARY KEY,
-                numero_nota TEXT,
-                data_nota DATE,
-                cnpj_cliente TEXT,
-                cnpj_remetente TEXT, 
-                data_recebimento DATE,
-                data_lancamento DATE,
-                FOREIGN KEY (cnpj_cliente) REFERENCES clientes(cnpj),
-                FOREIGN KEY (cnpj_remetente) REFERENCES clientes(cnpj)
-            )''',
-            '''CREATE TABLE IF NOT EXISTS itens_notas (
-                id SERIAL PRIMARY KEY,
-                id_nota_fiscal INTEGER,
-                codigo_item TEXT,
-                valor_item REAL,
-                ressarcimento REAL,
-                saldo_financeiro REAL DEFAULT 0,
-                status TEXT DEFAULT 'Pendente',
-                codigo_analise TEXT,
-                data_analise DATE,
-                numero_serie TEXT,
-                codigo_avaria TEXT,
-                descricao_avaria TEXT,
-                procedente_improcedente TEXT,
-                produzido_revenda TEXT,
-                fornecedor TEXT,
-                FOREIGN KEY (id_nota_fiscal) REFERENCES notas_fiscais(id)
-            )''',
-            # --- TABELA DE RETORNO ATUALIZADA ---
-            '''CREATE TABLE IF NOT EXISTS notas_retorno (
-                id SERIAL PRIMARY KEY,
-                numero_nota TEXT NOT NULL,
-                data_emissao DATE NOT NULL,
-                tipo_retorno TEXT NOT NULL,
-                cnpj_emitente TEXT,    -- Novo campo
-                cnpj_remetente TEXT,   -- Renomeado de cnpj_cliente
-                grupo_economico TEXT,
-                valor_total_nota REAL NOT NULL,
-                created_at TIMESTAMP DEFAULT NOW()
-            )''',
-            '''CREATE TABLE IF NOT EXISTS conciliacao (
-                id SERIAL PRIMARY KEY,
-                id_nota_retorno INTEGER REFERENCES notas_retorno(id),
-                id_item_entrada INTEGER REFERENCES itens_notas(id),
-                valor_abatido REAL NOT NULL,
-                data_conciliacao DATE DEFAULT CURRENT_DATE
-            )'''
-        ]
-
-        # Migrações: Garante que o banco existente receba os novos campos
-        queries_migration = [
-            "ALTER TABLE clientes ADD COLUMN IF NOT EXISTS grupo TEXT;",
-            "ALTER TABLE itens_notas ADD COLUMN IF NOT EXISTS saldo_financeiro REAL DEFAULT 0;",
-            "UPDATE itens_notas SET saldo_financeiro = valor_item WHERE saldo_financeiro = 0 AND valor_item > 0;",
-            
-            # --- CORREÇÃO AUTOMÁTICA DA TABELA DE RETORNO ---
-            # 1. Cria a coluna do emitente se não existir
-            "ALTER TABLE notas_retorno ADD COLUMN IF NOT EXISTS cnpj_emitente TEXT;",
-            
-            # 2. Renomeia cnpj_cliente para cnpj_remetente (apenas se a antiga existir)
-            """
-            DO $$
-            BEGIN
-                IF EXISTS(SELECT * FROM information_schema.columns WHERE table_name = 'notas_retorno' AND column_name = 'cnpj_cliente') THEN
-                    ALTER TABLE notas_retorno RENAME COLUMN cnpj_cliente TO cnpj_remetente;
-                END IF;
-            END $$;
-            """
-        ]
+        Quantidade de linhas que o planejador estima para um SELECT (EXPLAIN, sem executá-lo).
+        Custa o mesmo em qualquer tamanho de tabela: serve para totais aproximados na tela.
+        """
+        resultado = self.execute_query("EXPLAIN (FORMAT JSON) " + query, params, fetch=True, nome=nome)
+        return int(resultado[0]["QUERY PLAN"][0]["Plan"]["Plan Rows"])
 
+    def executar_preparada(self, nome: str, params=(), fetch=True, mapeador: MapeadorLinhas = None):
+        """
+        Executa uma consulta do registro (`database.consultas`) pelo nome.
+        Ela é preparada uma vez por conexão do pool e depois só roda EXECUTE.
+        Mesmo retorno de execute_query.
+        """
+        inicio = fim = None
+        linhas = 0
         try:
-            with self.get_connection() as conn:
+            with self.conexao_para(nome, somente_leitura=fetch) as conn, TIMEOUTS.aplicar(conn, nome):
+                fabrica = None if mapeador else RealDictCursor
+                with conn.cursor(cursor_factory=fabrica) as cursor:
+                    inicio = time.perf_counter()
+                    REGISTRO.executar(conn, cursor, nome, params)
+                    if fetch:
+                        resultado = cursor.fetchall()
+                        fim = time.perf_counter()
+                        linhas = len(resultado)
+                        return mapeador.mapear(cursor.description, resultado) if mapeador else resultado
+                    conn.commit()
+                    fim = time.perf_counter()
+                    linhas = max(cursor.rowcount, 0)
+            self.marcar_escrita()
+        finally:
+            if inicio is not None:
+                # Placeholders $1... não são reexecutáveis com EXPLAIN por aqui
+                self._registrar_metrica(nome, REGISTRO.obter(nome).sql, params,
+                                        (fim or time.perf_counter()) - inicio, linhas, erro=fim is None,
+                                        permitir_explain=False)
+
+    def estatisticas_consultas(self) -> dict:
+        """
+        Contadores por consulta preparada (execuções, preparações, tempo médio/máximo).
+        """
+        return REGISTRO.estatisticas()
+
+    def metricas_consultas(self) -> dict:
+        """
+        Métricas por nome de consulta: chamadas, linhas, erros, lentas e latência (média, p50/p95/p99, máx).
+        """
+        return METRICAS.estatisticas()
+
+    def _registrar_metrica(self, nome, query, params, duracao, linhas, erro=False, permitir_explain=True):
+        """
+        Alimenta as métricas da consulta (e o log de lentas).
+        Chamado depois de devolver a conexão, para o EXPLAIN não disputar o pool com a própria consulta.
+        """
+        try:
+            lenta = METRICAS.registrar(nome, duracao, linhas, erro)
+            if lenta and not erro:
+                plano = None
+                if permitir_explain and METRICAS.sortear_explain(query):
+                    plano = self._capturar_plano(nome, query, params)
+                METRICAS.registrar_lenta(nome, query, params, duracao, linhas, plano)
+        except Exception as e:
+            # Instrumentação nunca pode derrubar a consulta
+            print(f"Erro ao registrar métricas da consulta {nome}: {e}")
+
+    def _capturar_plano(self, nome, query, params):
+        """Reexecuta um SELECT lento com EXPLAIN (ANALYZE, BUFFERS), sempre em transação desfeita."""
+        try:
+            with self.conexao_para(nome, somente_leitura=True) as conn:
                 with conn.cursor() as cursor:
-                    # Executa Criação
-                    for q in queries_creation:
-                        cursor.execute(q)
-                    # Executa Migração/Correção
-                    for q in queries_migration:
-                        cursor.execute(q)
-                conn.commit()
-            print("Database setup completed successfully.")
+                    cursor.execute("EXPLAIN (ANALYZE, BUFFERS) " + query, params)
+                    plano = "\n".join(linha[0] for linha in cursor.fetchall())
+                conn.rollback()
+            return plano
+        except Exception as e:
+            return f"(EXPLAIN falhou: {e})"
+
+    def stream_query(self, query: str, params=None, tamanho_lote=TAMANHO_LOTE_PADRAO,
+                     mapeador: MapeadorLinhas = None, nome: str = None):
+        """
+        Executa um SELECT em um cursor nomeado (server-side) e entrega as linhas
+        em lotes de `tamanho_lote`, sem materializar o resultado inteiro no cliente.
+        Com `mapeador`, cada lote já vem como lista de DTOs.
+        A conexão fica emprestada até o gerador ser esgotado ou fechado.
+        Nas métricas conta só o tempo gasto no banco (execute + fetchs), não o do consumidor.
+        """
+        nome = nome or nome_padrao(query)
+        tempo_banco = 0.0
+        linhas = 0
+        executou = concluiu = False
+        try:
+            with self.conexao_para(nome, somente_leitura=True) as conn, \
+                    TIMEOUTS.aplicar(conn, nome, em_lotes=True):
+                nome_cursor = f"partlog_stream_{next(_seq_cursor)}"
+                fabrica = None if mapeador else RealDictCursor
+                with conn.cursor(name=nome_cursor, cursor_factory=fabrica) as cursor:
+                    cursor.itersize = tamanho_lote
+                    inicio = time.perf_counter()
+                    executou = True
+                    cursor.execute(query, params)
+                    while True:
+                        lote = cursor.fetchmany(tamanho_lote)
+                        tempo_banco += time.perf_counter() - inicio
+                        if not lote:
+                            break
+                        linhas += len(lote)
+                        yield mapeador.mapear(cursor.description, lote) if mapeador else lote
+                        inicio = time.perf_counter()
+            concluiu = True
+        except GeneratorExit:
+            concluiu = True  # Consumidor fechou o gerador antes do fim: não é erro
+            raise
+        finally:
+            if executou:
+                if not concluiu:
+                    tempo_banco += time.perf_counter() - inicio
+                self._registrar_metrica(nome, query, params,
+                                        tempo_banco, linhas, erro=not concluiu)
+
+    def setup_database(self):
+        """
+        Garante que o schema está na versão mais recente.
+        No caso comum (banco já atualizado) custa uma única query;
+        caso contrário aplica as migrações pendentes de `database/migrations`.
+        """
+        from .migrator import Migrator
+
+        try:
+            migrator = Migrator(self)
+            if migrator.esta_atualizado():
+                print("Database schema is up to date.")
+                return True
+
+            aplicadas = migrator.aplicar()
+            print(f"Database setup completed successfully ({len(aplicadas)} migration(s) applied).")
             return True  
         except Exception as e:
             print(f"Database setup failed: {e}")
-            return False
\ No newline at end of file
+            return False
@@ -0,0 +1,107 @@
+import re
+import threading
+import time
+from dataclasses import dataclass
+
+# Nome de statement aceito pelo PREPARE (vira identificador SQL, sem aspas)
+PADRAO_NOME = re.compile(r"^[a-z_][a-z0-9_]*$")
+
+
+@dataclass(frozen=True)
+class ConsultaPreparada:
+    nome: str
+    sql: str            # Placeholders no formato do servidor: $1, $2...
+    tipos: tuple = ()   # Tipos dos parâmetros (ex: ('text',)); vazio = servidor infere
+
+    @property
+    def sql_prepare(self) -> str:
+        tipos = f" ({', '.join(self.tipos)})" if self.tipos else ""
+        return f"PREPARE {self.nome}{tipos} AS {self.sql}"
+
+    def sql_execute(self, quantidade_params: int) -> str:
+        if not quantidade_params:
+            return f"EXECUTE {self.nome}"
+        return f"EXECUTE {self.nome} ({', '.join(['%s'] * quantidade_params)})"
+
+
+class RegistroConsultas:
+    """
+    Catálogo das consultas quentes executadas por nome.
+
+    Cada consulta é preparada (PREPARE) uma única vez em cada conexão do pool,
+    na primeira vez que aquela conexão a executa; daí em diante só roda
+    EXECUTE, sem custo de parse/plan no servidor. Mantém contadores por
+    consulta (execuções, preparações e tempo).
+    """
+
+    def __init__(self):
+        self._consultas = {}
+        self._contadores = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, nome: str, sql: str, tipos=()) -> ConsultaPreparada:
+        if not PADRAO_NOME.match(nome):
+            raise ValueError(f"Nome de consulta inválido: {nome!r}")
+
+        consulta = ConsultaPreparada(nome, sql.strip(), tuple(tipos))
+        with self._lock:
+            existente = self._consultas.get(nome)
+            if existente is not None and existente != consulta:
+                raise ValueError(f"Consulta '{nome}' já registrada com outro SQL.")
+            self._consultas[nome] = consulta
+            self._contadores.setdefault(nome, {
+                'execucoes': 0, 'preparacoes': 0, 'erros': 0,
+                'tempo_total': 0.0, 'tempo_max': 0.0,
+            })
+        return consulta
+
+    def obter(self, nome: str) -> ConsultaPreparada:
+        try:
+            return self._consultas[nome]
+        except KeyError:
+            raise KeyError(f"Consulta preparada não registrada: {nome}") from None
+
+    def executar(self, conn, cursor, nome: str, params=()):
+        """
+        Roda a consulta `nome` no cursor, preparando-a antes se a conexão
+        ainda não a conhece. O chamador faz o fetch.
+        """
+        consulta = self.obter(nome)
+        params = tuple(params or ())
+        preparou = False
+        inicio = time.perf_counter()
+        try:
+            if nome not in conn.preparadas:
+                cursor.execute(consulta.sql_prepare)
+                conn.preparadas.add(nome)
+                preparou = True
+            cursor.execute(consulta.sql_execute(len(params)), params)
+        except Exception:
+            with self._lock:
+                self._contadores[nome]['erros'] += 1
+            raise
+        duracao = time.perf_counter() - inicio
+
+        with self._lock:
+            c = self._contadores[nome]
+            c['execucoes'] += 1
+            c['preparacoes'] += preparou
+            c['tempo_total'] += duracao
+            c['tempo_max'] = max(c['tempo_max'], duracao)
+
+    def estatisticas(self) -> dict:
+        """Retorna {nome: contadores} com o tempo médio (ms) de cada consulta."""
+        with self._lock:
+            dados = {nome: dict(c) for nome, c in self._contadores.items()}
+        for c in dados.values():
+            c['tempo_medio_ms'] = c['tempo_total'] / c['execucoes'] * 1000 if c['execucoes'] else 0.0
+            c['tempo_max_ms'] = c.pop('tempo_max') * 1000
+        return dados
+
+
+# Registro único da aplicação (os models registram suas consultas ao serem importados)
+REGISTRO = RegistroConsultas()
+
+
+def registrar_consulta(nome: str, sql: str, tipos=()) -> ConsultaPreparada:
+    return REGISTRO.registrar(nome, sql, tipos)
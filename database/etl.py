@@ -0,0 +1,40 @@
+import sys
+
+from .cli import Comando, main_comandos
+
+
+def _status(conn, cursor, args):
+    cursor.execute("""
+        SELECT marca::text, executado_em, itens_processados,
+               (SELECT COUNT(*) FROM fato_itens),
+               (SELECT COUNT(*) FROM etl_itens_alterados)
+        FROM etl_controle WHERE processo = 'fato_itens'
+    """)
+    marca, executado_em, processados, itens, exclusoes = cursor.fetchone()
+    print(f"Marca d'água: transação {marca} (última rodada: {executado_em}, "
+          f"{processados} item(ns)).")
+    print(f"{itens} item(ns) no fato, {exclusoes} exclusão(ões) registradas no log.")
+
+
+def _carregar(funcao):
+    def executar(conn, cursor, args):
+        cursor.execute(f"SELECT {funcao}()")
+        return f"{cursor.fetchone()[0]} item(ns) carregados"
+    return executar
+
+
+COMANDOS = [
+    Comando("processar", "Carrega só os itens gravados desde a última rodada", _carregar("etl_processar_fato")),
+    Comando("recarregar", "Reconstrói o fato inteiro a partir das tabelas de origem", _carregar("etl_recarregar_fato")),
+    Comando("status", "Mostra a marca d'água e o tamanho do fato", _status),
+]
+
+
+def main(argv=None):
+    return main_comandos("python -m database.etl",
+                         "Atualiza o esquema estrela do Relatório (fato_itens + dim_*).",
+                         COMANDOS, argv)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,35 @@
+import sys
+
+from .cli import Comando, main_comandos
+
+
+def _status(conn, cursor, args):
+    cursor.execute("SELECT COUNT(*), COUNT(DISTINCT (rollup, mes)) FROM kpi_meses_pendentes")
+    anotacoes, meses = cursor.fetchone()
+    print(f"{anotacoes} anotação(ões) na fila, {meses} mês(es) a recalcular.")
+
+
+def _recalcular(funcao):
+    def executar(conn, cursor, args):
+        cursor.execute(f"SELECT {funcao}()")
+        return f"{cursor.fetchone()[0]} mês(es) recalculados"
+    return executar
+
+
+COMANDOS = [
+    Comando("processar", "Recalcula só os meses alterados desde a última atualização",
+            _recalcular("kpi_processar_pendentes")),
+    Comando("recalcular", "Reconstrói todos os rollups a partir das tabelas de origem",
+            _recalcular("kpi_recalcular_tudo")),
+    Comando("status", "Mostra quantas anotações estão na fila", _status),
+]
+
+
+def main(argv=None):
+    return main_comandos("python -m database.kpis",
+                         "Atualiza os rollups mensais do Dashboard (kpi_*_mes).",
+                         COMANDOS, argv)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
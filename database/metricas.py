@@ -0,0 +1,161 @@
+import bisect
+import hashlib
+import logging
+import random
+import re
+import threading
+from datetime import date, datetime
+from decimal import Decimal
+
+# Limites superiores (ms) dos baldes do histograma de latência
+BALDES_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500,
+             1000, 2500, 5000, 10000, 30000, 60000)
+
+logger_lentas = logging.getLogger("partlog.consultas_lentas")
+
+
+def normalizar_sql(sql: str) -> str:
+    return re.sub(r"\s+", " ", sql).strip()
+
+
+def nome_padrao(sql: str) -> str:
+    """Nome estável para consultas sem `nome=`: hash do SQL normalizado."""
+    return "sql_" + hashlib.sha1(normalizar_sql(sql).encode("utf-8")).hexdigest()[:10]
+
+
+def mascarar_parametro(valor):
+    """Troca o valor pelo tipo (e tamanho), para o log não vazar CNPJ, nomes, valores..."""
+    if valor is None:
+        return "NULL"
+    if isinstance(valor, (list, tuple)):
+        return f"<{type(valor).__name__}[{len(valor)}]>"
+    if isinstance(valor, str):
+        return f"<str:{len(valor)}>"
+    if isinstance(valor, (bool, int, float, Decimal, date, datetime)):
+        return f"<{type(valor).__name__}>"
+    return "<?>"
+
+
+def mascarar_parametros(params):
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {k: mascarar_parametro(v) for k, v in params.items()}
+    return [mascarar_parametro(v) for v in params]
+
+
+def eh_somente_leitura(sql: str) -> bool:
+    """Só SELECTs puros podem ser reexecutados com EXPLAIN ANALYZE."""
+    texto = re.sub(r"--[^\n]*", " ", sql).strip().upper()
+    if not (texto.startswith("SELECT") or texto.startswith("WITH")):
+        return False
+    return not re.search(r"\b(INSERT|UPDATE|DELETE|MERGE|FOR\s+UPDATE|FOR\s+SHARE)\b", texto)
+
+
+class HistogramaLatencia:
+    """Histograma por baldes fixos; percentis estimados pelo limite do balde."""
+
+    def __init__(self):
+        self.contagens = [0] * (len(BALDES_MS) + 1)
+        self.total = 0
+        self.maximo = 0.0
+
+    def registrar(self, ms: float):
+        self.contagens[bisect.bisect_left(BALDES_MS, ms)] += 1
+        self.total += 1
+        self.maximo = max(self.maximo, ms)
+
+    def percentil(self, p: float) -> float:
+        if not self.total:
+            return 0.0
+        alvo = p / 100 * self.total
+        acumulado = 0
+        for i, qtd in enumerate(self.contagens):
+            acumulado += qtd
+            if acumulado >= alvo:
+                # Último balde (acima do maior limite): usa o máximo observado
+                return float(min(BALDES_MS[i], self.maximo)) if i < len(BALDES_MS) else self.maximo
+        return self.maximo
+
+
+class MetricasConsultas:
+    """
+    Coleta, por nome de consulta, chamadas, linhas, erros e o histograma
+    de latência. Consultas acima de `limite_lenta_ms` vão para o log de
+    consultas lentas (parâmetros mascarados) e, por amostragem, têm o
+    plano capturado com EXPLAIN (ANALYZE, BUFFERS).
+    """
+
+    def __init__(self, limite_lenta_ms=500.0, arquivo_log=None, amostra_explain=0.0):
+        self.limite_lenta_ms = limite_lenta_ms
+        self.arquivo_log = arquivo_log
+        self.amostra_explain = amostra_explain
+        self._dados = {}
+        self._lock = threading.Lock()
+        self._log_configurado = False
+
+    def _configurar_log(self):
+        if self._log_configurado:
+            return
+        self._log_configurado = True
+        if self.arquivo_log and not logger_lentas.handlers:
+            handler = logging.FileHandler(self.arquivo_log, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            logger_lentas.addHandler(handler)
+            logger_lentas.setLevel(logging.INFO)
+            logger_lentas.propagate = False
+
+    def registrar(self, nome: str, duracao_s: float, linhas=0, erro=False):
+        ms = duracao_s * 1000
+        with self._lock:
+            d = self._dados.get(nome)
+            if d is None:
+                d = self._dados[nome] = {
+                    'chamadas': 0, 'linhas': 0, 'erros': 0, 'lentas': 0,
+                    'tempo_total_ms': 0.0, 'histograma': HistogramaLatencia(),
+                }
+            d['chamadas'] += 1
+            d['linhas'] += linhas or 0
+            d['erros'] += bool(erro)
+            d['tempo_total_ms'] += ms
+            d['histograma'].registrar(ms)
+            lenta = self.limite_lenta_ms is not None and ms >= self.limite_lenta_ms
+            if lenta:
+                d['lentas'] += 1
+        return lenta
+
+    def registrar_lenta(self, nome, sql, params, duracao_s, linhas, plano=None):
+        self._configurar_log()
+        mensagem = (
+            f"[LENTA] {nome} {duracao_s * 1000:.1f}ms linhas={linhas} "
+            f"params={mascarar_parametros(params)} sql={normalizar_sql(sql)}"
+        )
+        if plano:
+            mensagem += "\n" + plano
+        logger_lentas.warning(mensagem)
+
+    def sortear_explain(self, sql) -> bool:
+        return self.amostra_explain > 0 and eh_somente_leitura(sql) and random.random() < self.amostra_explain
+
+    def estatisticas(self) -> dict:
+        """Retorna {nome: {chamadas, linhas, erros, lentas, medio_ms, p50_ms, p95_ms, p99_ms, max_ms}}."""
+        with self._lock:
+            resultado = {}
+            for nome, d in self._dados.items():
+                h = d['histograma']
+                resultado[nome] = {
+                    'chamadas': d['chamadas'],
+                    'linhas': d['linhas'],
+                    'erros': d['erros'],
+                    'lentas': d['lentas'],
+                    'medio_ms': d['tempo_total_ms'] / d['chamadas'],
+                    'p50_ms': h.percentil(50),
+                    'p95_ms': h.percentil(95),
+                    'p99_ms': h.percentil(99),
+                    'max_ms': h.maximo,
+                }
+        return resultado
+
+    def resetar(self):
+        with self._lock:
+            self._dados.clear()
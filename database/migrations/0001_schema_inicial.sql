@@ -0,0 +1,73 @@
+-- Estrutura base do Partlog (idempotente para bancos criados antes do controle de versão)
+
+CREATE TABLE IF NOT EXISTS clientes (
+    cnpj TEXT PRIMARY KEY,
+    cliente TEXT,
+    grupo TEXT,
+    cidade TEXT,
+    estado TEXT,
+    regiao TEXT
+);
+
+CREATE TABLE IF NOT EXISTS itens (
+    codigo_item TEXT PRIMARY KEY,
+    descricao_item TEXT,
+    grupo_item TEXT
+);
+
+CREATE TABLE IF NOT EXISTS avarias (
+    codigo_avaria TEXT PRIMARY KEY,
+    descricao_avaria TEXT,
+    status_avaria TEXT
+);
+
+CREATE TABLE IF NOT EXISTS notas_fiscais (
+    id SERIAL PRIMARY KEY,
+    numero_nota TEXT,
+    data_nota DATE,
+    cnpj_cliente TEXT,
+    cnpj_remetente TEXT,
+    data_recebimento DATE,
+    data_lancamento DATE,
+    FOREIGN KEY (cnpj_cliente) REFERENCES clientes(cnpj),
+    FOREIGN KEY (cnpj_remetente) REFERENCES clientes(cnpj)
+);
+
+CREATE TABLE IF NOT EXISTS itens_notas (
+    id SERIAL PRIMARY KEY,
+    id_nota_fiscal INTEGER,
+    codigo_item TEXT,
+    valor_item REAL,
+    ressarcimento REAL,
+    saldo_financeiro REAL DEFAULT 0,
+    status TEXT DEFAULT 'Pendente',
+    codigo_analise TEXT,
+    data_analise DATE,
+    numero_serie TEXT,
+    codigo_avaria TEXT,
+    descricao_avaria TEXT,
+    procedente_improcedente TEXT,
+    produzido_revenda TEXT,
+    fornecedor TEXT,
+    FOREIGN KEY (id_nota_fiscal) REFERENCES notas_fiscais(id)
+);
+
+CREATE TABLE IF NOT EXISTS notas_retorno (
+    id SERIAL PRIMARY KEY,
+    numero_nota TEXT NOT NULL,
+    data_emissao DATE NOT NULL,
+    tipo_retorno TEXT NOT NULL,
+    cnpj_emitente TEXT,
+    cnpj_remetente TEXT,
+    grupo_economico TEXT,
+    valor_total_nota REAL NOT NULL,
+    created_at TIMESTAMP DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS conciliacao (
+    id SERIAL PRIMARY KEY,
+    id_nota_retorno INTEGER REFERENCES notas_retorno(id),
+    id_item_entrada INTEGER REFERENCES itens_notas(id),
+    valor_abatido REAL NOT NULL,
+    data_conciliacao DATE DEFAULT CURRENT_DATE
+);
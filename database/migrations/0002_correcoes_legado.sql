@@ -0,0 +1,21 @@
+-- Correções que antes rodavam a cada inicialização (setup_database).
+-- Agora executam uma única vez por banco.
+
+ALTER TABLE clientes ADD COLUMN IF NOT EXISTS grupo TEXT;
+ALTER TABLE itens_notas ADD COLUMN IF NOT EXISTS saldo_financeiro REAL DEFAULT 0;
+
+-- Backfill do saldo para itens lançados antes da coluna existir
+-- (itens já conciliados ficam de fora: saldo zero neles é legítimo)
+UPDATE itens_notas SET saldo_financeiro = valor_item
+WHERE saldo_financeiro = 0 AND valor_item > 0
+  AND NOT EXISTS (SELECT 1 FROM conciliacao c WHERE c.id_item_entrada = itens_notas.id);
+
+-- Tabela de retorno: emitente novo e cnpj_cliente renomeado para cnpj_remetente
+ALTER TABLE notas_retorno ADD COLUMN IF NOT EXISTS cnpj_emitente TEXT;
+
+DO $$
+BEGIN
+    IF EXISTS(SELECT * FROM information_schema.columns WHERE table_name = 'notas_retorno' AND column_name = 'cnpj_cliente') THEN
+        ALTER TABLE notas_retorno RENAME COLUMN cnpj_cliente TO cnpj_remetente;
+    END IF;
+END $$;
@@ -0,0 +1,33 @@
+-- migracao: sem-transacao
+-- Índices dos caminhos quentes (Análise, Relatório, Retorno e Dashboard).
+-- Criados com CONCURRENTLY para não travar escrita em bancos já populados.
+
+-- itens_notas: join com a nota, filtros de status e busca por código de análise
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_itens_notas_id_nota_fiscal ON itens_notas (id_nota_fiscal);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_itens_notas_status ON itens_notas (status);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_itens_notas_codigo_analise ON itens_notas (codigo_analise);
+
+-- Parciais: só o que as telas operacionais realmente varrem
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_itens_notas_pendentes
+    ON itens_notas (id_nota_fiscal, codigo_analise) WHERE status = 'Pendente';
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_itens_notas_saldo_aberto
+    ON itens_notas (id_nota_fiscal) WHERE saldo_financeiro > 0;
+
+-- conciliacao: ligações item <-> nota de retorno
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_conciliacao_id_item_entrada ON conciliacao (id_item_entrada);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_conciliacao_id_nota_retorno ON conciliacao (id_nota_retorno);
+
+-- notas_fiscais: safra (recebimento), clientes e ordenação do relatório
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_notas_fiscais_data_recebimento ON notas_fiscais (data_recebimento);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_notas_fiscais_cnpj_cliente ON notas_fiscais (cnpj_cliente);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_notas_fiscais_cnpj_remetente ON notas_fiscais (cnpj_remetente);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_notas_fiscais_lancamento
+    ON notas_fiscais (data_lancamento DESC, numero_nota DESC);
+
+-- notas_retorno: histórico mensal do Dashboard
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_notas_retorno_data_emissao ON notas_retorno (data_emissao);
+
+ANALYZE itens_notas;
+ANALYZE notas_fiscais;
+ANALYZE conciliacao;
+ANALYZE notas_retorno;
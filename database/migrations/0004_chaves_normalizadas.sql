@@ -0,0 +1,31 @@
+-- Chaves normalizadas para a busca do Retorno.
+-- Colunas geradas (STORED) são mantidas pelo próprio banco em todo INSERT/UPDATE,
+-- permitindo joins e filtros por índice no lugar de REGEXP_REPLACE/LTRIM em tempo de consulta.
+
+ALTER TABLE clientes
+    ADD COLUMN IF NOT EXISTS cnpj_digitos TEXT
+    GENERATED ALWAYS AS (regexp_replace(COALESCE(cnpj, ''), '[^0-9]', '', 'g')) STORED;
+
+ALTER TABLE notas_fiscais
+    ADD COLUMN IF NOT EXISTS cnpj_cliente_digitos TEXT
+    GENERATED ALWAYS AS (regexp_replace(COALESCE(cnpj_cliente, ''), '[^0-9]', '', 'g')) STORED;
+
+ALTER TABLE notas_fiscais
+    ADD COLUMN IF NOT EXISTS cnpj_remetente_digitos TEXT
+    GENERATED ALWAYS AS (regexp_replace(COALESCE(cnpj_remetente, ''), '[^0-9]', '', 'g')) STORED;
+
+-- Número da nota sem zeros à esquerda ('00123' -> '123'; só zeros -> '0')
+ALTER TABLE notas_fiscais
+    ADD COLUMN IF NOT EXISTS numero_nota_norm TEXT
+    GENERATED ALWAYS AS (COALESCE(NULLIF(ltrim(COALESCE(numero_nota, ''), '0'), ''), '0')) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_clientes_cnpj_digitos ON clientes (cnpj_digitos);
+CREATE INDEX IF NOT EXISTS idx_notas_fiscais_cliente_nota ON notas_fiscais (cnpj_cliente_digitos, numero_nota_norm);
+CREATE INDEX IF NOT EXISTS idx_notas_fiscais_remetente_nota ON notas_fiscais (cnpj_remetente_digitos, numero_nota_norm);
+
+-- Busca por grupo econômico (ILIKE '%termo%') via trigramas
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX IF NOT EXISTS idx_clientes_grupo_trgm ON clientes USING gin (grupo gin_trgm_ops);
+
+ANALYZE clientes;
+ANALYZE notas_fiscais;
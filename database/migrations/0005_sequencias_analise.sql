@@ -0,0 +1,72 @@
+-- Gerador de códigos de análise por (ano, mês).
+-- Formato novo: letra do mês + ano com 2 dígitos + sequencial de 6 dígitos (ex: A26-000052).
+-- O formato antigo (A0052) repetia a letra todo ano e parava em 9999 itens por mês.
+
+CREATE TABLE IF NOT EXISTS sequencias_analise (
+    ano SMALLINT NOT NULL,
+    mes SMALLINT NOT NULL CHECK (mes BETWEEN 1 AND 12),
+    ultimo INTEGER NOT NULL DEFAULT 0 CHECK (ultimo >= 0),
+    PRIMARY KEY (ano, mes)
+);
+
+-- 1. Converte os códigos legados. O ano vem da data de lançamento da nota; se a letra
+--    for de um mês posterior ao do lançamento (nota de dezembro lançada em janeiro),
+--    o código é do ano anterior.
+WITH legado AS (
+    SELECT i.id,
+           left(i.codigo_analise, 1) AS letra,
+           substr(i.codigo_analise, 2)::int AS seq,
+           COALESCE(nf.data_lancamento, nf.data_recebimento, nf.data_nota, CURRENT_DATE) AS referencia
+    FROM itens_notas i
+    JOIN notas_fiscais nf ON nf.id = i.id_nota_fiscal
+    WHERE i.codigo_analise ~ '^[A-L][0-9]{1,6}$'
+), convertido AS (
+    SELECT id, letra, seq,
+           EXTRACT(YEAR FROM referencia)::int
+             - CASE WHEN ascii(letra) - 64 > EXTRACT(MONTH FROM referencia) THEN 1 ELSE 0 END AS ano
+    FROM legado
+)
+UPDATE itens_notas i
+SET codigo_analise = c.letra || lpad((c.ano % 100)::text, 2, '0') || '-' || lpad(c.seq::text, 6, '0')
+FROM convertido c
+WHERE i.id = c.id;
+
+-- 2. Códigos repetidos (gerados em paralelo por duas estações no esquema antigo):
+--    o item mais antigo mantém o código, os demais recebem os próximos do mês.
+WITH novos AS (
+    SELECT id, codigo_analise,
+           left(codigo_analise, 4) AS prefixo,
+           row_number() OVER (PARTITION BY codigo_analise ORDER BY id) AS ocorrencia
+    FROM itens_notas
+    WHERE codigo_analise ~ '^[A-L][0-9]{2}-[0-9]{6}$'
+), maximos AS (
+    SELECT prefixo, MAX(substr(codigo_analise, 5)::int) AS maximo
+    FROM novos
+    GROUP BY prefixo
+), renumerar AS (
+    SELECT n.id, n.prefixo,
+           row_number() OVER (PARTITION BY n.prefixo ORDER BY n.id) AS k
+    FROM novos n
+    WHERE n.ocorrencia > 1
+)
+UPDATE itens_notas i
+SET codigo_analise = r.prefixo || lpad((m.maximo + r.k)::text, 6, '0')
+FROM renumerar r
+JOIN maximos m ON m.prefixo = r.prefixo
+WHERE i.id = r.id;
+
+-- 3. Contadores partem do maior código existente de cada mês
+INSERT INTO sequencias_analise (ano, mes, ultimo)
+SELECT 2000 + substr(codigo_analise, 2, 2)::int,
+       ascii(left(codigo_analise, 1)) - 64,
+       MAX(substr(codigo_analise, 5)::int)
+FROM itens_notas
+WHERE codigo_analise ~ '^[A-L][0-9]{2}-[0-9]{6}$'
+GROUP BY 1, 2
+ON CONFLICT (ano, mes) DO UPDATE SET ultimo = GREATEST(sequencias_analise.ultimo, EXCLUDED.ultimo);
+
+-- 4. Garantia no banco: um código gerado nunca se repete
+--    (códigos digitados à mão em outro formato ficam fora da restrição)
+CREATE UNIQUE INDEX IF NOT EXISTS uq_itens_notas_codigo_analise
+    ON itens_notas (codigo_analise)
+    WHERE codigo_analise ~ '^[A-L][0-9]{2}-[0-9]{6}$';
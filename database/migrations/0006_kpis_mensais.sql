@@ -0,0 +1,330 @@
+-- Rollups mensais dos indicadores do Dashboard.
+-- O Dashboard passa a ler poucas linhas pré-agregadas por mês em vez de
+-- agregar todo o histórico de itens_notas/conciliacao a cada abertura.
+--
+-- Atualização incremental: triggers por comando (com tabelas de transição)
+-- anotam em kpi_meses_pendentes os meses afetados por cada gravação, e
+-- kpi_processar_pendentes() recalcula só esses meses. A fila não tem chave
+-- única de propósito: duas estações gravando no mesmo mês não esperam uma pela outra.
+-- Os valores são somados em NUMERIC (somas de REAL acumulam erro de arredondamento).
+
+-- Mês de referência das entradas: 1º dia do mês de recebimento da nota.
+-- Itens sem nota ou notas sem data de recebimento ficam em '-infinity'.
+CREATE OR REPLACE FUNCTION kpi_mes(d DATE) RETURNS DATE
+LANGUAGE sql IMMUTABLE AS $$
+    SELECT COALESCE(date_trunc('month', d::timestamp)::date, '-infinity'::date)
+$$;
+
+-- Entradas por mês de recebimento (gráfico "Entrada vs Devolução" e defasagem)
+CREATE TABLE IF NOT EXISTS kpi_entradas_mes (
+    mes DATE PRIMARY KEY,
+    ultimo_recebimento DATE NOT NULL,
+    valor_recebido NUMERIC NOT NULL DEFAULT 0,
+    valor_retornado NUMERIC NOT NULL DEFAULT 0
+);
+
+-- Distribuição de status (e custo das procedentes) por mês de recebimento
+CREATE TABLE IF NOT EXISTS kpi_status_mes (
+    mes DATE NOT NULL,
+    status_final TEXT NOT NULL,
+    qtd BIGINT NOT NULL DEFAULT 0,
+    valor_total NUMERIC NOT NULL DEFAULT 0,
+    qtd_procedente BIGINT NOT NULL DEFAULT 0,
+    custo_procedente NUMERIC NOT NULL DEFAULT 0,
+    PRIMARY KEY (mes, status_final)
+);
+
+-- Valor retornado por mês de emissão da nota de retorno
+CREATE TABLE IF NOT EXISTS kpi_retornos_mes (
+    mes DATE PRIMARY KEY,
+    valor_total NUMERIC NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS kpi_meses_pendentes (
+    id BIGSERIAL PRIMARY KEY,
+    rollup TEXT NOT NULL CHECK (rollup IN ('entradas', 'retornos')),
+    mes DATE NOT NULL
+);
+
+-- ---------------------------------------------------------------------------
+-- Recalculo de um conjunto de meses
+-- ---------------------------------------------------------------------------
+
+CREATE OR REPLACE FUNCTION kpi_recalcular_entradas(meses DATE[]) RETURNS VOID
+LANGUAGE plpgsql AS $$
+BEGIN
+    DELETE FROM kpi_entradas_mes WHERE mes = ANY(meses);
+    DELETE FROM kpi_status_mes WHERE mes = ANY(meses);
+
+    -- Meses reais: faixa de datas (usa idx_notas_fiscais_data_recebimento)
+    INSERT INTO kpi_entradas_mes (mes, ultimo_recebimento, valor_recebido, valor_retornado)
+    SELECT m.mes,
+           MAX(n.data_recebimento),
+           COALESCE(SUM(it.recebido), 0),
+           COALESCE(SUM(it.retornado), 0)
+    FROM unnest(meses) AS m(mes)
+    JOIN notas_fiscais n
+      ON n.data_recebimento >= m.mes
+     AND n.data_recebimento < m.mes + INTERVAL '1 month'
+    LEFT JOIN LATERAL (
+        -- Mesma regra da consulta antiga: o item conta uma vez por conciliação
+        SELECT SUM(i.valor_item::numeric) AS recebido,
+               SUM(i.valor_item::numeric * (SELECT COUNT(*) FROM conciliacao c WHERE c.id_item_entrada = i.id)) AS retornado
+        FROM itens_notas i
+        WHERE i.id_nota_fiscal = n.id
+    ) it ON TRUE
+    WHERE m.mes <> '-infinity'
+    GROUP BY m.mes;
+
+    INSERT INTO kpi_status_mes (mes, status_final, qtd, valor_total, qtd_procedente, custo_procedente)
+    SELECT x.mes,
+           COALESCE(CASE
+               WHEN x.status = 'Pendente' THEN 'Pendente'
+               WHEN x.procedente_improcedente = 'Procedente' THEN 'Procedente'
+               WHEN x.procedente_improcedente = 'Improcedente' THEN 'Improcedente'
+               ELSE x.status
+           END, 'Sem status'),
+           COUNT(*),
+           COALESCE(SUM(x.valor_item::numeric), 0),
+           COUNT(*) FILTER (WHERE x.procedente_improcedente = 'Procedente'),
+           COALESCE(SUM(x.valor_item::numeric + x.ressarcimento::numeric) FILTER (WHERE x.procedente_improcedente = 'Procedente'), 0)
+    FROM (
+        SELECT m.mes, i.status, i.procedente_improcedente, i.valor_item, i.ressarcimento
+        FROM unnest(meses) AS m(mes)
+        JOIN notas_fiscais n
+          ON n.data_recebimento >= m.mes
+         AND n.data_recebimento < m.mes + INTERVAL '1 month'
+        JOIN itens_notas i ON i.id_nota_fiscal = n.id
+        WHERE m.mes <> '-infinity'
+        UNION ALL
+        -- Sem data de recebimento (raro): varre os itens
+        SELECT '-infinity'::date, i.status, i.procedente_improcedente, i.valor_item, i.ressarcimento
+        FROM itens_notas i
+        LEFT JOIN notas_fiscais n ON n.id = i.id_nota_fiscal
+        WHERE n.data_recebimento IS NULL
+          AND '-infinity'::date = ANY(meses)
+    ) x
+    GROUP BY 1, 2;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION kpi_recalcular_retornos(meses DATE[]) RETURNS VOID
+LANGUAGE plpgsql AS $$
+BEGIN
+    DELETE FROM kpi_retornos_mes WHERE mes = ANY(meses);
+
+    INSERT INTO kpi_retornos_mes (mes, valor_total)
+    SELECT m.mes, COALESCE(SUM(i.valor_item::numeric), 0)
+    FROM unnest(meses) AS m(mes)
+    JOIN notas_retorno nr
+      ON nr.data_emissao >= m.mes
+     AND nr.data_emissao < m.mes + INTERVAL '1 month'
+    LEFT JOIN conciliacao c ON c.id_nota_retorno = nr.id
+    LEFT JOIN itens_notas i ON i.id = c.id_item_entrada
+    GROUP BY m.mes;
+END;
+$$;
+
+-- Consome a fila e recalcula os meses anotados. Retorna quantos meses foram recalculados.
+-- Anotações de transações ainda abertas não são vistas pelo DELETE e ficam para a próxima rodada.
+CREATE OR REPLACE FUNCTION kpi_processar_pendentes() RETURNS INTEGER
+LANGUAGE plpgsql AS $$
+DECLARE
+    v_entradas DATE[];
+    v_retornos DATE[];
+BEGIN
+    PERFORM pg_advisory_xact_lock(748213015);
+
+    WITH removidos AS (
+        DELETE FROM kpi_meses_pendentes RETURNING rollup, mes
+    )
+    SELECT array_agg(DISTINCT mes) FILTER (WHERE rollup = 'entradas'),
+           array_agg(DISTINCT mes) FILTER (WHERE rollup = 'retornos')
+    INTO v_entradas, v_retornos
+    FROM removidos;
+
+    IF v_entradas IS NOT NULL THEN
+        PERFORM kpi_recalcular_entradas(v_entradas);
+    END IF;
+    IF v_retornos IS NOT NULL THEN
+        PERFORM kpi_recalcular_retornos(v_retornos);
+    END IF;
+
+    RETURN COALESCE(cardinality(v_entradas), 0) + COALESCE(cardinality(v_retornos), 0);
+END;
+$$;
+
+-- Recalculo completo (carga inicial ou correção manual)
+CREATE OR REPLACE FUNCTION kpi_recalcular_tudo() RETURNS INTEGER
+LANGUAGE plpgsql AS $$
+DECLARE
+    v_entradas DATE[];
+    v_retornos DATE[];
+BEGIN
+    PERFORM pg_advisory_xact_lock(748213015);
+
+    DELETE FROM kpi_meses_pendentes;
+    DELETE FROM kpi_entradas_mes;
+    DELETE FROM kpi_status_mes;
+    DELETE FROM kpi_retornos_mes;
+
+    SELECT array_agg(DISTINCT kpi_mes(data_recebimento)) || '-infinity'::date
+    INTO v_entradas FROM notas_fiscais;
+    SELECT array_agg(DISTINCT kpi_mes(data_emissao))
+    INTO v_retornos FROM notas_retorno;
+
+    PERFORM kpi_recalcular_entradas(v_entradas);
+    IF v_retornos IS NOT NULL THEN
+        PERFORM kpi_recalcular_retornos(v_retornos);
+    END IF;
+
+    RETURN COALESCE(cardinality(v_entradas), 0) + COALESCE(cardinality(v_retornos), 0);
+END;
+$$;
+
+-- ---------------------------------------------------------------------------
+-- Triggers que anotam os meses afetados (uma vez por comando, não por linha)
+-- ---------------------------------------------------------------------------
+
+CREATE OR REPLACE FUNCTION kpi_marcar_notas_fiscais() RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO kpi_meses_pendentes (rollup, mes)
+        SELECT DISTINCT 'entradas', kpi_mes(data_recebimento) FROM novas;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO kpi_meses_pendentes (rollup, mes)
+        SELECT DISTINCT 'entradas', kpi_mes(data_recebimento) FROM antigas;
+    ELSE
+        INSERT INTO kpi_meses_pendentes (rollup, mes)
+        SELECT DISTINCT 'entradas', mes
+        FROM antigas a
+        JOIN novas n ON n.id = a.id
+        CROSS JOIN LATERAL (VALUES (kpi_mes(a.data_recebimento)), (kpi_mes(n.data_recebimento))) v(mes)
+        WHERE a.data_recebimento IS DISTINCT FROM n.data_recebimento;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION kpi_marcar_itens_notas() RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO kpi_meses_pendentes (rollup, mes)
+        SELECT DISTINCT 'entradas', kpi_mes(nf.data_recebimento)
+        FROM novas i LEFT JOIN notas_fiscais nf ON nf.id = i.id_nota_fiscal;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO kpi_meses_pendentes (rollup, mes)
+        SELECT DISTINCT 'entradas', kpi_mes(nf.data_recebimento)
+        FROM antigas i LEFT JOIN notas_fiscais nf ON nf.id = i.id_nota_fiscal;
+    ELSE
+        -- Só mudanças nas colunas que entram nos indicadores
+        -- (o abatimento de saldo do Retorno, por exemplo, não suja nada aqui)
+        WITH alterados AS (
+            SELECT a.id, a.id_nota_fiscal AS nota_antiga, n.id_nota_fiscal AS nota_nova,
+                   a.valor_item IS DISTINCT FROM n.valor_item AS mudou_valor
+            FROM antigas a
+            JOIN novas n ON n.id = a.id
+            WHERE a.id_nota_fiscal IS DISTINCT FROM n.id_nota_fiscal
+               OR a.valor_item IS DISTINCT FROM n.valor_item
+               OR a.ressarcimento IS DISTINCT FROM n.ressarcimento
+               OR a.status IS DISTINCT FROM n.status
+               OR a.procedente_improcedente IS DISTINCT FROM n.procedente_improcedente
+        )
+        INSERT INTO kpi_meses_pendentes (rollup, mes)
+        SELECT DISTINCT 'entradas', kpi_mes(nf.data_recebimento)
+        FROM alterados x
+        CROSS JOIN LATERAL (VALUES (x.nota_antiga), (x.nota_nova)) v(id_nota)
+        LEFT JOIN notas_fiscais nf ON nf.id = v.id_nota
+        UNION
+        SELECT DISTINCT 'retornos', kpi_mes(nr.data_emissao)
+        FROM alterados x
+        JOIN conciliacao c ON c.id_item_entrada = x.id
+        JOIN notas_retorno nr ON nr.id = c.id_nota_retorno
+        WHERE x.mudou_valor;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION kpi_marcar_notas_retorno() RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO kpi_meses_pendentes (rollup, mes)
+        SELECT DISTINCT 'retornos', kpi_mes(data_emissao) FROM novas;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO kpi_meses_pendentes (rollup, mes)
+        SELECT DISTINCT 'retornos', kpi_mes(data_emissao) FROM antigas;
+    ELSE
+        INSERT INTO kpi_meses_pendentes (rollup, mes)
+        SELECT DISTINCT 'retornos', mes
+        FROM antigas a
+        JOIN novas n ON n.id = a.id
+        CROSS JOIN LATERAL (VALUES (kpi_mes(a.data_emissao)), (kpi_mes(n.data_emissao))) v(mes)
+        WHERE a.data_emissao IS DISTINCT FROM n.data_emissao;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION kpi_marcar_conciliacao() RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    -- Conciliação mexe nos dois rollups: mês do retorno e safra (mês de recebimento) do item
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO kpi_meses_pendentes (rollup, mes)
+        SELECT DISTINCT 'retornos', kpi_mes(nr.data_emissao)
+        FROM novas c JOIN notas_retorno nr ON nr.id = c.id_nota_retorno
+        UNION
+        SELECT DISTINCT 'entradas', kpi_mes(nf.data_recebimento)
+        FROM novas c
+        JOIN itens_notas i ON i.id = c.id_item_entrada
+        LEFT JOIN notas_fiscais nf ON nf.id = i.id_nota_fiscal;
+    END IF;
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        INSERT INTO kpi_meses_pendentes (rollup, mes)
+        SELECT DISTINCT 'retornos', kpi_mes(nr.data_emissao)
+        FROM antigas c JOIN notas_retorno nr ON nr.id = c.id_nota_retorno
+        UNION
+        SELECT DISTINCT 'entradas', kpi_mes(nf.data_recebimento)
+        FROM antigas c
+        JOIN itens_notas i ON i.id = c.id_item_entrada
+        LEFT JOIN notas_fiscais nf ON nf.id = i.id_nota_fiscal;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+-- Tabelas de transição exigem um trigger por evento
+CREATE OR REPLACE TRIGGER kpi_notas_fiscais_ins AFTER INSERT ON notas_fiscais
+    REFERENCING NEW TABLE AS novas FOR EACH STATEMENT EXECUTE FUNCTION kpi_marcar_notas_fiscais();
+CREATE OR REPLACE TRIGGER kpi_notas_fiscais_upd AFTER UPDATE ON notas_fiscais
+    REFERENCING OLD TABLE AS antigas NEW TABLE AS novas FOR EACH STATEMENT EXECUTE FUNCTION kpi_marcar_notas_fiscais();
+CREATE OR REPLACE TRIGGER kpi_notas_fiscais_del AFTER DELETE ON notas_fiscais
+    REFERENCING OLD TABLE AS antigas FOR EACH STATEMENT EXECUTE FUNCTION kpi_marcar_notas_fiscais();
+
+CREATE OR REPLACE TRIGGER kpi_itens_notas_ins AFTER INSERT ON itens_notas
+    REFERENCING NEW TABLE AS novas FOR EACH STATEMENT EXECUTE FUNCTION kpi_marcar_itens_notas();
+CREATE OR REPLACE TRIGGER kpi_itens_notas_upd AFTER UPDATE ON itens_notas
+    REFERENCING OLD TABLE AS antigas NEW TABLE AS novas FOR EACH STATEMENT EXECUTE FUNCTION kpi_marcar_itens_notas();
+CREATE OR REPLACE TRIGGER kpi_itens_notas_del AFTER DELETE ON itens_notas
+    REFERENCING OLD TABLE AS antigas FOR EACH STATEMENT EXECUTE FUNCTION kpi_marcar_itens_notas();
+
+CREATE OR REPLACE TRIGGER kpi_notas_retorno_ins AFTER INSERT ON notas_retorno
+    REFERENCING NEW TABLE AS novas FOR EACH STATEMENT EXECUTE FUNCTION kpi_marcar_notas_retorno();
+CREATE OR REPLACE TRIGGER kpi_notas_retorno_upd AFTER UPDATE ON notas_retorno
+    REFERENCING OLD TABLE AS antigas NEW TABLE AS novas FOR EACH STATEMENT EXECUTE FUNCTION kpi_marcar_notas_retorno();
+CREATE OR REPLACE TRIGGER kpi_notas_retorno_del AFTER DELETE ON notas_retorno
+    REFERENCING OLD TABLE AS antigas FOR EACH STATEMENT EXECUTE FUNCTION kpi_marcar_notas_retorno();
+
+CREATE OR REPLACE TRIGGER kpi_conciliacao_ins AFTER INSERT ON conciliacao
+    REFERENCING NEW TABLE AS novas FOR EACH STATEMENT EXECUTE FUNCTION kpi_marcar_conciliacao();
+CREATE OR REPLACE TRIGGER kpi_conciliacao_upd AFTER UPDATE ON conciliacao
+    REFERENCING OLD TABLE AS antigas NEW TABLE AS novas FOR EACH STATEMENT EXECUTE FUNCTION kpi_marcar_conciliacao();
+CREATE OR REPLACE TRIGGER kpi_conciliacao_del AFTER DELETE ON conciliacao
+    REFERENCING OLD TABLE AS antigas FOR EACH STATEMENT EXECUTE FUNCTION kpi_marcar_conciliacao();
+
+-- Carga inicial
+SELECT kpi_recalcular_tudo();
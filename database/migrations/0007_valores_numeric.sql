@@ -0,0 +1,23 @@
+-- Valores monetários em NUMERIC(14,2) em vez de REAL.
+-- REAL guarda 123.45 como 123.4499969..., o que espalhava arredondamentos
+-- pelas somas e obrigava o Retorno a comparar saldos com tolerância. Com NUMERIC
+-- o driver devolve Decimal e os valores chegam exatos até a tela.
+-- O round(::numeric, 2) recupera o valor digitado (o REAL tem 6 dígitos significativos).
+
+ALTER TABLE itens_notas
+    ALTER COLUMN valor_item TYPE NUMERIC(14,2) USING round(valor_item::numeric, 2),
+    ALTER COLUMN ressarcimento TYPE NUMERIC(14,2) USING round(ressarcimento::numeric, 2),
+    ALTER COLUMN saldo_financeiro TYPE NUMERIC(14,2) USING round(saldo_financeiro::numeric, 2);
+
+ALTER TABLE conciliacao
+    ALTER COLUMN valor_abatido TYPE NUMERIC(14,2) USING round(valor_abatido::numeric, 2);
+
+ALTER TABLE notas_retorno
+    ALTER COLUMN valor_total_nota TYPE NUMERIC(14,2) USING round(valor_total_nota::numeric, 2);
+
+-- ALTER TYPE não dispara as triggers: os rollups do Dashboard são refeitos com os valores arredondados
+SELECT kpi_recalcular_tudo();
+
+ANALYZE itens_notas;
+ANALYZE conciliacao;
+ANALYZE notas_retorno;
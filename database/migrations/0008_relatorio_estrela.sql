@@ -0,0 +1,326 @@
+-- Esquema estrela para o Relatório e a listagem de Ajustes.
+-- As telas passam a ler fato_itens (uma linha por item, retornos já consolidados)
+-- com quatro dimensões pequenas, em vez do join de sete tabelas operacionais.
+--
+-- Carga incremental por marca d'água de transação: toda linha das tabelas de origem
+-- guarda em versao_etl o id da transação que a gravou por último (xid8). Cada rodada
+-- reprocessa os itens tocados desde a marca anterior e avança a marca para o xmin do
+-- snapshot (tudo abaixo dele já terminou; o que estiver acima e ainda aberto fica
+-- para a próxima rodada). Exclusões não deixam linha para comparar e vão para o
+-- log etl_itens_alterados. Reprocessar um item é idempotente (apaga e reinsere).
+
+-- ---------------------------------------------------------------------------
+-- Versão de gravação nas tabelas de origem
+-- ---------------------------------------------------------------------------
+
+-- O DEFAULT constante não reescreve as tabelas; as linhas existentes ficam com versão 0
+-- (a carga inicial no fim do arquivo as cobre). Só então o DEFAULT passa a ser a
+-- transação corrente, que vale para os INSERTs; os UPDATEs são marcados pela trigger.
+ALTER TABLE itens_notas ADD COLUMN IF NOT EXISTS versao_etl xid8 NOT NULL DEFAULT '0';
+ALTER TABLE notas_fiscais ADD COLUMN IF NOT EXISTS versao_etl xid8 NOT NULL DEFAULT '0';
+ALTER TABLE conciliacao ADD COLUMN IF NOT EXISTS versao_etl xid8 NOT NULL DEFAULT '0';
+ALTER TABLE notas_retorno ADD COLUMN IF NOT EXISTS versao_etl xid8 NOT NULL DEFAULT '0';
+
+ALTER TABLE itens_notas ALTER COLUMN versao_etl SET DEFAULT pg_current_xact_id();
+ALTER TABLE notas_fiscais ALTER COLUMN versao_etl SET DEFAULT pg_current_xact_id();
+ALTER TABLE conciliacao ALTER COLUMN versao_etl SET DEFAULT pg_current_xact_id();
+ALTER TABLE notas_retorno ALTER COLUMN versao_etl SET DEFAULT pg_current_xact_id();
+
+CREATE INDEX IF NOT EXISTS idx_itens_notas_versao_etl ON itens_notas (versao_etl);
+CREATE INDEX IF NOT EXISTS idx_notas_fiscais_versao_etl ON notas_fiscais (versao_etl);
+CREATE INDEX IF NOT EXISTS idx_conciliacao_versao_etl ON conciliacao (versao_etl);
+CREATE INDEX IF NOT EXISTS idx_notas_retorno_versao_etl ON notas_retorno (versao_etl);
+
+CREATE OR REPLACE FUNCTION etl_marcar_versao() RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.versao_etl := pg_current_xact_id();
+    RETURN NEW;
+END;
+$$;
+
+CREATE OR REPLACE TRIGGER etl_itens_notas_versao BEFORE UPDATE ON itens_notas
+    FOR EACH ROW EXECUTE FUNCTION etl_marcar_versao();
+CREATE OR REPLACE TRIGGER etl_notas_fiscais_versao BEFORE UPDATE ON notas_fiscais
+    FOR EACH ROW EXECUTE FUNCTION etl_marcar_versao();
+CREATE OR REPLACE TRIGGER etl_conciliacao_versao BEFORE UPDATE ON conciliacao
+    FOR EACH ROW EXECUTE FUNCTION etl_marcar_versao();
+CREATE OR REPLACE TRIGGER etl_notas_retorno_versao BEFORE UPDATE ON notas_retorno
+    FOR EACH ROW EXECUTE FUNCTION etl_marcar_versao();
+
+-- Log de itens cujo fato precisa ser refeito sem que reste linha com versão nova:
+-- item excluído, ou conciliação excluída/movida para outro item.
+CREATE TABLE IF NOT EXISTS etl_itens_alterados (
+    id BIGSERIAL PRIMARY KEY,
+    id_item INTEGER NOT NULL,
+    versao xid8 NOT NULL DEFAULT pg_current_xact_id()
+);
+
+CREATE INDEX IF NOT EXISTS idx_etl_itens_alterados_versao ON etl_itens_alterados (versao);
+
+CREATE OR REPLACE FUNCTION etl_registrar_exclusao() RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_TABLE_NAME = 'itens_notas' THEN
+        INSERT INTO etl_itens_alterados (id_item) SELECT id FROM antigas;
+    ELSE
+        INSERT INTO etl_itens_alterados (id_item)
+        SELECT DISTINCT id_item_entrada FROM antigas WHERE id_item_entrada IS NOT NULL;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE TRIGGER etl_itens_notas_del AFTER DELETE ON itens_notas
+    REFERENCING OLD TABLE AS antigas FOR EACH STATEMENT EXECUTE FUNCTION etl_registrar_exclusao();
+CREATE OR REPLACE TRIGGER etl_conciliacao_del AFTER DELETE ON conciliacao
+    REFERENCING OLD TABLE AS antigas FOR EACH STATEMENT EXECUTE FUNCTION etl_registrar_exclusao();
+CREATE OR REPLACE TRIGGER etl_conciliacao_upd AFTER UPDATE ON conciliacao
+    REFERENCING OLD TABLE AS antigas FOR EACH STATEMENT EXECUTE FUNCTION etl_registrar_exclusao();
+
+-- ---------------------------------------------------------------------------
+-- Dimensões (chave natural) e fato
+-- ---------------------------------------------------------------------------
+
+CREATE TABLE IF NOT EXISTS dim_cliente (
+    cnpj TEXT PRIMARY KEY,
+    cliente TEXT,
+    grupo TEXT,
+    cidade TEXT,
+    estado TEXT,
+    regiao TEXT
+);
+
+CREATE TABLE IF NOT EXISTS dim_item (
+    codigo_item TEXT PRIMARY KEY,
+    descricao_item TEXT,
+    grupo_item TEXT
+);
+
+CREATE TABLE IF NOT EXISTS dim_avaria (
+    codigo_avaria TEXT PRIMARY KEY,
+    descricao_avaria TEXT,
+    status_avaria TEXT
+);
+
+CREATE TABLE IF NOT EXISTS dim_calendario (
+    data DATE PRIMARY KEY,
+    ano SMALLINT NOT NULL,
+    trimestre SMALLINT NOT NULL,
+    mes SMALLINT NOT NULL,
+    ano_mes TEXT NOT NULL,
+    dia_semana SMALLINT NOT NULL
+);
+
+-- Grão: um item físico (itens_notas). Os retornos do item (pode haver mais de um
+-- abatimento parcial) vêm consolidados: números e tipos em lista, data do último.
+CREATE TABLE IF NOT EXISTS fato_itens (
+    id_item INTEGER PRIMARY KEY,
+    id_nota INTEGER NOT NULL,
+    status TEXT,
+    codigo_analise TEXT,
+    data_lancamento DATE,
+    data_recebimento DATE,
+    data_analise DATE,
+    data_emissao DATE,
+    nf_entrada TEXT,
+    cnpj_cliente TEXT,
+    cnpj_remetente TEXT,
+    codigo_item TEXT,
+    numero_serie TEXT,
+    codigo_avaria TEXT,
+    procedente_improcedente TEXT,
+    valor_item NUMERIC(14,2),
+    ressarcimento NUMERIC(14,2),
+    saldo_financeiro NUMERIC(14,2),
+    valor_abatido NUMERIC(14,2) NOT NULL DEFAULT 0,
+    qtd_retornos INTEGER NOT NULL DEFAULT 0,
+    nf_retorno TEXT,
+    tipo_retorno TEXT,
+    data_retorno DATE
+);
+
+CREATE INDEX IF NOT EXISTS idx_fato_itens_data_recebimento ON fato_itens (data_recebimento);
+CREATE INDEX IF NOT EXISTS idx_fato_itens_cliente ON fato_itens (cnpj_cliente);
+
+CREATE TABLE IF NOT EXISTS etl_controle (
+    processo TEXT PRIMARY KEY,
+    marca xid8 NOT NULL DEFAULT '0',
+    executado_em TIMESTAMPTZ,
+    itens_processados INTEGER NOT NULL DEFAULT 0
+);
+
+INSERT INTO etl_controle (processo) VALUES ('fato_itens') ON CONFLICT DO NOTHING;
+
+-- ---------------------------------------------------------------------------
+-- Carga
+-- ---------------------------------------------------------------------------
+
+-- Cadastros são pequenos: a cada rodada são conferidos por inteiro e só as linhas
+-- diferentes são gravadas. Registros excluídos da origem ficam (fatos antigos os citam).
+CREATE OR REPLACE FUNCTION etl_atualizar_dimensoes() RETURNS VOID
+LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO dim_cliente (cnpj, cliente, grupo, cidade, estado, regiao)
+    SELECT cnpj, cliente, grupo, cidade, estado, regiao FROM clientes
+    ON CONFLICT (cnpj) DO UPDATE
+       SET cliente = EXCLUDED.cliente, grupo = EXCLUDED.grupo, cidade = EXCLUDED.cidade,
+           estado = EXCLUDED.estado, regiao = EXCLUDED.regiao
+     WHERE (dim_cliente.cliente, dim_cliente.grupo, dim_cliente.cidade, dim_cliente.estado, dim_cliente.regiao)
+           IS DISTINCT FROM (EXCLUDED.cliente, EXCLUDED.grupo, EXCLUDED.cidade, EXCLUDED.estado, EXCLUDED.regiao);
+
+    INSERT INTO dim_item (codigo_item, descricao_item, grupo_item)
+    SELECT codigo_item, descricao_item, grupo_item FROM itens
+    ON CONFLICT (codigo_item) DO UPDATE
+       SET descricao_item = EXCLUDED.descricao_item, grupo_item = EXCLUDED.grupo_item
+     WHERE (dim_item.descricao_item, dim_item.grupo_item)
+           IS DISTINCT FROM (EXCLUDED.descricao_item, EXCLUDED.grupo_item);
+
+    INSERT INTO dim_avaria (codigo_avaria, descricao_avaria, status_avaria)
+    SELECT codigo_avaria, descricao_avaria, status_avaria FROM avarias
+    ON CONFLICT (codigo_avaria) DO UPDATE
+       SET descricao_avaria = EXCLUDED.descricao_avaria, status_avaria = EXCLUDED.status_avaria
+     WHERE (dim_avaria.descricao_avaria, dim_avaria.status_avaria)
+           IS DISTINCT FROM (EXCLUDED.descricao_avaria, EXCLUDED.status_avaria);
+
+    -- Calendário sempre cobre até o fim do ano seguinte
+    INSERT INTO dim_calendario (data, ano, trimestre, mes, ano_mes, dia_semana)
+    SELECT d::date, EXTRACT(YEAR FROM d), EXTRACT(QUARTER FROM d), EXTRACT(MONTH FROM d),
+           to_char(d, 'YYYY-MM'), EXTRACT(ISODOW FROM d)
+    FROM generate_series(date_trunc('year', CURRENT_DATE),
+                         date_trunc('year', CURRENT_DATE) + INTERVAL '2 years' - INTERVAL '1 day',
+                         INTERVAL '1 day') AS d
+    ON CONFLICT (data) DO NOTHING;
+END;
+$$;
+
+-- Refaz o fato dos itens informados (NULL = todos). Itens que não existem mais só saem.
+CREATE OR REPLACE FUNCTION etl_carregar_fato(itens INTEGER[]) RETURNS VOID
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF itens IS NULL THEN
+        DELETE FROM fato_itens;
+    ELSE
+        DELETE FROM fato_itens WHERE id_item = ANY(itens);
+    END IF;
+
+    INSERT INTO fato_itens (
+        id_item, id_nota, status, codigo_analise,
+        data_lancamento, data_recebimento, data_analise, data_emissao, nf_entrada,
+        cnpj_cliente, cnpj_remetente, codigo_item, numero_serie, codigo_avaria,
+        procedente_improcedente, valor_item, ressarcimento, saldo_financeiro,
+        valor_abatido, qtd_retornos, nf_retorno, tipo_retorno, data_retorno
+    )
+    SELECT l.id, n.id, l.status, l.codigo_analise,
+           n.data_lancamento, n.data_recebimento, l.data_analise, n.data_nota, n.numero_nota,
+           n.cnpj_cliente, n.cnpj_remetente, l.codigo_item, l.numero_serie, l.codigo_avaria,
+           l.procedente_improcedente, l.valor_item, l.ressarcimento, l.saldo_financeiro,
+           COALESCE(r.valor_abatido, 0), COALESCE(r.qtd, 0), r.nf_retorno, r.tipo_retorno, r.data_retorno
+    FROM itens_notas l
+    JOIN notas_fiscais n ON n.id = l.id_nota_fiscal
+    LEFT JOIN LATERAL (
+        SELECT SUM(c.valor_abatido) AS valor_abatido,
+               COUNT(*) AS qtd,
+               string_agg(nr.numero_nota, ', ' ORDER BY nr.data_emissao, nr.id) AS nf_retorno,
+               string_agg(DISTINCT nr.tipo_retorno, ', ') AS tipo_retorno,
+               MAX(nr.data_emissao) AS data_retorno
+        FROM conciliacao c
+        JOIN notas_retorno nr ON nr.id = c.id_nota_retorno
+        WHERE c.id_item_entrada = l.id
+    ) r ON r.qtd > 0
+    WHERE itens IS NULL OR l.id = ANY(itens);
+END;
+$$;
+
+-- Rodada incremental. Retorna quantos itens foram reprocessados.
+CREATE OR REPLACE FUNCTION etl_processar_fato() RETURNS INTEGER
+LANGUAGE plpgsql AS $$
+DECLARE
+    v_marca xid8;
+    v_nova_marca xid8;
+    v_itens INTEGER[];
+BEGIN
+    PERFORM pg_advisory_xact_lock(748213018);
+
+    -- Tomada depois do lock: transações abaixo dela já terminaram
+    v_nova_marca := pg_snapshot_xmin(pg_current_snapshot());
+    SELECT marca INTO v_marca FROM etl_controle WHERE processo = 'fato_itens';
+
+    PERFORM etl_atualizar_dimensoes();
+
+    SELECT array_agg(DISTINCT x.id_item) INTO v_itens
+    FROM (
+        SELECT id AS id_item FROM itens_notas WHERE versao_etl >= v_marca
+        UNION ALL
+        SELECT i.id FROM notas_fiscais n JOIN itens_notas i ON i.id_nota_fiscal = n.id
+        WHERE n.versao_etl >= v_marca
+        UNION ALL
+        SELECT id_item_entrada FROM conciliacao WHERE versao_etl >= v_marca
+        UNION ALL
+        SELECT c.id_item_entrada FROM notas_retorno nr JOIN conciliacao c ON c.id_nota_retorno = nr.id
+        WHERE nr.versao_etl >= v_marca
+        UNION ALL
+        SELECT id_item FROM etl_itens_alterados WHERE versao >= v_marca
+    ) x
+    WHERE x.id_item IS NOT NULL;
+
+    IF v_itens IS NOT NULL THEN
+        PERFORM etl_carregar_fato(v_itens);
+    END IF;
+
+    DELETE FROM etl_itens_alterados WHERE versao < v_nova_marca;
+    UPDATE etl_controle
+       SET marca = v_nova_marca, executado_em = now(), itens_processados = COALESCE(cardinality(v_itens), 0)
+     WHERE processo = 'fato_itens';
+
+    RETURN COALESCE(cardinality(v_itens), 0);
+END;
+$$;
+
+-- Rodada disparada pelo app (feed de alterações): se outra sessão já está
+-- carregando, não espera o lock e retorna NULL (o app tenta de novo em seguida).
+CREATE OR REPLACE FUNCTION etl_tentar_processar_fato() RETURNS INTEGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF NOT pg_try_advisory_xact_lock(748213018) THEN
+        RETURN NULL;
+    END IF;
+    RETURN etl_processar_fato();
+END;
+$$;
+
+-- Recarga completa (carga inicial ou correção manual). Retorna o total de itens no fato.
+CREATE OR REPLACE FUNCTION etl_recarregar_fato() RETURNS INTEGER
+LANGUAGE plpgsql AS $$
+DECLARE
+    v_nova_marca xid8;
+    v_total INTEGER;
+BEGIN
+    PERFORM pg_advisory_xact_lock(748213018);
+
+    v_nova_marca := pg_snapshot_xmin(pg_current_snapshot());
+
+    PERFORM etl_atualizar_dimensoes();
+    PERFORM etl_carregar_fato(NULL);
+    SELECT COUNT(*) INTO v_total FROM fato_itens;
+
+    DELETE FROM etl_itens_alterados WHERE versao < v_nova_marca;
+    UPDATE etl_controle
+       SET marca = v_nova_marca, executado_em = now(), itens_processados = v_total
+     WHERE processo = 'fato_itens';
+
+    RETURN v_total;
+END;
+$$;
+
+-- Histórico de datas anterior ao calendário automático
+INSERT INTO dim_calendario (data, ano, trimestre, mes, ano_mes, dia_semana)
+SELECT d::date, EXTRACT(YEAR FROM d), EXTRACT(QUARTER FROM d), EXTRACT(MONTH FROM d),
+       to_char(d, 'YYYY-MM'), EXTRACT(ISODOW FROM d)
+FROM generate_series(DATE '2000-01-01', date_trunc('year', CURRENT_DATE), INTERVAL '1 day') AS d
+ON CONFLICT (data) DO NOTHING;
+
+-- Carga inicial
+SELECT etl_recarregar_fato();
+
+ANALYZE fato_itens;
@@ -0,0 +1,152 @@
+-- Data de recebimento da nota repetida em itens_notas (e em conciliacao, para o item).
+-- É a chave do particionamento mensal opcional (0010_particionamento) e deixa os
+-- filtros por mês de recebimento irem direto aos itens, sem passar pela nota.
+--
+-- As cópias são mantidas pelo banco: chaves estrangeiras compostas com ON UPDATE CASCADE
+-- propagam uma mudança de data na nota para os itens e deles para a conciliação.
+-- Quem grava itens informa a data da nota (obrigatória: é a chave do particionamento);
+-- na conciliação, um trigger a copia do item quando o INSERT não a informa.
+
+ALTER TABLE itens_notas ADD COLUMN IF NOT EXISTS data_recebimento DATE;
+ALTER TABLE conciliacao ADD COLUMN IF NOT EXISTS data_recebimento_item DATE;
+
+UPDATE itens_notas i
+SET data_recebimento = n.data_recebimento
+FROM notas_fiscais n
+WHERE n.id = i.id_nota_fiscal
+  AND i.data_recebimento IS DISTINCT FROM n.data_recebimento;
+
+UPDATE conciliacao c
+SET data_recebimento_item = i.data_recebimento
+FROM itens_notas i
+WHERE i.id = c.id_item_entrada
+  AND c.data_recebimento_item IS DISTINCT FROM i.data_recebimento;
+
+-- Com a tabela particionada, estas passam a ser as chaves primárias
+ALTER TABLE notas_fiscais DROP CONSTRAINT IF EXISTS uq_notas_fiscais_id_recebimento;
+ALTER TABLE notas_fiscais ADD CONSTRAINT uq_notas_fiscais_id_recebimento UNIQUE (id, data_recebimento);
+ALTER TABLE itens_notas DROP CONSTRAINT IF EXISTS uq_itens_notas_id_recebimento;
+ALTER TABLE itens_notas ADD CONSTRAINT uq_itens_notas_id_recebimento UNIQUE (id, data_recebimento);
+
+ALTER TABLE itens_notas DROP CONSTRAINT IF EXISTS fk_itens_notas_nota_recebimento;
+ALTER TABLE itens_notas ADD CONSTRAINT fk_itens_notas_nota_recebimento
+    FOREIGN KEY (id_nota_fiscal, data_recebimento)
+    REFERENCES notas_fiscais (id, data_recebimento) ON UPDATE CASCADE;
+
+ALTER TABLE conciliacao DROP CONSTRAINT IF EXISTS fk_conciliacao_item_recebimento;
+ALTER TABLE conciliacao ADD CONSTRAINT fk_conciliacao_item_recebimento
+    FOREIGN KEY (id_item_entrada, data_recebimento_item)
+    REFERENCES itens_notas (id, data_recebimento) ON UPDATE CASCADE;
+
+CREATE INDEX IF NOT EXISTS idx_itens_notas_data_recebimento ON itens_notas (data_recebimento);
+
+-- Item sem data de recebimento é recusado com uma mensagem que diz o que falta.
+-- Não há trigger que a copie da nota no INSERT: com a tabela particionada, a linha
+-- sem data iria para a partição padrão e um BEFORE ROW trigger não pode trocá-la de
+-- partição. Itens antigos cuja nota não tem data ficam como estão (NOT VALID) e a
+-- restrição é validada quando não houver mais nenhum.
+ALTER TABLE itens_notas DROP CONSTRAINT IF EXISTS ck_itens_notas_data_recebimento;
+ALTER TABLE itens_notas ADD CONSTRAINT ck_itens_notas_data_recebimento
+    CHECK (data_recebimento IS NOT NULL) NOT VALID;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM itens_notas WHERE data_recebimento IS NULL) THEN
+        ALTER TABLE itens_notas VALIDATE CONSTRAINT ck_itens_notas_data_recebimento;
+    END IF;
+END;
+$$;
+
+-- Copia a data quando o item troca de nota (no UPDATE o PostgreSQL move a linha de
+-- partição normalmente) e quando a conciliação é gravada sem ela.
+CREATE OR REPLACE FUNCTION copiar_recebimento_nota() RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    SELECT data_recebimento INTO NEW.data_recebimento
+    FROM notas_fiscais WHERE id = NEW.id_nota_fiscal;
+    RETURN NEW;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION copiar_recebimento_item() RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    SELECT data_recebimento INTO NEW.data_recebimento_item
+    FROM itens_notas WHERE id = NEW.id_item_entrada;
+    RETURN NEW;
+END;
+$$;
+
+CREATE OR REPLACE TRIGGER itens_notas_recebimento_upd BEFORE UPDATE OF id_nota_fiscal ON itens_notas
+    FOR EACH ROW WHEN (OLD.id_nota_fiscal IS DISTINCT FROM NEW.id_nota_fiscal)
+    EXECUTE FUNCTION copiar_recebimento_nota();
+
+CREATE OR REPLACE TRIGGER conciliacao_recebimento_ins BEFORE INSERT ON conciliacao
+    FOR EACH ROW WHEN (NEW.data_recebimento_item IS NULL) EXECUTE FUNCTION copiar_recebimento_item();
+CREATE OR REPLACE TRIGGER conciliacao_recebimento_upd BEFORE UPDATE OF id_item_entrada ON conciliacao
+    FOR EACH ROW WHEN (OLD.id_item_entrada IS DISTINCT FROM NEW.id_item_entrada)
+    EXECUTE FUNCTION copiar_recebimento_item();
+
+-- Rollup de entradas filtrando os itens pela própria data de recebimento: com as tabelas
+-- particionadas, cada mês lê só a sua partição de notas e de itens.
+CREATE OR REPLACE FUNCTION kpi_recalcular_entradas(meses DATE[]) RETURNS VOID
+LANGUAGE plpgsql AS $$
+BEGIN
+    DELETE FROM kpi_entradas_mes WHERE mes = ANY(meses);
+    DELETE FROM kpi_status_mes WHERE mes = ANY(meses);
+
+    INSERT INTO kpi_entradas_mes (mes, ultimo_recebimento, valor_recebido, valor_retornado)
+    SELECT m.mes,
+           ult.ultimo_recebimento,
+           COALESCE(it.recebido, 0),
+           COALESCE(it.retornado, 0)
+    FROM unnest(meses) AS m(mes)
+    CROSS JOIN LATERAL (
+        SELECT MAX(n.data_recebimento) AS ultimo_recebimento
+        FROM notas_fiscais n
+        WHERE n.data_recebimento >= m.mes
+          AND n.data_recebimento < m.mes + INTERVAL '1 month'
+    ) ult
+    LEFT JOIN LATERAL (
+        -- Mesma regra da consulta antiga: o item conta uma vez por conciliação
+        SELECT SUM(i.valor_item::numeric) AS recebido,
+               SUM(i.valor_item::numeric * (SELECT COUNT(*) FROM conciliacao c WHERE c.id_item_entrada = i.id)) AS retornado
+        FROM itens_notas i
+        WHERE i.data_recebimento >= m.mes
+          AND i.data_recebimento < m.mes + INTERVAL '1 month'
+    ) it ON TRUE
+    WHERE m.mes <> '-infinity'
+      AND ult.ultimo_recebimento IS NOT NULL;
+
+    INSERT INTO kpi_status_mes (mes, status_final, qtd, valor_total, qtd_procedente, custo_procedente)
+    SELECT x.mes,
+           COALESCE(CASE
+               WHEN x.status = 'Pendente' THEN 'Pendente'
+               WHEN x.procedente_improcedente = 'Procedente' THEN 'Procedente'
+               WHEN x.procedente_improcedente = 'Improcedente' THEN 'Improcedente'
+               ELSE x.status
+           END, 'Sem status'),
+           COUNT(*),
+           COALESCE(SUM(x.valor_item::numeric), 0),
+           COUNT(*) FILTER (WHERE x.procedente_improcedente = 'Procedente'),
+           COALESCE(SUM(x.valor_item::numeric + x.ressarcimento::numeric) FILTER (WHERE x.procedente_improcedente = 'Procedente'), 0)
+    FROM (
+        SELECT m.mes, i.status, i.procedente_improcedente, i.valor_item, i.ressarcimento
+        FROM unnest(meses) AS m(mes)
+        JOIN itens_notas i
+          ON i.data_recebimento >= m.mes
+         AND i.data_recebimento < m.mes + INTERVAL '1 month'
+        WHERE m.mes <> '-infinity'
+        UNION ALL
+        -- Sem data de recebimento (raro; itens sem nota ou notas antigas)
+        SELECT '-infinity'::date, i.status, i.procedente_improcedente, i.valor_item, i.ressarcimento
+        FROM itens_notas i
+        WHERE i.data_recebimento IS NULL
+          AND '-infinity'::date = ANY(meses)
+    ) x
+    GROUP BY 1, 2;
+END;
+$$;
+
+ANALYZE itens_notas;
+ANALYZE conciliacao;
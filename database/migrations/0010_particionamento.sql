@@ -0,0 +1,222 @@
+-- Particionamento mensal (opcional) de notas_fiscais e itens_notas pela data de recebimento.
+-- Esta migração só cria as funções: a conversão de um banco existente é feita sob
+-- demanda com `python -m database.particoes converter` (janela de manutenção: as duas
+-- tabelas ficam travadas enquanto os dados são copiados).
+--
+-- Depois de convertidas, as consultas que filtram o mês de recebimento por faixa
+-- (rollups do Dashboard, ex: kpi_recalcular_entradas) leem só as partições do mês;
+-- os meses antigos ficam frios e o autovacuum trabalha só nas partições recentes.
+-- Linhas fora dos meses criados vão para a partição padrão (<tabela>_padrao).
+--
+-- Restrições do PostgreSQL em tabelas particionadas, tratadas na conversão:
+--   * chaves primárias e únicas incluem a data: (id, data_recebimento). O índice único
+--     do código de análise (0005) não pode ficar global; a unicidade passa para a tabela
+--     codigos_analise (um código por linha), mantida por triggers em itens_notas;
+--   * as chaves estrangeiras para notas/itens usam as chaves compostas da 0009;
+--   * notas e itens precisam ter data de recebimento.
+
+CREATE OR REPLACE FUNCTION particionamento_ativo() RETURNS BOOLEAN
+LANGUAGE sql STABLE AS $$
+    SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('notas_fiscais'))
+$$;
+
+-- Registro dos códigos de análise das tabelas particionadas (mesmo padrão do índice da
+-- 0005: códigos digitados à mão em outro formato ficam de fora). Um código repetido,
+-- gerado ou editado em Ajustes, esbarra na chave primária de codigos_analise.
+CREATE OR REPLACE FUNCTION codigos_analise_registrar() RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        DELETE FROM codigos_analise c USING antigas a
+        WHERE c.codigo = a.codigo_analise AND c.id_item = a.id;
+    ELSE
+        INSERT INTO codigos_analise (codigo, id_item)
+        SELECT codigo_analise, id FROM novas
+        WHERE codigo_analise ~ '^[A-L][0-9]{2}-[0-9]{6}$';
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+-- Troca de código (Ajustes). Por linha: só dispara quando o código muda, e não em
+-- cada atualização de status ou de data (que move o item de partição).
+CREATE OR REPLACE FUNCTION codigos_analise_trocar() RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    DELETE FROM codigos_analise WHERE codigo = OLD.codigo_analise AND id_item = OLD.id;
+    IF NEW.codigo_analise ~ '^[A-L][0-9]{2}-[0-9]{6}$' THEN
+        INSERT INTO codigos_analise (codigo, id_item) VALUES (NEW.codigo_analise, NEW.id);
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+-- Cria as partições mensais de [de, ate] que ainda não existem, nas duas tabelas.
+-- Um mês que já tem linhas na partição padrão é pulado (criar a partição exigiria
+-- mover essas linhas); ele continua funcionando, só sem a poda.
+CREATE OR REPLACE FUNCTION particionamento_criar_meses(de DATE, ate DATE) RETURNS INTEGER
+LANGUAGE plpgsql AS $$
+DECLARE
+    v_tabela TEXT;
+    v_mes DATE;
+    v_nome TEXT;
+    v_ocupado BOOLEAN;
+    v_criadas INTEGER := 0;
+BEGIN
+    IF NOT particionamento_ativo() THEN
+        RETURN 0;
+    END IF;
+
+    FOREACH v_tabela IN ARRAY ARRAY['notas_fiscais', 'itens_notas'] LOOP
+        FOR v_mes IN
+            SELECT generate_series(date_trunc('month', de), date_trunc('month', ate), INTERVAL '1 month')::date
+        LOOP
+            v_nome := v_tabela || '_' || to_char(v_mes, 'YYYY_MM');
+            CONTINUE WHEN to_regclass(v_nome) IS NOT NULL;
+
+            EXECUTE format(
+                'SELECT EXISTS (SELECT 1 FROM %I WHERE data_recebimento >= $1 AND data_recebimento < $2)',
+                v_tabela || '_padrao'
+            ) INTO v_ocupado USING v_mes, (v_mes + INTERVAL '1 month')::date;
+            IF v_ocupado THEN
+                RAISE NOTICE '% já tem linhas de % na partição padrão; mês não criado.', v_tabela, to_char(v_mes, 'YYYY-MM');
+                CONTINUE;
+            END IF;
+
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                v_nome, v_tabela, v_mes, (v_mes + INTERVAL '1 month')::date
+            );
+            v_criadas := v_criadas + 1;
+        END LOOP;
+    END LOOP;
+
+    RETURN v_criadas;
+END;
+$$;
+
+-- Converte notas_fiscais e itens_notas em tabelas particionadas, preservando dados,
+-- sequências, índices e triggers. Cria os meses desde o recebimento mais antigo até
+-- `meses_a_frente` meses adiante. Retorna quantas partições mensais foram criadas.
+CREATE OR REPLACE FUNCTION particionamento_converter(meses_a_frente INTEGER DEFAULT 3) RETURNS INTEGER
+LANGUAGE plpgsql AS $$
+DECLARE
+    v_tabela TEXT;
+    v_indices TEXT[];
+    v_triggers TEXT[];
+    v_def TEXT;
+    v_colunas TEXT;
+    v_sequencias TEXT[] := '{}';
+    v_inicio DATE;
+BEGIN
+    PERFORM pg_advisory_xact_lock(748213019);
+    IF particionamento_ativo() THEN
+        RETURN 0;
+    END IF;
+
+    LOCK TABLE notas_fiscais, itens_notas, conciliacao IN ACCESS EXCLUSIVE MODE;
+
+    IF EXISTS (SELECT 1 FROM notas_fiscais WHERE data_recebimento IS NULL)
+       OR EXISTS (SELECT 1 FROM itens_notas WHERE data_recebimento IS NULL) THEN
+        RAISE EXCEPTION 'Há notas ou itens sem data de recebimento: preencha-as antes de particionar.';
+    END IF;
+
+    -- Índices comuns e triggers são recriados como estavam. Índices únicos e de
+    -- restrições (chaves) são refeitos abaixo com a data de recebimento.
+    SELECT array_agg(pg_get_indexdef(x.indexrelid))
+    INTO v_indices
+    FROM pg_index x
+    WHERE x.indrelid IN ('notas_fiscais'::regclass, 'itens_notas'::regclass)
+      AND NOT x.indisunique
+      AND NOT x.indisprimary;
+
+    SELECT array_agg(pg_get_triggerdef(t.oid))
+    INTO v_triggers
+    FROM pg_trigger t
+    WHERE t.tgrelid IN ('notas_fiscais'::regclass, 'itens_notas'::regclass)
+      AND NOT t.tgisinternal;
+
+    SELECT date_trunc('month', MIN(data_recebimento))::date INTO v_inicio FROM notas_fiscais;
+
+    FOREACH v_tabela IN ARRAY ARRAY['notas_fiscais', 'itens_notas'] LOOP
+        v_sequencias := v_sequencias || pg_get_serial_sequence(v_tabela, 'id');
+        EXECUTE format('ALTER SEQUENCE %s OWNED BY NONE', v_sequencias[cardinality(v_sequencias)]);
+        EXECUTE format('ALTER TABLE %I RENAME TO %I', v_tabela, v_tabela || '_legado');
+        EXECUTE format(
+            'CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS INCLUDING GENERATED INCLUDING STORAGE) '
+            'PARTITION BY RANGE (data_recebimento)',
+            v_tabela, v_tabela || '_legado'
+        );
+        EXECUTE format('CREATE TABLE %I PARTITION OF %I DEFAULT', v_tabela || '_padrao', v_tabela);
+    END LOOP;
+
+    PERFORM particionamento_criar_meses(
+        COALESCE(v_inicio, CURRENT_DATE),
+        (CURRENT_DATE + make_interval(months => meses_a_frente))::date
+    );
+
+    -- Cópia (colunas geradas são recalculadas pelo banco)
+    FOREACH v_tabela IN ARRAY ARRAY['notas_fiscais', 'itens_notas'] LOOP
+        SELECT string_agg(quote_ident(attname), ', ' ORDER BY attnum)
+        INTO v_colunas
+        FROM pg_attribute
+        WHERE attrelid = (v_tabela || '_legado')::regclass
+          AND attnum > 0 AND NOT attisdropped AND attgenerated = '';
+
+        EXECUTE format('INSERT INTO %I (%s) SELECT %s FROM %I',
+                       v_tabela, v_colunas, v_colunas, v_tabela || '_legado');
+    END LOOP;
+
+    -- Leva junto as chaves estrangeiras de conciliacao para os itens
+    DROP TABLE itens_notas_legado CASCADE;
+    DROP TABLE notas_fiscais_legado CASCADE;
+
+    ALTER TABLE notas_fiscais ADD PRIMARY KEY (id, data_recebimento);
+    ALTER TABLE itens_notas ADD PRIMARY KEY (id, data_recebimento);
+    EXECUTE format('ALTER SEQUENCE %s OWNED BY notas_fiscais.id', v_sequencias[1]);
+    EXECUTE format('ALTER SEQUENCE %s OWNED BY itens_notas.id', v_sequencias[2]);
+
+    ALTER TABLE notas_fiscais
+        ADD CONSTRAINT notas_fiscais_cnpj_cliente_fkey FOREIGN KEY (cnpj_cliente) REFERENCES clientes (cnpj),
+        ADD CONSTRAINT notas_fiscais_cnpj_remetente_fkey FOREIGN KEY (cnpj_remetente) REFERENCES clientes (cnpj);
+
+    -- MATCH FULL: item com nota (ou conciliação com item) sem a data é recusado
+    ALTER TABLE itens_notas ADD CONSTRAINT fk_itens_notas_nota_recebimento
+        FOREIGN KEY (id_nota_fiscal, data_recebimento)
+        REFERENCES notas_fiscais (id, data_recebimento) MATCH FULL ON UPDATE CASCADE;
+
+    ALTER TABLE conciliacao ADD CONSTRAINT fk_conciliacao_item_recebimento
+        FOREIGN KEY (id_item_entrada, data_recebimento_item)
+        REFERENCES itens_notas (id, data_recebimento) MATCH FULL ON UPDATE CASCADE;
+
+    -- Unicidade global do código de análise, no lugar do índice único da 0005
+    CREATE TABLE codigos_analise (
+        codigo TEXT PRIMARY KEY,
+        id_item INTEGER NOT NULL
+    );
+    INSERT INTO codigos_analise (codigo, id_item)
+    SELECT codigo_analise, id FROM itens_notas
+    WHERE codigo_analise ~ '^[A-L][0-9]{2}-[0-9]{6}$';
+
+    CREATE TRIGGER codigos_analise_ins AFTER INSERT ON itens_notas
+        REFERENCING NEW TABLE AS novas FOR EACH STATEMENT EXECUTE FUNCTION codigos_analise_registrar();
+    CREATE TRIGGER codigos_analise_del AFTER DELETE ON itens_notas
+        REFERENCING OLD TABLE AS antigas FOR EACH STATEMENT EXECUTE FUNCTION codigos_analise_registrar();
+    CREATE TRIGGER codigos_analise_upd AFTER UPDATE OF codigo_analise ON itens_notas
+        FOR EACH ROW WHEN (OLD.codigo_analise IS DISTINCT FROM NEW.codigo_analise)
+        EXECUTE FUNCTION codigos_analise_trocar();
+
+    FOREACH v_def IN ARRAY COALESCE(v_indices, '{}') LOOP
+        EXECUTE v_def;
+    END LOOP;
+    FOREACH v_def IN ARRAY COALESCE(v_triggers, '{}') LOOP
+        EXECUTE v_def;
+    END LOOP;
+
+    ANALYZE notas_fiscais;
+    ANALYZE itens_notas;
+
+    RETURN (SELECT COUNT(*) FROM pg_inherits
+            WHERE inhparent IN ('notas_fiscais'::regclass, 'itens_notas'::regclass))::integer - 2;
+END;
+$$;
@@ -0,0 +1,372 @@
+-- Arquivo de notas encerradas.
+-- Uma nota está encerrada quando todos os seus itens já foram analisados, têm
+-- conciliação e estão com o saldo zerado: nada mais os altera. Notas assim, mais antigas
+-- que a idade configurada, são movidas em lotes (python -m database.arquivo mover)
+-- com os itens e as conciliações para as tabelas *_arquivo, e as tabelas quentes
+-- (Análise, Retorno, Ajustes, triggers) ficam só com o que ainda está em aberto.
+--
+-- As exclusões disparam as triggers normais: os rollups do Dashboard e o fato do
+-- Relatório recalculam o que foi movido lendo também o arquivo, então os números não
+-- mudam e o item fica marcado como arquivado em fato_itens.
+--
+-- As tabelas de arquivo copiam as colunas das quentes (colunas geradas viram colunas
+-- comuns). Uma migração que acrescente coluna em notas_fiscais, itens_notas ou
+-- conciliacao deve acrescentá-la também no arquivo.
+
+CREATE TABLE IF NOT EXISTS notas_fiscais_arquivo (LIKE notas_fiscais);
+CREATE TABLE IF NOT EXISTS itens_notas_arquivo (LIKE itens_notas);
+CREATE TABLE IF NOT EXISTS conciliacao_arquivo (LIKE conciliacao);
+
+ALTER TABLE notas_fiscais_arquivo ADD COLUMN IF NOT EXISTS arquivado_em TIMESTAMPTZ NOT NULL DEFAULT now();
+ALTER TABLE itens_notas_arquivo ADD COLUMN IF NOT EXISTS arquivado_em TIMESTAMPTZ NOT NULL DEFAULT now();
+ALTER TABLE conciliacao_arquivo ADD COLUMN IF NOT EXISTS arquivado_em TIMESTAMPTZ NOT NULL DEFAULT now();
+
+ALTER TABLE notas_fiscais_arquivo DROP CONSTRAINT IF EXISTS notas_fiscais_arquivo_pkey;
+ALTER TABLE notas_fiscais_arquivo ADD CONSTRAINT notas_fiscais_arquivo_pkey PRIMARY KEY (id);
+ALTER TABLE itens_notas_arquivo DROP CONSTRAINT IF EXISTS itens_notas_arquivo_pkey;
+ALTER TABLE itens_notas_arquivo ADD CONSTRAINT itens_notas_arquivo_pkey PRIMARY KEY (id);
+ALTER TABLE conciliacao_arquivo DROP CONSTRAINT IF EXISTS conciliacao_arquivo_pkey;
+ALTER TABLE conciliacao_arquivo ADD CONSTRAINT conciliacao_arquivo_pkey PRIMARY KEY (id);
+
+ALTER TABLE itens_notas_arquivo DROP CONSTRAINT IF EXISTS itens_notas_arquivo_id_nota_fiscal_fkey;
+ALTER TABLE itens_notas_arquivo ADD CONSTRAINT itens_notas_arquivo_id_nota_fiscal_fkey
+    FOREIGN KEY (id_nota_fiscal) REFERENCES notas_fiscais_arquivo (id);
+ALTER TABLE conciliacao_arquivo DROP CONSTRAINT IF EXISTS conciliacao_arquivo_id_item_entrada_fkey;
+ALTER TABLE conciliacao_arquivo ADD CONSTRAINT conciliacao_arquivo_id_item_entrada_fkey
+    FOREIGN KEY (id_item_entrada) REFERENCES itens_notas_arquivo (id);
+
+-- A nota de retorno continua na tabela quente (pode ter itens ainda não arquivados)
+ALTER TABLE conciliacao_arquivo DROP CONSTRAINT IF EXISTS conciliacao_arquivo_id_nota_retorno_fkey;
+ALTER TABLE conciliacao_arquivo ADD CONSTRAINT conciliacao_arquivo_id_nota_retorno_fkey
+    FOREIGN KEY (id_nota_retorno) REFERENCES notas_retorno (id);
+
+CREATE INDEX IF NOT EXISTS idx_notas_fiscais_arquivo_data_recebimento ON notas_fiscais_arquivo (data_recebimento);
+CREATE INDEX IF NOT EXISTS idx_itens_notas_arquivo_id_nota_fiscal ON itens_notas_arquivo (id_nota_fiscal);
+CREATE INDEX IF NOT EXISTS idx_itens_notas_arquivo_data_recebimento ON itens_notas_arquivo (data_recebimento);
+CREATE INDEX IF NOT EXISTS idx_conciliacao_arquivo_id_item_entrada ON conciliacao_arquivo (id_item_entrada);
+CREATE INDEX IF NOT EXISTS idx_conciliacao_arquivo_id_nota_retorno ON conciliacao_arquivo (id_nota_retorno);
+
+-- Uma linha por lote movido. As datas "ate_*" são as maiores datas arquivadas em cada
+-- coluna do Relatório: um filtro que começa depois delas não precisa ler o arquivo.
+CREATE TABLE IF NOT EXISTS arquivo_execucoes (
+    id BIGSERIAL PRIMARY KEY,
+    executado_em TIMESTAMPTZ NOT NULL DEFAULT now(),
+    notas INTEGER NOT NULL,
+    itens INTEGER NOT NULL,
+    conciliacoes INTEGER NOT NULL,
+    ate_lancamento DATE,
+    ate_recebimento DATE,
+    ate_analise DATE,
+    ate_emissao DATE,
+    ate_retorno DATE
+);
+
+-- ---------------------------------------------------------------------------
+-- Movimentação
+-- ---------------------------------------------------------------------------
+
+-- Colunas em comum entre a tabela quente e o arquivo (tudo menos arquivado_em)
+CREATE OR REPLACE FUNCTION arquivo_colunas(tabela TEXT) RETURNS TEXT
+LANGUAGE sql STABLE AS $$
+    SELECT string_agg(quote_ident(attname), ', ' ORDER BY attnum)
+    FROM pg_attribute
+    WHERE attrelid = (tabela || '_arquivo')::regclass
+      AND attnum > 0 AND NOT attisdropped AND attname <> 'arquivado_em'
+$$;
+
+-- Move até `limite` notas encerradas com recebimento anterior a `idade` atrás.
+-- Retorna quantas notas foram movidas (0 = nada mais a arquivar).
+CREATE OR REPLACE FUNCTION arquivo_mover_lote(idade INTERVAL, limite INTEGER) RETURNS INTEGER
+LANGUAGE plpgsql AS $$
+DECLARE
+    v_corte DATE := CURRENT_DATE - idade;
+    v_notas INTEGER[];
+    v_itens INTEGER;
+    v_conciliacoes INTEGER;
+BEGIN
+    PERFORM pg_advisory_xact_lock(748213020);
+
+    SELECT array_agg(id) INTO v_notas
+    FROM (
+        SELECT n.id
+        FROM notas_fiscais n
+        WHERE n.data_recebimento < v_corte
+          AND EXISTS (SELECT 1 FROM itens_notas i WHERE i.id_nota_fiscal = n.id)
+          AND NOT EXISTS (
+              SELECT 1 FROM itens_notas i
+              WHERE i.id_nota_fiscal = n.id
+                AND (i.saldo_financeiro <> 0
+                     OR i.status = 'Pendente'
+                     OR NOT EXISTS (SELECT 1 FROM conciliacao c WHERE c.id_item_entrada = i.id))
+          )
+        ORDER BY n.data_recebimento, n.id
+        LIMIT limite
+        FOR UPDATE SKIP LOCKED
+    ) candidatas;
+
+    IF v_notas IS NULL THEN
+        RETURN 0;
+    END IF;
+
+    -- Trava os itens e confere de novo: algum pode ter mudado antes da trava
+    PERFORM 1 FROM itens_notas
+    WHERE id_nota_fiscal = ANY(v_notas) AND data_recebimento < v_corte
+    FOR UPDATE;
+
+    SELECT array_agg(n.id) INTO v_notas
+    FROM unnest(v_notas) AS n(id)
+    WHERE NOT EXISTS (
+        SELECT 1 FROM itens_notas i
+        WHERE i.id_nota_fiscal = n.id
+          AND (i.saldo_financeiro <> 0
+               OR i.status = 'Pendente'
+               OR NOT EXISTS (SELECT 1 FROM conciliacao c WHERE c.id_item_entrada = i.id))
+    );
+
+    IF v_notas IS NULL THEN
+        RETURN 0;
+    END IF;
+
+    -- Filtro pela data de recebimento: com as tabelas particionadas, só as partições antigas são lidas
+    EXECUTE format(
+        'INSERT INTO notas_fiscais_arquivo (%1$s) SELECT %1$s FROM notas_fiscais '
+        'WHERE id = ANY($1) AND data_recebimento < $2',
+        arquivo_colunas('notas_fiscais')
+    ) USING v_notas, v_corte;
+
+    EXECUTE format(
+        'INSERT INTO itens_notas_arquivo (%1$s) SELECT %1$s FROM itens_notas '
+        'WHERE id_nota_fiscal = ANY($1) AND data_recebimento < $2',
+        arquivo_colunas('itens_notas')
+    ) USING v_notas, v_corte;
+    GET DIAGNOSTICS v_itens = ROW_COUNT;
+
+    EXECUTE format(
+        'INSERT INTO conciliacao_arquivo (%1$s) SELECT %1$s FROM conciliacao '
+        'WHERE id_item_entrada IN (SELECT id FROM itens_notas_arquivo WHERE id_nota_fiscal = ANY($1))',
+        arquivo_colunas('conciliacao')
+    ) USING v_notas;
+    GET DIAGNOSTICS v_conciliacoes = ROW_COUNT;
+
+    DELETE FROM conciliacao
+    WHERE id_item_entrada IN (SELECT id FROM itens_notas_arquivo WHERE id_nota_fiscal = ANY(v_notas));
+    DELETE FROM itens_notas WHERE id_nota_fiscal = ANY(v_notas) AND data_recebimento < v_corte;
+    DELETE FROM notas_fiscais WHERE id = ANY(v_notas) AND data_recebimento < v_corte;
+
+    INSERT INTO arquivo_execucoes (notas, itens, conciliacoes, ate_lancamento, ate_recebimento,
+                                   ate_analise, ate_emissao, ate_retorno)
+    SELECT cardinality(v_notas), v_itens, v_conciliacoes,
+           (SELECT MAX(data_lancamento) FROM notas_fiscais_arquivo WHERE id = ANY(v_notas)),
+           (SELECT MAX(data_recebimento) FROM notas_fiscais_arquivo WHERE id = ANY(v_notas)),
+           (SELECT MAX(data_analise) FROM itens_notas_arquivo WHERE id_nota_fiscal = ANY(v_notas)),
+           (SELECT MAX(data_nota) FROM notas_fiscais_arquivo WHERE id = ANY(v_notas)),
+           (SELECT MAX(nr.data_emissao)
+            FROM itens_notas_arquivo i
+            JOIN conciliacao_arquivo c ON c.id_item_entrada = i.id
+            JOIN notas_retorno nr ON nr.id = c.id_nota_retorno
+            WHERE i.id_nota_fiscal = ANY(v_notas));
+
+    RETURN cardinality(v_notas);
+END;
+$$;
+
+-- ---------------------------------------------------------------------------
+-- Rollups do Dashboard: quente + arquivo
+-- ---------------------------------------------------------------------------
+
+CREATE OR REPLACE FUNCTION kpi_recalcular_entradas(meses DATE[]) RETURNS VOID
+LANGUAGE plpgsql AS $$
+BEGIN
+    DELETE FROM kpi_entradas_mes WHERE mes = ANY(meses);
+    DELETE FROM kpi_status_mes WHERE mes = ANY(meses);
+
+    INSERT INTO kpi_entradas_mes (mes, ultimo_recebimento, valor_recebido, valor_retornado)
+    SELECT m.mes,
+           ult.ultimo_recebimento,
+           COALESCE(it.recebido, 0),
+           COALESCE(it.retornado, 0)
+    FROM unnest(meses) AS m(mes)
+    CROSS JOIN LATERAL (
+        SELECT MAX(n.data_recebimento) AS ultimo_recebimento
+        FROM (
+            SELECT data_recebimento FROM notas_fiscais
+            UNION ALL
+            SELECT data_recebimento FROM notas_fiscais_arquivo
+        ) n
+        WHERE n.data_recebimento >= m.mes
+          AND n.data_recebimento < m.mes + INTERVAL '1 month'
+    ) ult
+    LEFT JOIN LATERAL (
+        -- Mesma regra da consulta antiga: o item conta uma vez por conciliação
+        SELECT SUM(i.valor_item::numeric) AS recebido,
+               SUM(i.valor_item::numeric * i.conciliacoes) AS retornado
+        FROM (
+            SELECT i.data_recebimento, i.valor_item,
+                   (SELECT COUNT(*) FROM conciliacao c WHERE c.id_item_entrada = i.id) AS conciliacoes
+            FROM itens_notas i
+            UNION ALL
+            SELECT i.data_recebimento, i.valor_item,
+                   (SELECT COUNT(*) FROM conciliacao_arquivo c WHERE c.id_item_entrada = i.id)
+            FROM itens_notas_arquivo i
+        ) i
+        WHERE i.data_recebimento >= m.mes
+          AND i.data_recebimento < m.mes + INTERVAL '1 month'
+    ) it ON TRUE
+    WHERE m.mes <> '-infinity'
+      AND ult.ultimo_recebimento IS NOT NULL;
+
+    INSERT INTO kpi_status_mes (mes, status_final, qtd, valor_total, qtd_procedente, custo_procedente)
+    SELECT x.mes,
+           COALESCE(CASE
+               WHEN x.status = 'Pendente' THEN 'Pendente'
+               WHEN x.procedente_improcedente = 'Procedente' THEN 'Procedente'
+               WHEN x.procedente_improcedente = 'Improcedente' THEN 'Improcedente'
+               ELSE x.status
+           END, 'Sem status'),
+           COUNT(*),
+           COALESCE(SUM(x.valor_item::numeric), 0),
+           COUNT(*) FILTER (WHERE x.procedente_improcedente = 'Procedente'),
+           COALESCE(SUM(x.valor_item::numeric + x.ressarcimento::numeric) FILTER (WHERE x.procedente_improcedente = 'Procedente'), 0)
+    FROM (
+        SELECT m.mes, i.status, i.procedente_improcedente, i.valor_item, i.ressarcimento
+        FROM unnest(meses) AS m(mes)
+        JOIN (
+            SELECT data_recebimento, status, procedente_improcedente, valor_item, ressarcimento FROM itens_notas
+            UNION ALL
+            SELECT data_recebimento, status, procedente_improcedente, valor_item, ressarcimento FROM itens_notas_arquivo
+        ) i
+          ON i.data_recebimento >= m.mes
+         AND i.data_recebimento < m.mes + INTERVAL '1 month'
+        WHERE m.mes <> '-infinity'
+        UNION ALL
+        -- Sem data de recebimento (raro; itens sem nota ou notas antigas). Nunca arquivados.
+        SELECT '-infinity'::date, i.status, i.procedente_improcedente, i.valor_item, i.ressarcimento
+        FROM itens_notas i
+        WHERE i.data_recebimento IS NULL
+          AND '-infinity'::date = ANY(meses)
+    ) x
+    GROUP BY 1, 2;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION kpi_recalcular_retornos(meses DATE[]) RETURNS VOID
+LANGUAGE plpgsql AS $$
+BEGIN
+    DELETE FROM kpi_retornos_mes WHERE mes = ANY(meses);
+
+    INSERT INTO kpi_retornos_mes (mes, valor_total)
+    SELECT m.mes, COALESCE(SUM(r.valor_item::numeric), 0)
+    FROM unnest(meses) AS m(mes)
+    JOIN notas_retorno nr
+      ON nr.data_emissao >= m.mes
+     AND nr.data_emissao < m.mes + INTERVAL '1 month'
+    LEFT JOIN LATERAL (
+        SELECT i.valor_item
+        FROM conciliacao c JOIN itens_notas i ON i.id = c.id_item_entrada
+        WHERE c.id_nota_retorno = nr.id
+        UNION ALL
+        SELECT i.valor_item
+        FROM conciliacao_arquivo c JOIN itens_notas_arquivo i ON i.id = c.id_item_entrada
+        WHERE c.id_nota_retorno = nr.id
+    ) r ON TRUE
+    GROUP BY m.mes;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION kpi_recalcular_tudo() RETURNS INTEGER
+LANGUAGE plpgsql AS $$
+DECLARE
+    v_entradas DATE[];
+    v_retornos DATE[];
+BEGIN
+    PERFORM pg_advisory_xact_lock(748213015);
+
+    DELETE FROM kpi_meses_pendentes;
+    DELETE FROM kpi_entradas_mes;
+    DELETE FROM kpi_status_mes;
+    DELETE FROM kpi_retornos_mes;
+
+    SELECT array_agg(DISTINCT kpi_mes(data_recebimento)) || '-infinity'::date
+    INTO v_entradas
+    FROM (
+        SELECT data_recebimento FROM notas_fiscais
+        UNION ALL
+        SELECT data_recebimento FROM notas_fiscais_arquivo
+    ) n;
+    SELECT array_agg(DISTINCT kpi_mes(data_emissao))
+    INTO v_retornos FROM notas_retorno;
+
+    PERFORM kpi_recalcular_entradas(v_entradas);
+    IF v_retornos IS NOT NULL THEN
+        PERFORM kpi_recalcular_retornos(v_retornos);
+    END IF;
+
+    RETURN COALESCE(cardinality(v_entradas), 0) + COALESCE(cardinality(v_retornos), 0);
+END;
+$$;
+
+-- ---------------------------------------------------------------------------
+-- Fato do Relatório: quente + arquivo, com a marca de arquivado
+-- ---------------------------------------------------------------------------
+
+ALTER TABLE fato_itens ADD COLUMN IF NOT EXISTS arquivado BOOLEAN NOT NULL DEFAULT FALSE;
+
+CREATE OR REPLACE FUNCTION etl_carregar_fato(itens INTEGER[]) RETURNS VOID
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF itens IS NULL THEN
+        DELETE FROM fato_itens;
+    ELSE
+        DELETE FROM fato_itens WHERE id_item = ANY(itens);
+    END IF;
+
+    -- Itens e notas nunca estão nos dois lados ao mesmo tempo (a nota é arquivada inteira)
+    INSERT INTO fato_itens (
+        id_item, id_nota, status, codigo_analise,
+        data_lancamento, data_recebimento, data_analise, data_emissao, nf_entrada,
+        cnpj_cliente, cnpj_remetente, codigo_item, numero_serie, codigo_avaria,
+        procedente_improcedente, valor_item, ressarcimento, saldo_financeiro,
+        valor_abatido, qtd_retornos, nf_retorno, tipo_retorno, data_retorno, arquivado
+    )
+    SELECT l.id, n.id, l.status, l.codigo_analise,
+           n.data_lancamento, n.data_recebimento, l.data_analise, n.data_nota, n.numero_nota,
+           n.cnpj_cliente, n.cnpj_remetente, l.codigo_item, l.numero_serie, l.codigo_avaria,
+           l.procedente_improcedente, l.valor_item, l.ressarcimento, l.saldo_financeiro,
+           COALESCE(r.valor_abatido, 0), COALESCE(r.qtd, 0), r.nf_retorno, r.tipo_retorno, r.data_retorno,
+           l.arquivado
+    FROM (
+        SELECT id, id_nota_fiscal, status, codigo_analise, data_analise, codigo_item, numero_serie,
+               codigo_avaria, procedente_improcedente, valor_item, ressarcimento, saldo_financeiro,
+               FALSE AS arquivado
+        FROM itens_notas
+        UNION ALL
+        SELECT id, id_nota_fiscal, status, codigo_analise, data_analise, codigo_item, numero_serie,
+               codigo_avaria, procedente_improcedente, valor_item, ressarcimento, saldo_financeiro,
+               TRUE
+        FROM itens_notas_arquivo
+    ) l
+    JOIN (
+        SELECT id, data_lancamento, data_recebimento, data_nota, numero_nota, cnpj_cliente, cnpj_remetente
+        FROM notas_fiscais
+        UNION ALL
+        SELECT id, data_lancamento, data_recebimento, data_nota, numero_nota, cnpj_cliente, cnpj_remetente
+        FROM notas_fiscais_arquivo
+    ) n ON n.id = l.id_nota_fiscal
+    LEFT JOIN LATERAL (
+        SELECT SUM(c.valor_abatido) AS valor_abatido,
+               COUNT(*) AS qtd,
+               string_agg(nr.numero_nota, ', ' ORDER BY nr.data_emissao, nr.id) AS nf_retorno,
+               string_agg(DISTINCT nr.tipo_retorno, ', ') AS tipo_retorno,
+               MAX(nr.data_emissao) AS data_retorno
+        FROM (
+            SELECT id_nota_retorno, valor_abatido FROM conciliacao WHERE id_item_entrada = l.id
+            UNION ALL
+            SELECT id_nota_retorno, valor_abatido FROM conciliacao_arquivo WHERE id_item_entrada = l.id
+        ) c
+        JOIN notas_retorno nr ON nr.id = c.id_nota_retorno
+    ) r ON r.qtd > 0
+    WHERE itens IS NULL OR l.id = ANY(itens);
+END;
+$$;
+
+ANALYZE fato_itens;
@@ -0,0 +1,16 @@
+-- Paginação por chave no Relatório e em Ajustes: as telas buscam uma página por vez
+-- continuando depois da última linha exibida (data de lançamento, nota, código de
+-- análise, id do item). Com um índice na mesma ordem, cada página é uma leitura curta
+-- do índice, qualquer que seja o tamanho de fato_itens.
+--
+-- As expressões com COALESCE precisam ser idênticas às de RelatorioModel.ORDEM.
+
+CREATE INDEX IF NOT EXISTS idx_fato_itens_pagina
+    ON fato_itens (data_lancamento DESC, COALESCE(nf_entrada, '') DESC, COALESCE(codigo_analise, ''), id_item)
+    WHERE NOT arquivado;
+
+-- Mesma ordem com o arquivo incluído (leitura histórica)
+CREATE INDEX IF NOT EXISTS idx_fato_itens_pagina_historico
+    ON fato_itens (data_lancamento DESC, COALESCE(nf_entrada, '') DESC, COALESCE(codigo_analise, ''), id_item);
+
+ANALYZE fato_itens;
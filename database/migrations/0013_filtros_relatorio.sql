@@ -0,0 +1,41 @@
+-- Filtros do Relatório executados no banco: cada coluna filtrada vira uma condição
+-- parametrizada (ILIKE '%texto%' ou BETWEEN em datas) na mesma consulta paginada.
+--
+-- ILIKE com curinga no início só usa índice trigram (pg_trgm, criado na 0004). Um GIN
+-- de várias colunas em fato_itens atende qualquer combinação das colunas de texto do
+-- fato; nas dimensões o filtro cai no nome/grupo/cidade e volta ao fato pela chave.
+-- Intervalos de data usam btree na própria coluna.
+--
+-- As colunas aqui precisam ser as mesmas expressões de RelatorioModel.FILTROS.
+
+CREATE INDEX IF NOT EXISTS idx_fato_itens_filtros_trgm
+    ON fato_itens USING gin (
+        status gin_trgm_ops, codigo_analise gin_trgm_ops, nf_entrada gin_trgm_ops,
+        cnpj_remetente gin_trgm_ops, cnpj_cliente gin_trgm_ops, codigo_item gin_trgm_ops,
+        numero_serie gin_trgm_ops, codigo_avaria gin_trgm_ops, nf_retorno gin_trgm_ops,
+        tipo_retorno gin_trgm_ops
+    );
+
+CREATE INDEX IF NOT EXISTS idx_dim_cliente_filtros_trgm
+    ON dim_cliente USING gin (
+        cliente gin_trgm_ops, grupo gin_trgm_ops, cidade gin_trgm_ops,
+        estado gin_trgm_ops, regiao gin_trgm_ops
+    );
+
+CREATE INDEX IF NOT EXISTS idx_dim_item_grupo_trgm ON dim_item USING gin (grupo_item gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_dim_avaria_descricao_trgm ON dim_avaria USING gin (descricao_avaria gin_trgm_ops);
+
+-- Junções de volta ao fato a partir das dimensões filtradas
+CREATE INDEX IF NOT EXISTS idx_fato_itens_cnpj_remetente ON fato_itens (cnpj_remetente);
+CREATE INDEX IF NOT EXISTS idx_fato_itens_codigo_item ON fato_itens (codigo_item);
+CREATE INDEX IF NOT EXISTS idx_fato_itens_codigo_avaria ON fato_itens (codigo_avaria);
+
+-- Intervalos de data (data_lancamento já é a primeira coluna de idx_fato_itens_pagina)
+CREATE INDEX IF NOT EXISTS idx_fato_itens_data_analise ON fato_itens (data_analise);
+CREATE INDEX IF NOT EXISTS idx_fato_itens_data_emissao ON fato_itens (data_emissao);
+CREATE INDEX IF NOT EXISTS idx_fato_itens_data_retorno ON fato_itens (data_retorno);
+
+ANALYZE fato_itens;
+ANALYZE dim_cliente;
+ANALYZE dim_item;
+ANALYZE dim_avaria;
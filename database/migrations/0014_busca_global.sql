@@ -0,0 +1,42 @@
+-- Busca global (barra de busca da janela principal): código de análise, número de
+-- série, número da nota, CNPJ e nome do cliente, nas tabelas operacionais.
+--
+-- Termos a partir de 4 caracteres: ILIKE '%termo%' ordenado por termo <<-> coluna
+-- (distância de palavra) nos índices trigram GiST. O GiST atende as duas coisas, então
+-- cada campo é lido já em ordem de semelhança e a leitura para nas `limite` linhas mais
+-- parecidas. siglen=256: com a assinatura padrão (12 bytes) os nós internos de colunas
+-- só de dígitos ficam saturados e a busca sem resultado percorre boa parte do índice.
+--
+-- Termos de 3 caracteres casam com quase toda linha e seus poucos trigramas não
+-- distinguem nada no GiST: são buscados só no início do valor, pelos índices btree
+-- *_prefixo. São em COLLATE "C" para que o LIKE 'termo%' vire um intervalo do índice
+-- e o ORDER BY saia na ordem dele, qualquer que seja a collation do banco.
+--
+-- Em notas_fiscais e itens_notas são índices comuns: a conversão para tabelas
+-- particionadas (0010) os recria nas partições.
+
+CREATE INDEX IF NOT EXISTS idx_itens_notas_codigo_analise_gist
+    ON itens_notas USING gist (codigo_analise gist_trgm_ops(siglen=256));
+CREATE INDEX IF NOT EXISTS idx_itens_notas_numero_serie_gist
+    ON itens_notas USING gist (numero_serie gist_trgm_ops(siglen=256));
+CREATE INDEX IF NOT EXISTS idx_notas_fiscais_numero_nota_gist
+    ON notas_fiscais USING gist (numero_nota gist_trgm_ops(siglen=256));
+CREATE INDEX IF NOT EXISTS idx_clientes_cliente_gist
+    ON clientes USING gist (cliente gist_trgm_ops(siglen=256));
+CREATE INDEX IF NOT EXISTS idx_clientes_cnpj_digitos_gist
+    ON clientes USING gist (cnpj_digitos gist_trgm_ops(siglen=256));
+
+CREATE INDEX IF NOT EXISTS idx_itens_notas_codigo_analise_prefixo
+    ON itens_notas ((lower(codigo_analise) COLLATE "C"));
+CREATE INDEX IF NOT EXISTS idx_itens_notas_numero_serie_prefixo
+    ON itens_notas ((lower(numero_serie) COLLATE "C"));
+CREATE INDEX IF NOT EXISTS idx_notas_fiscais_numero_nota_prefixo
+    ON notas_fiscais ((lower(numero_nota) COLLATE "C"));
+CREATE INDEX IF NOT EXISTS idx_clientes_cliente_prefixo
+    ON clientes ((lower(cliente) COLLATE "C"));
+CREATE INDEX IF NOT EXISTS idx_clientes_cnpj_digitos_prefixo
+    ON clientes ((cnpj_digitos COLLATE "C"));
+
+ANALYZE itens_notas;
+ANALYZE notas_fiscais;
+ANALYZE clientes;
@@ -0,0 +1,84 @@
+-- Feed de alterações entre estações: cada comando que grava itens (ou muda dados de
+-- nota que aparecem nas telas) avisa pelo canal 'partlog_alteracoes' quais itens
+-- mudaram. As telas abertas buscam só esses ids e atualizam as linhas em memória,
+-- em vez de repetir a consulta inteira (ver database/notificacoes.py).
+--
+-- Payload (JSON): {"tabela": "itens_notas", "op": "INSERT|UPDATE|DELETE", "ids": [...]}
+-- com até 500 ids por aviso (o NOTIFY aceita até 8000 bytes). Comandos que mexem em
+-- mais de 5000 itens (carga em massa, arquivamento) mandam "ids": null: as telas
+-- recarregam por completo. O aviso só é entregue no COMMIT; rollback não avisa nada.
+
+CREATE OR REPLACE FUNCTION feed_publicar(p_tabela TEXT, p_op TEXT, p_ids INTEGER[])
+RETURNS VOID
+LANGUAGE plpgsql AS $$
+DECLARE
+    v_total INTEGER := COALESCE(cardinality(p_ids), 0);
+    v_inicio INTEGER := 1;
+BEGIN
+    IF v_total = 0 THEN
+        RETURN;
+    END IF;
+    IF v_total > 5000 THEN
+        PERFORM pg_notify('partlog_alteracoes',
+                          json_build_object('tabela', p_tabela, 'op', p_op, 'ids', NULL)::text);
+        RETURN;
+    END IF;
+    WHILE v_inicio <= v_total LOOP
+        PERFORM pg_notify('partlog_alteracoes',
+                          json_build_object('tabela', p_tabela, 'op', p_op,
+                                            'ids', p_ids[v_inicio:v_inicio + 499])::text);
+        v_inicio := v_inicio + 500;
+    END LOOP;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION feed_marcar_itens_notas() RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+DECLARE
+    v_ids INTEGER[];
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        SELECT array_agg(id ORDER BY id) INTO v_ids FROM antigas;
+    ELSE
+        SELECT array_agg(id ORDER BY id) INTO v_ids FROM novas;
+    END IF;
+    PERFORM feed_publicar('itens_notas', TG_OP, v_ids);
+    RETURN NULL;
+END;
+$$;
+
+-- Nota alterada (ex: número corrigido em Ajustes): avisa os itens dela, que são o
+-- que as telas mostram. Inserções e exclusões de notas chegam pelos próprios itens.
+CREATE OR REPLACE FUNCTION feed_marcar_notas_fiscais() RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+DECLARE
+    v_ids INTEGER[];
+BEGIN
+    SELECT array_agg(i.id ORDER BY i.id) INTO v_ids
+    FROM antigas a
+    JOIN novas n ON n.id = a.id
+    JOIN itens_notas i ON i.id_nota_fiscal = n.id
+    WHERE a.numero_nota IS DISTINCT FROM n.numero_nota
+       OR a.data_nota IS DISTINCT FROM n.data_nota
+       OR a.data_lancamento IS DISTINCT FROM n.data_lancamento
+       OR a.data_recebimento IS DISTINCT FROM n.data_recebimento
+       OR a.cnpj_cliente IS DISTINCT FROM n.cnpj_cliente
+       OR a.cnpj_remetente IS DISTINCT FROM n.cnpj_remetente;
+    PERFORM feed_publicar('itens_notas', 'UPDATE', v_ids);
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS feed_itens_notas_ins ON itens_notas;
+DROP TRIGGER IF EXISTS feed_itens_notas_upd ON itens_notas;
+DROP TRIGGER IF EXISTS feed_itens_notas_del ON itens_notas;
+DROP TRIGGER IF EXISTS feed_notas_fiscais_upd ON notas_fiscais;
+
+CREATE TRIGGER feed_itens_notas_ins AFTER INSERT ON itens_notas
+    REFERENCING NEW TABLE AS novas FOR EACH STATEMENT EXECUTE FUNCTION feed_marcar_itens_notas();
+CREATE TRIGGER feed_itens_notas_upd AFTER UPDATE ON itens_notas
+    REFERENCING OLD TABLE AS antigas NEW TABLE AS novas FOR EACH STATEMENT EXECUTE FUNCTION feed_marcar_itens_notas();
+CREATE TRIGGER feed_itens_notas_del AFTER DELETE ON itens_notas
+    REFERENCING OLD TABLE AS antigas FOR EACH STATEMENT EXECUTE FUNCTION feed_marcar_itens_notas();
+CREATE TRIGGER feed_notas_fiscais_upd AFTER UPDATE ON notas_fiscais
+    REFERENCING OLD TABLE AS antigas NEW TABLE AS novas FOR EACH STATEMENT EXECUTE FUNCTION feed_marcar_notas_fiscais();
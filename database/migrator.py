@@ -0,0 +1,291 @@
+import argparse
+import hashlib
+import re
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import psycopg2
+from psycopg2 import errors
+
+DIRETORIO_MIGRACOES = Path(__file__).resolve().parent / "migrations"
+
+# Arquivos no formato 0001_descricao.sql, aplicados em ordem numérica
+PADRAO_ARQUIVO = re.compile(r"^(\d{4})_([a-z0-9_]+)\.sql$")
+
+# Migrações que precisam rodar fora de transação (ex: CREATE INDEX CONCURRENTLY)
+# declaram este marcador em uma linha própria.
+MARCADOR_SEM_TRANSACAO = "-- migracao: sem-transacao"
+
+# Chave do advisory lock que impede duas estações de migrarem ao mesmo tempo
+CHAVE_LOCK_MIGRACAO = 748_213_001
+
+SQL_CRIAR_CONTROLE = """
+    CREATE TABLE IF NOT EXISTS schema_version (
+        versao INTEGER PRIMARY KEY,
+        nome TEXT NOT NULL,
+        checksum TEXT NOT NULL,
+        aplicada_em TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+        duracao_ms INTEGER
+    )
+"""
+
+
+class MigracaoError(Exception):
+    """Falha de consistência entre os arquivos de migração e o banco."""
+
+
+@dataclass
+class Migracao:
+    versao: int
+    nome: str
+    caminho: Path
+    sql: str
+    checksum: str
+
+    @property
+    def transacional(self) -> bool:
+        return not any(linha.strip() == MARCADOR_SEM_TRANSACAO for linha in self.sql.splitlines())
+
+
+def dividir_comandos(sql: str) -> list:
+    """
+    Separa um script em comandos individuais pelo ';' final,
+    respeitando strings, comentários e blocos $$ ... $$.
+    Necessário para migrações sem transação, onde cada comando roda sozinho.
+    """
+    comandos, atual = [], []
+    i, n = 0, len(sql)
+    dolar = None
+    while i < n:
+        c = sql[i]
+        if dolar:
+            if sql.startswith(dolar, i):
+                atual.append(dolar)
+                i += len(dolar)
+                dolar = None
+                continue
+        elif c == "'":
+            fim = sql.find("'", i + 1)
+            while fim != -1 and sql.startswith("''", fim):
+                fim = sql.find("'", fim + 2)
+            fim = n - 1 if fim == -1 else fim
+            atual.append(sql[i:fim + 1])
+            i = fim + 1
+            continue
+        elif sql.startswith("--", i):
+            fim = sql.find("\n", i)
+            i = n if fim == -1 else fim
+            continue
+        elif c == "$":
+            m = re.match(r"\$[A-Za-z_]*\$", sql[i:])
+            if m:
+                dolar = m.group(0)
+                atual.append(dolar)
+                i += len(dolar)
+                continue
+        elif c == ";":
+            comando = "".join(atual).strip()
+            if comando:
+                comandos.append(comando)
+            atual = []
+            i += 1
+            continue
+        atual.append(c)
+        i += 1
+
+    comando = "".join(atual).strip()
+    if comando:
+        comandos.append(comando)
+    return comandos
+
+
+class Migrator:
+    """
+    Executa as migrações versionadas de `database/migrations`.
+
+    Cada arquivo é aplicado uma única vez e registrado em `schema_version`
+    com seu checksum. Na inicialização basta `esta_atualizado()`, que custa
+    uma única query.
+    """
+
+    def __init__(self, db, diretorio: Path = DIRETORIO_MIGRACOES):
+        self.db = db
+        self.diretorio = Path(diretorio)
+        self._migracoes = None
+
+    def carregar(self) -> list:
+        """Lê e valida os arquivos de migração (ordenados por versão)."""
+        if self._migracoes is None:
+            migracoes = []
+            versoes = set()
+            for caminho in sorted(self.diretorio.glob("*.sql")):
+                m = PADRAO_ARQUIVO.match(caminho.name)
+                if not m:
+                    raise MigracaoError(f"Nome de migração inválido: {caminho.name}")
+                versao = int(m.group(1))
+                if versao in versoes:
+                    raise MigracaoError(f"Versão de migração duplicada: {versao:04d}")
+                versoes.add(versao)
+
+                sql = caminho.read_text(encoding="utf-8")
+                migracoes.append(Migracao(
+                    versao=versao,
+                    nome=m.group(2),
+                    caminho=caminho,
+                    sql=sql,
+                    checksum=hashlib.sha256(sql.encode("utf-8")).hexdigest(),
+                ))
+            self._migracoes = sorted(migracoes, key=lambda mig: mig.versao)
+        return self._migracoes
+
+    def versao_head(self) -> int:
+        migracoes = self.carregar()
+        return migracoes[-1].versao if migracoes else 0
+
+    def esta_atualizado(self) -> bool:
+        """
+        Checagem barata feita na inicialização: uma única query na tabela de controle.
+        """
+        with self.db.get_connection() as conn:
+            with conn.cursor() as cursor:
+                try:
+                    cursor.execute("SELECT MAX(versao) FROM schema_version")
+                except errors.UndefinedTable:
+                    return False
+                versao = cursor.fetchone()[0] or 0
+        return versao >= self.versao_head()
+
+    def aplicadas(self) -> dict:
+        """
+        Retorna {versao: checksum} do que já foi aplicado no banco. Só lê: sem a
+        tabela de controle (banco novo) o banco está na versão 0.
+        """
+        with self.db.get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT to_regclass('schema_version')")
+                if cursor.fetchone()[0] is None:
+                    return {}
+                cursor.execute("SELECT versao, checksum FROM schema_version")
+                return dict(cursor.fetchall())
+
+    def _validar(self, aplicadas: dict):
+        for mig in self.carregar():
+            checksum = aplicadas.get(mig.versao)
+            if checksum is not None and checksum != mig.checksum:
+                raise MigracaoError(
+                    f"A migração {mig.caminho.name} foi alterada depois de aplicada "
+                    f"(checksum no banco {checksum[:12]}, arquivo {mig.checksum[:12]})."
+                )
+
+    def pendentes(self) -> list:
+        aplicadas = self.aplicadas()
+        self._validar(aplicadas)
+        return [mig for mig in self.carregar() if mig.versao not in aplicadas]
+
+    def _aplicar_uma(self, conn, mig: Migracao):
+        inicio = time.perf_counter()
+        if mig.transacional:
+            with conn.cursor() as cursor:
+                cursor.execute(mig.sql)
+        else:
+            conn.autocommit = True
+            try:
+                with conn.cursor() as cursor:
+                    for comando in dividir_comandos(mig.sql):
+                        cursor.execute(comando)
+            finally:
+                conn.autocommit = False
+
+        duracao_ms = int((time.perf_counter() - inicio) * 1000)
+        with conn.cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO schema_version (versao, nome, checksum, duracao_ms) VALUES (%s, %s, %s, %s)",
+                (mig.versao, mig.nome, mig.checksum, duracao_ms)
+            )
+        conn.commit()
+
+    def aplicar(self, dry_run=False) -> list:
+        """
+        Aplica as migrações pendentes em ordem. Cada migração transacional
+        roda (junto com seu registro em schema_version) numa transação própria.
+        Com dry_run=True apenas retorna o que seria aplicado.
+        """
+        if dry_run:
+            return self.pendentes()
+
+        aplicadas_agora = []
+        with self.db.get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(SQL_CRIAR_CONTROLE)
+                conn.commit()
+                # Lock de sessão: sobrevive aos commits entre migrações
+                cursor.execute("SELECT pg_advisory_lock(%s)", (CHAVE_LOCK_MIGRACAO,))
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT versao, checksum FROM schema_version")
+                    aplicadas = dict(cursor.fetchall())
+                conn.commit()
+                self._validar(aplicadas)
+
+                for mig in self.carregar():
+                    if mig.versao in aplicadas:
+                        continue
+                    try:
+                        self._aplicar_uma(conn, mig)
+                    except Exception as e:
+                        conn.rollback()
+                        raise MigracaoError(f"Falha ao aplicar {mig.caminho.name}: {e}") from e
+                    print(f"Migração aplicada: {mig.caminho.name}")
+                    aplicadas_agora.append(mig)
+            finally:
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT pg_advisory_unlock(%s)", (CHAVE_LOCK_MIGRACAO,))
+                conn.commit()
+        return aplicadas_agora
+
+
+def main(argv=None):
+    from .connection import DatabaseConnection
+
+    parser = argparse.ArgumentParser(
+        prog="python -m database.migrator",
+        description="Gerencia as migrações de schema do Partlog."
+    )
+    sub = parser.add_subparsers(dest="comando", required=True)
+    sub.add_parser("status", help="Mostra a versão do banco e as migrações pendentes")
+    p_aplicar = sub.add_parser("aplicar", help="Aplica as migrações pendentes")
+    p_aplicar.add_argument("--dry-run", action="store_true",
+                           help="Apenas lista (e exibe o SQL) do que seria aplicado")
+    args = parser.parse_args(argv)
+
+    migrator = Migrator(DatabaseConnection())
+    try:
+        if args.comando == "status":
+            aplicadas = migrator.aplicadas()
+            pendentes = migrator.pendentes()
+            atual = max(aplicadas) if aplicadas else 0
+            print(f"Versão do banco: {atual:04d} | Head: {migrator.versao_head():04d}")
+            for mig in pendentes:
+                print(f"  pendente: {mig.caminho.name}")
+            if not pendentes:
+                print("Banco atualizado.")
+        else:
+            resultado = migrator.aplicar(dry_run=args.dry_run)
+            if args.dry_run:
+                for mig in resultado:
+                    modo = "transacional" if mig.transacional else "sem transação"
+                    print(f"-- {mig.caminho.name} ({modo}, sha256 {mig.checksum[:12]})")
+                    print(mig.sql.strip() + "\n")
+                print(f"{len(resultado)} migração(ões) seriam aplicadas.")
+            else:
+                print(f"{len(resultado)} migração(ões) aplicadas.")
+    except (MigracaoError, psycopg2.Error) as e:
+        print(f"Erro: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+import json
+import select
+import threading
+
+import psycopg2
+from psycopg2 import extensions
+
+# Canal usado pelos triggers feed_* (migração 0015)
+CANAL_ALTERACOES = "partlog_alteracoes"
+
+# Espera entre tentativas de reconexão, em segundos
+ESPERA_RECONEXAO = 5.0
+
+
+class OuvinteAlteracoes(threading.Thread):
+    """
+    Escuta (LISTEN) o canal de alterações em uma conexão própria, fora do pool:
+    a sessão precisa ficar aberta o tempo todo, e sempre no primário (a réplica
+    não recebe os avisos).
+
+    Cada aviso vira uma chamada `callback(tabela, ids)`, na thread do ouvinte.
+    `ids=None` pede recarga completa: comando grande demais para listar os ids,
+    ou reconexão depois de uma queda (os avisos do intervalo se perderam).
+    """
+
+    def __init__(self, callback, config=None, canal=CANAL_ALTERACOES):
+        super().__init__(name="ouvinte-alteracoes", daemon=True)
+        if config is None:
+            from .connection import DB_CONFIG
+            config = DB_CONFIG
+        self.callback = callback
+        self.config = dict(config)
+        self.canal = canal
+        self._parar = threading.Event()
+
+    def parar(self):
+        self._parar.set()
+
+    def _conectar(self):
+        conn = psycopg2.connect(**self.config)
+        conn.set_isolation_level(extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        with conn.cursor() as cursor:
+            cursor.execute(f"LISTEN {self.canal}")
+        return conn
+
+    def _entregar(self, payload):
+        try:
+            aviso = json.loads(payload)
+            self.callback(aviso["tabela"], aviso["ids"])
+        except (ValueError, KeyError, TypeError) as e:
+            print(f"Aviso de alteração inválido ({payload!r}): {e}")
+
+    def run(self):
+        conn = None
+        primeira = True
+        while not self._parar.is_set():
+            try:
+                if conn is None:
+                    conn = self._conectar()
+                    if not primeira:
+                        # O que mudou enquanto a conexão estava fora não foi avisado
+                        self.callback(None, None)
+                    primeira = False
+
+                # Acorda a cada segundo para checar o pedido de parada
+                if select.select([conn], [], [], 1.0)[0]:
+                    conn.poll()
+                    while conn.notifies:
+                        self._entregar(conn.notifies.pop(0).payload)
+            except psycopg2.Error as e:
+                print(f"Ouvinte de alterações desconectado: {e}")
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+                conn = None
+                primeira = False
+                self._parar.wait(ESPERA_RECONEXAO)
+
+        if conn is not None:
+            conn.close()
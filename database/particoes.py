@@ -0,0 +1,56 @@
+import sys
+
+from .cli import Comando, main_comandos
+
+SQL_STATUS = """
+    SELECT p.inhparent::regclass::text as tabela,
+           c.relname as particao,
+           pg_get_expr(c.relpartbound, c.oid) as faixa,
+           GREATEST(c.reltuples, 0)::bigint as linhas_estimadas
+    FROM pg_inherits p
+    JOIN pg_class c ON c.oid = p.inhrelid
+    WHERE p.inhparent IN (to_regclass('notas_fiscais'), to_regclass('itens_notas'))
+    ORDER BY 1, 2
+"""
+
+
+def _status(conn, cursor, args):
+    cursor.execute(SQL_STATUS)
+    linhas = cursor.fetchall()
+    if not linhas:
+        print("Tabelas não particionadas (use 'converter').")
+    for tabela, particao, faixa, estimadas in linhas:
+        print(f"{tabela:<14} {particao:<26} {faixa:<60} ~{estimadas} linhas")
+
+
+def _criar(sql):
+    def executar(conn, cursor, args):
+        del conn.notices[:]
+        cursor.execute(sql, (args.meses_a_frente,))
+        criadas = cursor.fetchone()[0]
+        for aviso in conn.notices:
+            print(aviso.strip())
+        return f"{criadas} partição(ões) mensal(is) criadas"
+    return executar
+
+
+COMANDOS = [
+    Comando("converter", "Converte as tabelas atuais em particionadas (trava as tabelas durante a cópia)",
+            _criar("SELECT particionamento_converter(%s)"),
+            [(("--meses-a-frente",), dict(type=int, default=3, help="Meses futuros já criados"))]),
+    Comando("criar-meses", "Cria as partições do mês atual até N meses adiante",
+            _criar("SELECT particionamento_criar_meses(CURRENT_DATE, "
+                   "(CURRENT_DATE + make_interval(months => %s))::date)"),
+            [(("--meses-a-frente",), dict(type=int, default=3, help="Meses futuros a garantir"))]),
+    Comando("status", "Lista as partições e o tamanho estimado de cada uma", _status),
+]
+
+
+def main(argv=None):
+    return main_comandos("python -m database.particoes",
+                         "Particionamento mensal (opcional) de notas_fiscais e itens_notas por data de recebimento.",
+                         COMANDOS, argv)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,275 @@
+import threading
+import time
+
+import psycopg2
+from psycopg2 import extensions
+
+
+class PoolEsgotadoError(Exception):
+    """Nenhuma conexão ficou disponível dentro do tempo limite de checkout."""
+
+
+class ConexaoPool(extensions.connection):
+    """
+    Conexão psycopg2 com os metadados que o pool precisa para
+    decidir health check, reciclagem por ociosidade e por idade.
+    Também guarda os nomes dos statements já preparados nesta sessão.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.criada_em = time.monotonic()
+        self.ultimo_uso = self.criada_em
+        self.preparadas = set()
+
+
+class PoolConexoes:
+    """
+    Pool de conexões PostgreSQL compartilhado e thread-safe.
+
+    - Abre `minimo` conexões na criação e repõe esse mínimo quando conexões
+      são fechadas (na devolução ou reciclagem); nunca passa de `maximo`.
+    - Conexões paradas há mais de `verificar_apos` segundos passam por um
+      `SELECT 1` no checkout; se falharem, são descartadas e substituídas.
+    - Conexões ociosas além de `ocioso_max` (acima do mínimo) ou mais velhas
+      que `vida_max` são fechadas (reciclagem).
+    - Se o pool estiver cheio, o checkout aguarda até `timeout_checkout`.
+    """
+
+    def __init__(self, config: dict, minimo=1, maximo=10, timeout_checkout=30.0,
+                 verificar_apos=30.0, ocioso_max=300.0, vida_max=3600.0):
+        if minimo < 0 or maximo < 1 or minimo > maximo:
+            raise ValueError("Configuração de pool inválida: exige 0 <= minimo <= maximo e maximo >= 1.")
+
+        self.config = dict(config)
+        self.minimo = minimo
+        self.maximo = maximo
+        self.timeout_checkout = timeout_checkout
+        self.verificar_apos = verificar_apos
+        self.ocioso_max = ocioso_max
+        self.vida_max = vida_max
+
+        self._cond = threading.Condition()
+        self._ociosas = []      # Pilha LIFO: reaproveita a conexão mais "quente"
+        self._em_uso = set()
+        self._total = 0         # Conexões abertas + reservas em criação
+        self._fechado = False
+
+        self._metricas = {
+            'criadas': 0,
+            'fechadas': 0,
+            'checkouts': 0,
+            'esperas': 0,
+            'tempo_espera_total': 0.0,
+            'timeouts': 0,
+            'health_checks': 0,
+            'health_checks_falhos': 0,
+            'recicladas': 0,
+        }
+
+        self._completar_minimo()
+
+    # --- CICLO DE VIDA DAS CONEXÕES ---
+    def _criar(self):
+        conn = psycopg2.connect(connection_factory=ConexaoPool, **self.config)
+        with self._cond:
+            self._metricas['criadas'] += 1
+        return conn
+
+    def _fechar(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _expirada(self, conn, agora):
+        return self.vida_max and (agora - conn.criada_em) > self.vida_max
+
+    def _recolher_ociosas(self, agora):
+        """Remove (sob o lock) as conexões ociosas vencidas. Retorna a lista a fechar."""
+        descartar = []
+        manter = []
+        # Percorre da mais antiga para a mais recente, respeitando o mínimo
+        for conn in self._ociosas:
+            restantes = self._total - len(descartar)
+            ociosa_demais = self.ocioso_max and (agora - conn.ultimo_uso) > self.ocioso_max
+            if self._expirada(conn, agora) or (ociosa_demais and restantes > self.minimo):
+                descartar.append(conn)
+            else:
+                manter.append(conn)
+
+        if descartar:
+            self._ociosas = manter
+            self._total -= len(descartar)
+            self._metricas['recicladas'] += len(descartar)
+            self._metricas['fechadas'] += len(descartar)
+            self._cond.notify_all()
+        return descartar
+
+    def _completar_minimo(self):
+        """
+        Abre (fora do lock) as conexões que faltam para chegar a `minimo`.
+        Falha de conexão não é erro aqui: o checkout tenta de novo quando precisar.
+        """
+        with self._cond:
+            faltam = 0 if self._fechado else self.minimo - self._total
+            if faltam <= 0:
+                return
+            self._total += faltam  # Reserva as vagas antes de conectar fora do lock
+
+        for aberta in range(faltam):
+            try:
+                conn = self._criar()
+            except psycopg2.Error as e:
+                print(f"Não foi possível abrir as conexões mínimas do pool: {e}")
+                with self._cond:
+                    self._total -= faltam - aberta
+                    self._cond.notify_all()
+                return
+            with self._cond:
+                if not self._fechado:
+                    self._ociosas.insert(0, conn)  # Fundo da pilha: as "quentes" continuam no topo
+                    self._cond.notify()
+                    continue
+                self._total -= 1
+                self._metricas['fechadas'] += 1
+            self._fechar(conn)
+
+    def _saudavel(self, conn):
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    # --- API PÚBLICA ---
+    def obter(self):
+        """
+        Faz o checkout de uma conexão. Bloqueia até haver uma livre
+        ou lança PoolEsgotadoError após `timeout_checkout` segundos.
+        """
+        inicio = time.monotonic()
+        limite = inicio + self.timeout_checkout if self.timeout_checkout else None
+        esperou = False
+
+        while True:
+            conn = None
+            criar = False
+            recicladas = []
+            try:
+                with self._cond:
+                    while True:
+                        if self._fechado:
+                            raise PoolEsgotadoError("O pool de conexões foi encerrado.")
+
+                        recicladas += self._recolher_ociosas(time.monotonic())
+
+                        if self._ociosas:
+                            conn = self._ociosas.pop()
+                            break
+                        if self._total < self.maximo:
+                            self._total += 1  # Reserva a vaga antes de conectar fora do lock
+                            criar = True
+                            break
+
+                        restante = None if limite is None else limite - time.monotonic()
+                        if restante is not None and restante <= 0:
+                            self._metricas['timeouts'] += 1
+                            raise PoolEsgotadoError(
+                                f"Nenhuma conexão livre após {self.timeout_checkout:.0f}s "
+                                f"(máximo de {self.maximo} conexões em uso)."
+                            )
+                        esperou = True
+                        self._cond.wait(restante)
+            finally:
+                # Fecha fora do lock (ida à rede) e repõe o mínimo, como em devolver()
+                for velha in recicladas:
+                    self._fechar(velha)
+                if recicladas:
+                    self._completar_minimo()
+
+            if criar:
+                try:
+                    conn = self._criar()
+                except Exception:
+                    with self._cond:
+                        self._total -= 1
+                        self._cond.notify()
+                    raise
+            elif (time.monotonic() - conn.ultimo_uso) > self.verificar_apos:
+                saudavel = self._saudavel(conn)
+                with self._cond:
+                    self._metricas['health_checks'] += 1
+                    if not saudavel:
+                        self._metricas['health_checks_falhos'] += 1
+                        self._metricas['fechadas'] += 1
+                        self._total -= 1
+                        self._cond.notify()
+                if not saudavel:
+                    self._fechar(conn)
+                    continue  # Tenta outra conexão (ou cria uma nova)
+
+            with self._cond:
+                self._em_uso.add(conn)
+                self._metricas['checkouts'] += 1
+                if esperou:
+                    self._metricas['esperas'] += 1
+                    self._metricas['tempo_espera_total'] += time.monotonic() - inicio
+            return conn
+
+    def devolver(self, conn, descartar=False):
+        """
+        Devolve a conexão ao pool. Transações deixadas abertas são desfeitas;
+        conexões quebradas, vencidas ou marcadas para descarte são fechadas.
+        """
+        if not descartar and not conn.closed:
+            try:
+                if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except Exception:
+                descartar = True
+
+        agora = time.monotonic()
+        fechar = descartar or conn.closed or self._expirada(conn, agora)
+
+        with self._cond:
+            self._em_uso.discard(conn)
+            if fechar or self._fechado:
+                self._total -= 1
+                self._metricas['fechadas'] += 1
+            else:
+                conn.ultimo_uso = agora
+                self._ociosas.append(conn)
+            self._cond.notify()
+
+        if fechar or self._fechado:
+            self._fechar(conn)
+            self._completar_minimo()
+
+    def estatisticas(self) -> dict:
+        """Retorna um retrato das métricas e da ocupação atual do pool."""
+        with self._cond:
+            dados = dict(self._metricas)
+            dados.update({
+                'minimo': self.minimo,
+                'maximo': self.maximo,
+                'abertas': self._total,
+                'em_uso': len(self._em_uso),
+                'ociosas': len(self._ociosas),
+            })
+        esperas = dados['esperas']
+        dados['tempo_espera_medio'] = dados['tempo_espera_total'] / esperas if esperas else 0.0
+        return dados
+
+    def fechar(self):
+        """Fecha as conexões ociosas e impede novos checkouts."""
+        with self._cond:
+            self._fechado = True
+            ociosas, self._ociosas = self._ociosas, []
+            self._total -= len(ociosas)
+            self._metricas['fechadas'] += len(ociosas)
+            self._cond.notify_all()
+        for conn in ociosas:
+            self._fechar(conn)
@@ -0,0 +1,56 @@
+import contextvars
+import fnmatch
+import time
+from contextlib import contextmanager
+
+PRIMARIO = "primario"
+LEITURA = "leitura"
+
+# Ativado por ler_do_primario(); as Tarefas copiam o contexto de quem as criou
+_forcar_primario = contextvars.ContextVar("partlog_forcar_primario", default=False)
+
+
+class PoliticaRoteamento:
+    """
+    Decide se uma consulta vai para o primário ou para a réplica de leitura.
+
+    Só vão para a réplica leituras cujo nome casa com um dos `padroes`
+    (fnmatch, ex: "dashboard.*"). Escritas, consultas sem nome na política e
+    qualquer leitura feita até `janela_leitura_propria` segundos depois de uma
+    escrita desta estação ficam no primário (read-your-writes), já que a
+    réplica pode estar atrasada.
+    """
+
+    def __init__(self, padroes=(), janela_leitura_propria=5.0):
+        self.padroes = tuple(padroes)
+        self.janela_leitura_propria = janela_leitura_propria
+        self._leitura_propria_ate = 0.0
+
+    def marcar_escrita(self):
+        """Registra que houve escrita: as leituras seguintes ficam no primário durante a janela."""
+        self._leitura_propria_ate = time.monotonic() + self.janela_leitura_propria
+
+    def em_janela_escrita(self) -> bool:
+        return time.monotonic() < self._leitura_propria_ate
+
+    def destino(self, nome: str, somente_leitura: bool) -> str:
+        if not somente_leitura or not nome or _forcar_primario.get():
+            return PRIMARIO
+        if self.em_janela_escrita():
+            return PRIMARIO
+        if any(fnmatch.fnmatchcase(nome, padrao) for padrao in self.padroes):
+            return LEITURA
+        return PRIMARIO
+
+
+@contextmanager
+def ler_do_primario():
+    """
+    Força todas as leituras do bloco (e das Tarefas criadas dentro dele)
+    a irem para o primário. Ex: conferir na tela um registro recém-gravado.
+    """
+    token = _forcar_primario.set(True)
+    try:
+        yield
+    finally:
+        _forcar_primario.reset(token)
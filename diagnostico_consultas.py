@@ -0,0 +1,96 @@
+import argparse
+import json
+import sys
+
+from database.connection import DatabaseConnection
+from models import AnaliseModel, DashboardModel, RelatorioModel, RetornoModel
+from models.ajuste_model import AjusteModel
+
+# CNPJ e nota usados só para montar os planos das buscas parametrizadas
+CNPJ_EXEMPLO = "12345678000199"
+NOTA_EXEMPLO = "00123"
+GRUPO_EXEMPLO = "Varejo"
+
+
+class DiagnosticoConsultas:
+    """
+    Roda EXPLAIN nas consultas quentes da aplicação e aponta quais delas
+    ainda fazem Seq Scan em tabelas acima de um tamanho mínimo.
+    Varreduras em tabelas pequenas são ignoradas (nelas o Seq Scan é o plano certo).
+    """
+
+    def __init__(self, min_linhas=10000):
+        self.db = DatabaseConnection()
+        self.min_linhas = min_linhas
+
+    def consultas_quentes(self):
+        """Lista (nome, sql, params) das consultas monitoradas."""
+        retorno = RetornoModel()
+        sql_cnpj, params_cnpj = retorno.montar_consulta_busca(CNPJ_EXEMPLO, 'CNPJ', [NOTA_EXEMPLO])
+        sql_grupo, params_grupo = retorno.montar_consulta_busca(GRUPO_EXEMPLO, 'GRUPO')
+
+        return [
+            ("analise.itens_pendentes", AnaliseModel.SQL_ITENS_PENDENTES, None),
+            ("retorno.busca_cnpj", sql_cnpj, params_cnpj),
+            ("retorno.busca_grupo", sql_grupo, params_grupo),
+            ("relatorio.dados", RelatorioModel.SQL_RELATORIO, None),
+            ("ajuste.dados", AjusteModel.SQL_AJUSTE, None),
+            ("dashboard.gap_recebimento", DashboardModel.SQL_GAP_RECEBIMENTO, None),
+            ("dashboard.comparativo_financeiro", DashboardModel.SQL_COMPARATIVO_FINANCEIRO, None),
+            ("dashboard.status_geral", DashboardModel.SQL_STATUS_GERAL, None),
+            ("dashboard.retornos_mes", DashboardModel.SQL_RETORNOS_MES, None),
+            ("dashboard.painel", DashboardModel.SQL_PAINEL, None),
+        ]
+
+    def _varreduras(self, plano, encontradas):
+        """Percorre o plano (JSON) coletando as tabelas lidas por Seq Scan."""
+        if plano.get("Node Type") == "Seq Scan":
+            encontradas.add(plano["Relation Name"])
+        for filho in plano.get("Plans", []):
+            self._varreduras(filho, encontradas)
+        return encontradas
+
+    def tamanhos_tabelas(self, cursor):
+        cursor.execute("""
+            SELECT c.relname, GREATEST(c.reltuples, 0)::bigint
+            FROM pg_class c
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE c.relkind IN ('r', 'p') AND n.nspname = current_schema()
+        """)
+        return dict(cursor.fetchall())
+
+    def executar(self):
+        """Retorna uma lista de dicts {consulta, tabela, linhas} com os Seq Scans relevantes."""
+        alertas = []
+        with self.db.get_connection() as conn:
+            with conn.cursor() as cursor:
+                tamanhos = self.tamanhos_tabelas(cursor)
+                for nome, sql, params in self.consultas_quentes():
+                    cursor.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+                    plano = cursor.fetchone()[0]
+                    if isinstance(plano, str):
+                        plano = json.loads(plano)
+                    for tabela in sorted(self._varreduras(plano[0]["Plan"], set())):
+                        linhas = tamanhos.get(tabela, 0)
+                        if linhas >= self.min_linhas:
+                            alertas.append({'consulta': nome, 'tabela': tabela, 'linhas': linhas})
+        return alertas
+
+    def run(self):
+        alertas = self.executar()
+        if not alertas:
+            print(f"✅ Nenhuma consulta quente faz Seq Scan em tabelas com {self.min_linhas}+ linhas.")
+            return 0
+
+        print(f"⚠️ Consultas com Seq Scan em tabelas com {self.min_linhas}+ linhas:")
+        for a in alertas:
+            print(f"   {a['consulta']:<35} {a['tabela']:<20} ~{a['linhas']} linhas")
+        return 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Aponta consultas quentes que ainda fazem Seq Scan.")
+    parser.add_argument("--min-linhas", type=int, default=10000,
+                        help="Tamanho (linhas estimadas) a partir do qual um Seq Scan é reportado")
+    args = parser.parse_args()
+    sys.exit(DiagnosticoConsultas(args.min_linhas).run())
@@ -0,0 +1,5 @@
+#!/bin/sh
+# Executado só na criação do volume do primário (docker-entrypoint-initdb.d):
+# libera conexões de replicação para o serviço "replica" do docker-compose.
+set -e
+echo "host replication all all scram-sha-256" >> "$PGDATA/pg_hba.conf"
@@ -1,5 +1,6 @@
 from dataclasses import dataclass
 from datetime import date
+from decimal import Decimal
 from typing import Optional
 
 @dataclass
@@ -9,9 +10,9 @@ class ItemPendenteDTO:
     numero_nota: str
     codigo_item: str
     descricao: str
-    data_fmt: str  # Já vem formatada do banco (DD/MM/YYYY)
+    data_lancamento: Optional[date]
     codigo_analise: str
-    ressarcimento: Optional[float] = 0.0
+    ressarcimento: Optional[Decimal] = Decimal('0.00')
 
 @dataclass
 class ResultadoAnaliseDTO:
@@ -0,0 +1,21 @@
+from dataclasses import dataclass
+from datetime import date
+from typing import Optional
+
+@dataclass
+class ResultadoBuscaDTO:
+    """Uma linha da busca global: um item, uma nota ou um cliente"""
+    tipo: str          # 'item', 'nota' ou 'cliente'
+    campo: str         # campo que casou com o termo (codigo_analise, numero_serie, numero_nota, cliente, cnpj)
+    distancia: float   # distância de trigramas até o termo (0 = o termo aparece inteiro no valor)
+
+    id_item: Optional[int] = None   # item (na nota: o primeiro item)
+    codigo_analise: str = ''
+    numero_serie: str = ''
+    codigo_item: str = ''
+    status: str = ''
+    numero_nota: str = ''
+    cnpj: str = ''
+    cliente: str = ''
+    data_lancamento: Optional[date] = None
+    itens_abertos: int = 0          # itens da nota com saldo a retornar
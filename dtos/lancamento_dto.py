@@ -1,5 +1,6 @@
 from dataclasses import dataclass
 from datetime import date
+from decimal import Decimal
 
 @dataclass
 class NotaFiscalDTO:
@@ -13,5 +14,5 @@ class NotaFiscalDTO:
 class ItemNotaDTO:
     codigo: str
     quantidade: int
-    valor: float
-    ressarcimento: float
\ No newline at end of file
+    valor: Decimal
+    ressarcimento: Decimal
\ No newline at end of file
@@ -1,13 +1,15 @@
 from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
 from typing import Optional
 
 @dataclass
 class RelatorioItemDTO:
     status: str
     codigo_analise: str
-    data_lancamento: str
-    data_recebimento: str
-    data_analise: str
+    data_lancamento: Optional[date]
+    data_recebimento: Optional[date]
+    data_analise: Optional[date]
     
     # --- DADOS EMITENTE (CLIENTE) ---
     cnpj: str
@@ -21,28 +23,31 @@ class RelatorioItemDTO:
     cnpj_remetente: str
     nome_remetente: str
 
-    data_emissao: str
+    data_emissao: Optional[date]
     nf_entrada: str
     codigo_item: str
     grupo_item: str
     numero_serie: str
     codigo_avaria: str
     descricao_avaria: str
-    valor_item: float
-    ressarcimento: float
+    valor_item: Decimal
+    ressarcimento: Decimal
     
     nf_retorno: Optional[str] = None
     tipo_retorno: Optional[str] = None
-    data_retorno: Optional[str] = None
+    data_retorno: Optional[date] = None
+
+    # Desempate da paginação (não exibido)
+    id_item: Optional[int] = None
 
     @classmethod
     def from_dict(cls, data: dict):
         return cls(
             status=data.get('status') or '',
             codigo_analise=data.get('codigo_analise') or '',
-            data_lancamento=data.get('data_lancamento') or '',
-            data_recebimento=data.get('data_recebimento') or '',
-            data_analise=data.get('data_analise') or '',
+            data_lancamento=data.get('data_lancamento'),
+            data_recebimento=data.get('data_recebimento'),
+            data_analise=data.get('data_analise'),
             
             cnpj=data.get('cnpj') or '',
             nome_cliente=data.get('nome_cliente') or '',
@@ -55,7 +60,7 @@ class RelatorioItemDTO:
             cnpj_remetente=data.get('cnpj_remetente') or '',
             nome_remetente=data.get('nome_remetente') or '',
             
-            data_emissao=data.get('data_emissao') or '',
+            data_emissao=data.get('data_emissao'),
             nf_entrada=data.get('nf_entrada') or '',
             
             codigo_item=data.get('codigo_item') or '',
@@ -65,10 +70,11 @@ class RelatorioItemDTO:
             codigo_avaria=data.get('codigo_avaria') or '',
             descricao_avaria=data.get('descricao_avaria') or '',
             
-            valor_item=float(data.get('valor_item') or 0.0),
-            ressarcimento=float(data.get('ressarcimento') or 0.0),
+            valor_item=data.get('valor_item') or Decimal('0.00'),
+            ressarcimento=data.get('ressarcimento') or Decimal('0.00'),
             
             nf_retorno=data.get('nf_retorno'),
             tipo_retorno=data.get('tipo_retorno'),
-            data_retorno=data.get('data_retorno')
+            data_retorno=data.get('data_retorno'),
+            id_item=data.get('id_item')
         )
\ No newline at end of file
@@ -1,12 +1,13 @@
 from dataclasses import dataclass
 from datetime import date
+from decimal import Decimal
 
 @dataclass
 class RetornoHeaderDTO:
     numero_nota: str
-    data_emissao: str
+    data_emissao: date
     tipo_retorno: str
-    valor_total: float
+    valor_total: Decimal
     cnpj_emitente: str
     cnpj_remetente: str
     grupo: str
@@ -18,10 +19,10 @@ class ItemPendenteDTO:
     data_nota_origem: date
     codigo_item: str
     descricao_item: str
-    valor_original: float
-    saldo_financeiro: float
+    valor_original: Decimal
+    saldo_financeiro: Decimal
     nome_cliente: str
     grupo_economico: str
     # Campos manipulados na View
-    valor_a_abater: float = 0.0
+    valor_a_abater: Decimal = Decimal('0.00')
     codigo_analise: str = ""  # NOVO CAMPO
\ No newline at end of file
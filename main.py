@@ -13,6 +13,9 @@ from views.relatorio_view import PageRelatorio
 from views.dashboard_view import PageDashboard
 from views.retorno_view import PageRetorno
 from views.ajuste_view import PageAjustes
+from views.busca_view import BarraBusca
+from controllers.busca_controller import ANALISE, AJUSTES, RETORNO
+from controllers.alteracoes import get_feed
 
 class MainWindow(QMainWindow):
     """
@@ -154,8 +157,18 @@ class MainWindow(QMainWindow):
         self.btn_aju.clicked.connect(lambda: self.pages.setCurrentIndex(5))
 
 
+        # Busca global acima das páginas
+        self.barra_busca = BarraBusca()
+        self.barra_busca.resultado_escolhido.connect(self.abrir_resultado_busca)
+
+        area_paginas = QVBoxLayout()
+        area_paginas.setContentsMargins(0, 0, 0, 0)
+        area_paginas.setSpacing(0)
+        area_paginas.addWidget(self.barra_busca)
+        area_paginas.addWidget(self.pages)
+
         main_layout.addWidget(self.sidebar)
-        main_layout.addWidget(self.pages)
+        main_layout.addLayout(area_paginas)
 
         # Configuração da Animação do Menu
         self.animation = QPropertyAnimation(self.sidebar, b"minimumWidth")
@@ -216,22 +229,23 @@ class MainWindow(QMainWindow):
         """
         widget_atual = self.pages.widget(index)
 
-        # Atualiza tabela e limpa formulário da tela de Análise
+        # Limpa o formulário da tela de Análise; as tabelas se mantêm atualizadas
+        # sozinhas pelo feed de alterações (controllers.alteracoes)
         if isinstance(widget_atual, PageAnalise):
-            widget_atual.carregar_dados_tabela()
-            
-            widget_atual.bloquear_form(True)
-            widget_atual.txt_id_item.clear()
-            widget_atual.txt_peca_nome.clear()
-            widget_atual.txt_desc_avaria.clear()
-            widget_atual.lbl_status_resultado.setText("AGUARDANDO")
-            widget_atual.lbl_status_resultado.setObjectName("StatusNeutro")
-            widget_atual.lbl_status_resultado.style().unpolish(widget_atual.lbl_status_resultado)
-            widget_atual.lbl_status_resultado.style().polish(widget_atual.lbl_status_resultado)
-
-        # Recarrega dados do Relatório
-        elif isinstance(widget_atual, PageRelatorio):
-            widget_atual.carregar_dados()
+            widget_atual.limpar_formulario()
+
+    def abrir_resultado_busca(self, destino, resultado):
+        """Leva o resultado escolhido na busca global para a tela de destino."""
+        if destino == ANALISE:
+            self.pages.setCurrentIndex(2)
+            self.pages.widget(2).focar_item(resultado.id_item)
+        elif destino == AJUSTES:
+            self.pages.setCurrentIndex(5)
+            self.pages.widget(5).focar_item(resultado.id_item)
+        elif destino == RETORNO:
+            self.pages.setCurrentIndex(4)
+            numero_nota = resultado.numero_nota if resultado.tipo == "nota" else None
+            self.pages.widget(4).focar_cliente(resultado.cnpj, numero_nota)
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
@@ -245,6 +259,9 @@ if __name__ == "__main__":
             "Não foi possível conectar ao Banco de Dados.\n\n"
             "DICA: Verifique se o Docker Desktop está aberto e se rodou 'docker compose up -d'.")
         sys.exit(1)
+
+    # Avisos de alteração do banco (LISTEN); as telas aplicam só o que mudou
+    get_feed().iniciar()
    
     window = MainWindow()
     window.showMaximized()    
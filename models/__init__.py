@@ -1,5 +1,6 @@
 from .analise_model import AnaliseModel
 from .dashboard_model import DashboardModel
+from .fato_model import FatoModel
 from .lancamento_model import LancamentoModel
 from .relatorio_model import RelatorioModel
 from .retorno_model import RetornoModel
\ No newline at end of file
@@ -1,45 +1,84 @@
-from database.connection import DatabaseConnection
+from database.connection import DatabaseConnection, MapeadorLinhas, TAMANHO_LOTE_PADRAO
 from dtos.ajuste_dto import AjusteItemDTO
+from models.relatorio_model import RelatorioModel
 
 class AjusteModel:
+    MAPEADOR = MapeadorLinhas(AjusteItemDTO)
+
+    # Mesma ordem (e paginação por chave) do Relatório
+    ORDEM = RelatorioModel.ORDEM
+
+    # Mesmo esquema estrela do Relatório; as gravações continuam nas tabelas operacionais.
+    # Itens arquivados estão encerrados e não são mais ajustáveis.
+    SQL_BASE = """
+        SELECT 
+            f.id_item, f.id_nota, -- CAMPOS CRITICOS PARA UPDATE
+            f.status, f.codigo_analise,
+            f.data_lancamento,
+            f.data_recebimento,
+            f.data_analise,
+            c.cnpj, c.cliente as nome_cliente, c.grupo as grupo_cliente,
+            c.cidade, c.estado, c.regiao,
+            f.cnpj_remetente, cr.cliente as nome_remetente,
+            f.data_emissao,
+            f.nf_entrada,
+            f.codigo_item, i.grupo_item, f.numero_serie,
+            f.codigo_avaria, a.descricao_avaria,
+            f.valor_item, f.ressarcimento,
+            f.nf_retorno, f.tipo_retorno,
+            f.data_retorno
+        FROM fato_itens f
+        LEFT JOIN dim_cliente c ON f.cnpj_cliente = c.cnpj
+        LEFT JOIN dim_cliente cr ON f.cnpj_remetente = cr.cnpj
+        LEFT JOIN dim_item i ON f.codigo_item = i.codigo_item
+        LEFT JOIN dim_avaria a ON f.codigo_avaria = a.codigo_avaria
+        WHERE NOT f.arquivado AND {condicao}
+        ORDER BY {ordem}
+    """
+    SQL_AJUSTE = SQL_BASE.format(condicao="TRUE", ordem=ORDEM.order_by())
+
     def __init__(self):
         self.db = DatabaseConnection()
 
     def get_dados_ajuste(self):
-        sql = """
-            SELECT 
-                l.id as id_item, n.id as id_nota, -- CAMPOS CRITICOS PARA UPDATE
-                l.status, l.codigo_analise,
-                to_char(n.data_lancamento, 'DD/MM/YYYY') as data_lancamento,
-                to_char(n.data_recebimento, 'DD/MM/YYYY') as data_recebimento,
-                to_char(l.data_analise, 'DD/MM/YYYY') as data_analise,
-                c.cnpj, c.cliente as nome_cliente, c.grupo as grupo_cliente,
-                c.cidade, c.estado, c.regiao,
-                n.cnpj_remetente, cr.cliente as nome_remetente,
-                to_char(n.data_nota, 'DD/MM/YYYY') as data_emissao,
-                n.numero_nota as nf_entrada,
-                l.codigo_item, i.grupo_item, l.numero_serie,
-                l.codigo_avaria, a.descricao_avaria,
-                l.valor_item, l.ressarcimento,
-                nr.numero_nota as nf_retorno, nr.tipo_retorno,
-                to_char(nr.data_emissao, 'DD/MM/YYYY') as data_retorno
-            FROM itens_notas l
-            JOIN notas_fiscais n ON l.id_nota_fiscal = n.id
-            LEFT JOIN clientes c ON n.cnpj_cliente = c.cnpj
-            LEFT JOIN clientes cr ON n.cnpj_remetente = cr.cnpj
-            LEFT JOIN itens i ON l.codigo_item = i.codigo_item
-            LEFT JOIN avarias a ON l.codigo_avaria = a.codigo_avaria
-            LEFT JOIN conciliacao conc ON l.id = conc.id_item_entrada
-            LEFT JOIN notas_retorno nr ON conc.id_nota_retorno = nr.id
-            ORDER BY n.data_lancamento DESC
+        return [dto for lote in self.iter_dados_ajuste() for dto in lote]
+
+    def iter_dados_ajuste(self, tamanho_lote=TAMANHO_LOTE_PADRAO):
+        """Gera os DTOs de ajuste em lotes (cursor server-side)."""
+        yield from self.db.stream_query(self.SQL_AJUSTE, tamanho_lote=tamanho_lote,
+                                        mapeador=self.MAPEADOR, nome="ajuste.dados")
+
+    def get_pagina(self, apos=None, tamanho=50):
         """
-        dados = self.db.execute_query(sql, fetch=True)
-        return [AjusteItemDTO.from_dict(d) for d in dados]
+        Uma página da listagem a partir da chave `apos` (None = primeira página).
+        Retorna (dtos, tem_mais). A chave da próxima página é ORDEM.chave(dtos[-1]).
+        """
+        condicao, params = self.ORDEM.condicao(apos)
+        sql = self.SQL_BASE.format(condicao=condicao, ordem=self.ORDEM.order_by())
+        params["limite"] = tamanho + 1
+        dtos = self.db.execute_query(sql + " LIMIT %(limite)s", params, fetch=True,
+                                     mapeador=self.MAPEADOR, nome="ajuste.pagina")
+        return dtos[:tamanho], len(dtos) > tamanho
+
+    def get_itens(self, ids):
+        """DTOs atuais dos itens `ids` que estão na listagem (os demais foram excluídos ou arquivados)."""
+        sql = self.SQL_BASE.format(condicao="f.id_item = ANY(%(ids)s)", ordem=self.ORDEM.order_by())
+        return self.db.execute_query(sql, {"ids": list(ids)}, fetch=True,
+                                     mapeador=self.MAPEADOR, nome="ajuste.itens")
+
+    def get_item(self, id_item):
+        """DTO de um item (ex: aberto pela busca global), ou None se não estiver na listagem."""
+        dtos = self.get_itens([id_item])
+        return dtos[0] if dtos else None
+
+    def estimar_total(self) -> int:
+        """Total aproximado de linhas (estimativa do planejador, sem contar)."""
+        return self.db.estimar_linhas(self.SQL_AJUSTE, nome="ajuste.estimativa")
 
     def verificar_vinculo_retorno(self, id_item):
         """Retorna True se o item já possui nota de retorno vinculada (não pode editar)"""
         sql = "SELECT id FROM conciliacao WHERE id_item_entrada = %s"
-        res = self.db.execute_query(sql, (id_item,), fetch=True)
+        res = self.db.execute_query(sql, (id_item,), fetch=True, nome="ajuste.verificar_vinculo")
         return len(res) > 0
 
     def atualizar_item(self, dto: AjusteItemDTO, novos_dados: dict):
@@ -64,7 +103,7 @@ class AjusteModel:
                 novos_dados['data_emissao'],
                 novos_dados['cnpj_remetente'],
                 dto.id_nota
-            ))
+            ), nome="ajuste.atualizar_nota")
 
             # 2. Atualizar Tabela Filho (Itens Notas)
             # Ao mudar codigo_analise, o Status muda logicamente pois é derivado? 
@@ -86,7 +125,7 @@ class AjusteModel:
                 novos_dados['numero_serie'],
                 novos_dados['codigo_avaria'],
                 dto.id_item
-            ))
+            ), nome="ajuste.atualizar_item")
             return True
         except Exception as e:
             print(f"Erro no Update: {e}")
@@ -97,5 +136,5 @@ class AjusteModel:
             raise Exception("Não é possível excluir item vinculado a uma Nota de Retorno.")
         
         sql = "DELETE FROM itens_notas WHERE id = %s"
-        self.db.execute_query(sql, (id_item,))
+        self.db.execute_query(sql, (id_item,), nome="ajuste.excluir_item")
         return True
\ No newline at end of file
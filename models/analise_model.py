@@ -3,32 +3,39 @@ from dtos.analise_dto import ResultadoAnaliseDTO
 from typing import List
 
 class AnaliseModel:
+    # Filtra pelo índice parcial idx_itens_notas_pendentes
+    SQL_BASE = """
+        SELECT i.id, 
+               nf.numero_nota, 
+               i.codigo_item, 
+               p.descricao_item as descricao, 
+               nf.data_lancamento, 
+               i.codigo_analise,
+               i.ressarcimento
+        FROM itens_notas i
+        JOIN notas_fiscais nf ON i.id_nota_fiscal = nf.id
+        LEFT JOIN itens p ON i.codigo_item = p.codigo_item
+        WHERE i.status = 'Pendente' AND {condicao}
+        -- ALTERAÇÃO AQUI:
+        -- Primeiro ordena por data (os mais antigos primeiro)
+        -- Depois agrupa pela nota fiscal (caso tenha notas diferentes no mesmo dia)
+        -- Por fim, ordena pelo código de análise (sequência lógica interna)
+        ORDER BY nf.data_lancamento ASC, nf.numero_nota ASC, i.codigo_analise ASC
+    """
+    SQL_ITENS_PENDENTES = SQL_BASE.format(condicao="TRUE")
+
     def __init__(self):
         self.db = DatabaseConnection()
 
-    def get_itens_pendentes(self) -> List[dict]:
+    def get_itens_pendentes(self, ids=None) -> List[dict]:
         """
         Retorna dicionários puros do banco. 
+        ids: só esses itens, se ainda pendentes (alterações avisadas pelo feed).
         """
-        sql = """
-            SELECT i.id, 
-                   nf.numero_nota, 
-                   i.codigo_item, 
-                   p.descricao_item as descricao, 
-                   to_char(nf.data_lancamento, 'DD/MM/YYYY') as data_fmt, 
-                   i.codigo_analise,
-                   i.ressarcimento
-            FROM itens_notas i
-            JOIN notas_fiscais nf ON i.id_nota_fiscal = nf.id
-            LEFT JOIN itens p ON i.codigo_item = p.codigo_item
-            WHERE i.status = 'Pendente'
-            -- ALTERAÇÃO AQUI:
-            -- Primeiro ordena por data (os mais antigos primeiro)
-            -- Depois agrupa pela nota fiscal (caso tenha notas diferentes no mesmo dia)
-            -- Por fim, ordena pelo código de análise (sequência lógica interna)
-            ORDER BY nf.data_lancamento ASC, nf.numero_nota ASC, i.codigo_analise ASC
-        """
-        return self.db.execute_query(sql, fetch=True)
+        if ids is None:
+            return self.db.execute_query(self.SQL_ITENS_PENDENTES, fetch=True, nome="analise.itens_pendentes")
+        sql = self.SQL_BASE.format(condicao="i.id = ANY(%s)")
+        return self.db.execute_query(sql, (list(ids),), fetch=True, nome="analise.itens_alterados")
 
     def atualizar_analise(self, dados: ResultadoAnaliseDTO):
         """
@@ -59,4 +66,4 @@ class AnaliseModel:
             dados.data_analise,
             dados.id_item
         )
-        self.db.execute_query(sql, params)
\ No newline at end of file
+        self.db.execute_query(sql, params, nome="analise.atualizar")
\ No newline at end of file
@@ -0,0 +1,134 @@
+from database.connection import DatabaseConnection, MapeadorLinhas
+from dtos.busca_dto import ResultadoBuscaDTO
+from models.filtros import padrao_contem, padrao_inicio
+
+class BuscaModel:
+    MAPEADOR = MapeadorLinhas(ResultadoBuscaDTO)
+
+    # Termos a partir deste tamanho são procurados em qualquer posição do valor
+    MINIMO_CONTEM = 4
+
+    # Índices da 0014, um por campo e modo:
+    #   - contém (ILIKE '%termo%'): GiST trigram. Cada campo é lido já em ordem de
+    #     semelhança (ORDER BY termo <<-> coluna LIMIT n, busca KNN) e para nos `limite`
+    #     mais parecidos. A distância é a de palavra (word_similarity): o termo inteiro
+    #     dentro do valor (ex: '001302' em 'D24-001302') conta como idêntico.
+    #   - início (LIKE 'termo%'), para termos curtos: btree *_prefixo em COLLATE "C".
+    #     Três caracteres casam com quase toda linha e dão trigramas que não distinguem
+    #     nada no GiST; pelo início, a leitura é um intervalo curto do btree, já na ordem.
+    # Lê as tabelas operacionais: um item recém-lançado já aparece.
+    FILTRO_CONTEM = {
+        'codigo_analise': "codigo_analise ILIKE %(padrao)s ORDER BY %(termo)s <<-> codigo_analise",
+        'numero_serie': "numero_serie ILIKE %(padrao)s ORDER BY %(termo)s <<-> numero_serie",
+        'numero_nota': "numero_nota ILIKE %(padrao)s ORDER BY %(termo)s <<-> numero_nota",
+        'cliente': "cliente ILIKE %(padrao)s ORDER BY %(termo)s <<-> cliente",
+        'cnpj': "cnpj_digitos LIKE %(padrao_digitos)s ORDER BY %(digitos)s <<-> cnpj_digitos",
+    }
+    FILTRO_INICIO = {
+        'codigo_analise': 'lower(codigo_analise) COLLATE "C" LIKE %(padrao)s ORDER BY lower(codigo_analise) COLLATE "C"',
+        'numero_serie': 'lower(numero_serie) COLLATE "C" LIKE %(padrao)s ORDER BY lower(numero_serie) COLLATE "C"',
+        'numero_nota': 'lower(numero_nota) COLLATE "C" LIKE %(padrao)s ORDER BY lower(numero_nota) COLLATE "C"',
+        'cliente': 'lower(cliente) COLLATE "C" LIKE %(padrao)s ORDER BY lower(cliente) COLLATE "C"',
+        'cnpj': 'cnpj_digitos COLLATE "C" LIKE %(padrao_digitos)s ORDER BY cnpj_digitos COLLATE "C"',
+    }
+
+    SQL_BASE = """
+        WITH itens AS (
+            SELECT DISTINCT ON (id) id, campo, distancia
+            FROM (
+                (SELECT id, 'codigo_analise' AS campo, %(termo)s <<-> codigo_analise AS distancia
+                 FROM itens_notas
+                 WHERE {filtro[codigo_analise]} LIMIT %(limite)s)
+                UNION ALL
+                (SELECT id, 'numero_serie', %(termo)s <<-> numero_serie AS distancia
+                 FROM itens_notas
+                 WHERE {filtro[numero_serie]} LIMIT %(limite)s)
+            ) candidatos
+            ORDER BY id, distancia
+        ),
+        notas AS (
+            SELECT id, %(termo)s <<-> numero_nota AS distancia
+            FROM notas_fiscais
+            WHERE {filtro[numero_nota]} LIMIT %(limite)s
+        ),
+        clientes_encontrados AS (
+            SELECT DISTINCT ON (cnpj) cnpj, campo, distancia
+            FROM (
+                (SELECT cnpj, 'cliente' AS campo, %(termo)s <<-> cliente AS distancia
+                 FROM clientes
+                 WHERE {filtro[cliente]} LIMIT %(limite)s)
+                UNION ALL
+                -- CNPJ digitado com ou sem pontuação: compara só os dígitos
+                (SELECT cnpj, 'cnpj', %(digitos)s <<-> cnpj_digitos AS distancia
+                 FROM clientes
+                 WHERE %(digitos)s <> '' AND {filtro[cnpj]} LIMIT %(limite)s)
+            ) candidatos
+            ORDER BY cnpj, distancia
+        )
+        SELECT * FROM (
+            SELECT 'item' AS tipo, e.campo, e.distancia, i.id AS id_item,
+                   i.codigo_analise, i.numero_serie, i.codigo_item, i.status,
+                   nf.numero_nota, nf.cnpj_cliente AS cnpj, c.cliente, nf.data_lancamento,
+                   0 AS itens_abertos
+            FROM itens e
+            JOIN itens_notas i ON i.id = e.id
+            JOIN notas_fiscais nf ON nf.id = i.id_nota_fiscal
+            LEFT JOIN clientes c ON c.cnpj = nf.cnpj_cliente
+
+            UNION ALL
+
+            SELECT 'nota', 'numero_nota', e.distancia, itens_nota.primeiro,
+                   NULL, NULL, NULL, NULL,
+                   nf.numero_nota, nf.cnpj_cliente, c.cliente, nf.data_lancamento,
+                   itens_nota.abertos
+            FROM notas e
+            JOIN notas_fiscais nf ON nf.id = e.id
+            LEFT JOIN clientes c ON c.cnpj = nf.cnpj_cliente
+            -- Mesma regra de saldo em aberto da busca do Retorno
+            CROSS JOIN LATERAL (
+                SELECT MIN(i.id) AS primeiro,
+                       COUNT(*) FILTER (WHERE i.saldo_financeiro > 0
+                                        AND i.status IN ('Pendente', 'Procedente', 'Improcedente')) AS abertos
+                FROM itens_notas i
+                WHERE i.id_nota_fiscal = nf.id
+            ) itens_nota
+
+            UNION ALL
+
+            SELECT 'cliente', e.campo, e.distancia, NULL,
+                   NULL, NULL, NULL, NULL,
+                   NULL, c.cnpj, c.cliente, NULL,
+                   0
+            FROM clientes_encontrados e
+            JOIN clientes c ON c.cnpj = e.cnpj
+        ) resultados
+        ORDER BY distancia, tipo = 'cliente', tipo = 'nota', data_lancamento DESC NULLS LAST
+        LIMIT %(limite)s
+    """
+    SQL_BUSCA = SQL_BASE.format(filtro=FILTRO_CONTEM)
+    SQL_BUSCA_INICIO = SQL_BASE.format(filtro=FILTRO_INICIO)
+
+    def __init__(self):
+        self.db = DatabaseConnection()
+
+    def buscar(self, termo: str, limite: int = 10) -> list[ResultadoBuscaDTO]:
+        """
+        Itens (código de análise, série), notas (número) e clientes (nome, CNPJ)
+        que contêm o termo (termo curto: que começam com ele), dos mais parecidos para
+        os menos.
+        """
+        digitos = ''.join(filter(str.isdigit, termo))
+        if len(termo) >= self.MINIMO_CONTEM:
+            sql, padrao = self.SQL_BUSCA, padrao_contem
+        else:
+            sql, padrao = self.SQL_BUSCA_INICIO, padrao_inicio
+        params = {
+            'termo': termo,
+            'padrao': padrao(termo.lower()),
+            # Poucos dígitos casariam com quase todo CNPJ
+            'digitos': digitos if len(digitos) >= 3 else '',
+            'padrao_digitos': padrao(digitos),
+            'limite': limite,
+        }
+        return self.db.execute_query(sql, params, fetch=True, mapeador=self.MAPEADOR,
+                                     nome="busca.global")
@@ -5,20 +5,108 @@ class DashboardModel:
     Camada de acesso a dados para os indicadores gerenciais (KPIs).
     Responsável por queries analíticas e agregações financeiras.
     """
-    
+
+    # Todas as leituras vêm dos rollups mensais (migração 0006_kpis_mensais):
+    # o custo não cresce com o histórico de itens_notas/conciliacao.
+
+    SQL_GAP_RECEBIMENTO = """
+        SELECT CURRENT_DATE - MAX(ultimo_recebimento) as dias_defasagem
+        FROM kpi_entradas_mes
+    """
+
+    SQL_COMPARATIVO_FINANCEIRO = """
+        -- Safra: últimos 6 meses de RECEBIMENTO, exibidos em ordem crescente
+        SELECT TO_CHAR(mes, 'YYYY-MM') as mes,
+               valor_recebido as val_recebido,
+               valor_retornado as val_retornado
+        FROM (
+            SELECT mes, valor_recebido, valor_retornado
+            FROM kpi_entradas_mes
+            ORDER BY mes DESC
+            LIMIT 6
+        ) ultimos
+        ORDER BY ultimos.mes ASC
+    """
+
+    SQL_STATUS_GERAL = """
+        SELECT status_final, SUM(qtd) as qtd, SUM(valor_total) as valor_total
+        FROM kpi_status_mes
+        GROUP BY status_final
+    """
+
+    SQL_RETORNOS_MES = """
+        -- Últimos 6 meses de emissão de notas de retorno, em ordem crescente
+        SELECT TO_CHAR(mes, 'YYYY-MM') as mes, valor_total
+        FROM (
+            SELECT mes, valor_total
+            FROM kpi_retornos_mes
+            ORDER BY mes DESC
+            LIMIT 6
+        ) ultimos
+        ORDER BY ultimos.mes ASC
+    """
+
+    SQL_KPI_FINANCEIRO = """
+        SELECT SUM(custo_procedente) as total_custo, SUM(qtd_procedente) as qtd
+        FROM kpi_status_mes
+    """
+
+    # Os quatro conjuntos do painel em uma única ida ao banco: cada consulta acima
+    # vira uma coluna (as listas em JSON, na ordem das consultas originais).
+    SQL_PAINEL = f"""
+        SELECT
+            ({SQL_GAP_RECEBIMENTO}) as dias_defasagem,
+            (SELECT COALESCE(json_agg(c ORDER BY c.mes), '[]') FROM ({SQL_COMPARATIVO_FINANCEIRO}) c) as comparativo,
+            (SELECT COALESCE(json_agg(s), '[]') FROM ({SQL_STATUS_GERAL}) s) as status,
+            (SELECT COALESCE(json_agg(r ORDER BY r.mes), '[]') FROM ({SQL_RETORNOS_MES}) r) as retornos
+    """
+
     def __init__(self):
         self.db = DatabaseConnection()
 
+    def processar_pendentes(self) -> int:
+        """
+        Recalcula os meses anotados pelas triggers desde a última atualização
+        (no primário). Retorna quantos meses foram recalculados.
+        """
+        with self.db.get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT kpi_processar_pendentes()")
+                meses = cursor.fetchone()[0]
+            conn.commit()
+        if meses:
+            # Garante que a leitura logo em seguida enxergue os rollups recalculados
+            self.db.marcar_escrita()
+        return meses
+
+    def recalcular_tudo(self) -> int:
+        """Reconstrói todos os rollups a partir das tabelas de origem."""
+        with self.db.get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT kpi_recalcular_tudo()")
+                meses = cursor.fetchone()[0]
+            conn.commit()
+        self.db.marcar_escrita()
+        return meses
+
+    def get_painel(self) -> dict:
+        """
+        Busca de uma vez gap de recebimento, comparativo financeiro, status e
+        histórico de retornos (mesmas linhas dos métodos individuais abaixo).
+        """
+        res = self.db.execute_query(self.SQL_PAINEL, fetch=True, nome="dashboard.painel")
+        linha = res[0]
+        dias = linha['dias_defasagem']
+        return {
+            'gap': float(dias) if dias is not None else 0.0,
+            'comparativo': linha['comparativo'],
+            'status': linha['status'],
+            'retornos': linha['retornos'],
+        }
+
     def get_kpi_financeiro(self):
         """Calcula o impacto financeiro total das garantias procedentes."""
-        sql = """
-            SELECT
-                SUM(valor_item + ressarcimento) as total_custo,
-                COUNT(*) as qtd
-            FROM itens_notas
-            WHERE procedente_improcedente = 'Procedente'
-        """
-        res = self.db.execute_query(sql, fetch=True)
+        res = self.db.execute_query(self.SQL_KPI_FINANCEIRO, fetch=True, nome="dashboard.kpi_financeiro")
         
         if res and res[0]['total_custo']:
             total = float(res[0]['total_custo'])
@@ -30,12 +118,8 @@ class DashboardModel:
 
     def get_gap_atual_recebimento(self):
         """Calcula a diferença em dias entre HOJE e a data da nota mais recente lançada."""
-        sql = """
-            SELECT CURRENT_DATE - MAX(data_recebimento) as dias_defasagem
-            FROM notas_fiscais
-            WHERE data_recebimento IS NOT NULL
-        """
-        res = self.db.execute_query(sql, fetch=True)
+        res = self.db.execute_query(self.SQL_GAP_RECEBIMENTO, fetch=True,
+                                    nome="dashboard.gap_recebimento")
         
         if res and res[0]['dias_defasagem'] is not None:
             return float(res[0]['dias_defasagem'])
@@ -46,99 +130,18 @@ class DashboardModel:
         Gera dados para o gráfico comparativo: Entrada vs Devolução.
         Lógica de Safra (Últimos 6 meses de RECEBIMENTO).
         """
-        sql = """
-            WITH meses AS (
-                -- Busca os últimos 6 meses de ENTRADA
-                SELECT DISTINCT TO_CHAR(data_recebimento, 'YYYY-MM') as mes
-                FROM notas_fiscais
-                WHERE data_recebimento IS NOT NULL
-                ORDER BY mes DESC 
-                LIMIT 6
-            ),
-            meses_final AS (
-                SELECT mes FROM meses ORDER BY mes ASC
-            ),
-            recebido AS (
-                SELECT 
-                    TO_CHAR(n.data_recebimento, 'YYYY-MM') as mes, 
-                    SUM(i.valor_item) as total
-                FROM itens_notas i 
-                JOIN notas_fiscais n ON i.id_nota_fiscal = n.id
-                WHERE n.data_recebimento IS NOT NULL
-                GROUP BY mes
-            ),
-            retornado_por_safra AS (
-                SELECT 
-                    TO_CHAR(n.data_recebimento, 'YYYY-MM') as mes, 
-                    SUM(i.valor_item) as total
-                FROM itens_notas i
-                JOIN notas_fiscais n ON i.id_nota_fiscal = n.id
-                JOIN conciliacao c ON i.id = c.id_item_entrada
-                WHERE n.data_recebimento IS NOT NULL
-                GROUP BY mes
-            )
-            SELECT
-                m.mes,
-                COALESCE(r.total, 0) as val_recebido,
-                COALESCE(p.total, 0) as val_retornado
-            FROM meses_final m
-            LEFT JOIN recebido r ON m.mes = r.mes
-            LEFT JOIN retornado_por_safra p ON m.mes = p.mes
-            ORDER BY m.mes ASC
-        """
-        return self.db.execute_query(sql, fetch=True)
+        return self.db.execute_query(self.SQL_COMPARATIVO_FINANCEIRO, fetch=True,
+                                     nome="dashboard.comparativo_financeiro")
 
     def get_status_geral(self):
         """
         Retorna distribuição de status contendo Quantidade e Valor Financeiro.
         """
-        sql = """
-            SELECT
-                CASE
-                    WHEN status = 'Pendente' THEN 'Pendente'
-                    WHEN procedente_improcedente = 'Procedente' THEN 'Procedente'
-                    WHEN procedente_improcedente = 'Improcedente' THEN 'Improcedente'
-                    ELSE status
-                END as status_final,
-                COUNT(*) as qtd,
-                SUM(valor_item) as valor_total
-            FROM itens_notas
-            GROUP BY status_final
-        """
-        return self.db.execute_query(sql, fetch=True)
+        return self.db.execute_query(self.SQL_STATUS_GERAL, fetch=True, nome="dashboard.status_geral")
 
     def get_historico_retornos_mes(self):
         """
         Retorna o valor total dos itens retornados agrupados pelo Mês de Emissão da Nota de Retorno.
         Filtra pelos últimos 6 meses disponíveis (Lógica corrigida: DESC -> ASC).
         """
-        sql = """
-            WITH meses AS (
-                -- 1. Busca apenas os meses que existem na tabela de notas de retorno
-                SELECT DISTINCT TO_CHAR(data_emissao, 'YYYY-MM') as mes
-                FROM notas_retorno
-                ORDER BY mes DESC -- Garante que pegamos os ÚLTIMOS (mais recentes)
-                LIMIT 6
-            ),
-            meses_final AS (
-                -- 2. Reordena para exibir cronologicamente (crescente)
-                SELECT mes FROM meses ORDER BY mes ASC
-            ),
-            dados AS (
-                -- 3. Agrega os valores por mês
-                SELECT 
-                    TO_CHAR(nr.data_emissao, 'YYYY-MM') as mes,
-                    SUM(i.valor_item) as valor_total
-                FROM itens_notas i
-                JOIN conciliacao c ON i.id = c.id_item_entrada
-                JOIN notas_retorno nr ON c.id_nota_retorno = nr.id
-                GROUP BY mes
-            )
-            SELECT 
-                m.mes,
-                COALESCE(d.valor_total, 0) as valor_total
-            FROM meses_final m
-            LEFT JOIN dados d ON m.mes = d.mes
-            ORDER BY m.mes ASC
-        """
-        return self.db.execute_query(sql, fetch=True)
\ No newline at end of file
+        return self.db.execute_query(self.SQL_RETORNOS_MES, fetch=True, nome="dashboard.retornos_mes")
\ No newline at end of file
@@ -0,0 +1,42 @@
+from contextlib import nullcontext
+from typing import Optional
+
+from database.connection import TIMEOUTS, DatabaseConnection
+
+class FatoModel:
+    """
+    Manutenção do esquema estrela do Relatório (fato_itens + dim_*),
+    alimentado a partir das tabelas operacionais (migração 0008_relatorio_estrela).
+    """
+
+    def __init__(self):
+        self.db = DatabaseConnection()
+
+    def _executar(self, funcao, nome: str = None):
+        with self.db.get_connection() as conn:
+            # Com `nome`, vale o statement_timeout da classe e o token de cancelamento
+            with TIMEOUTS.aplicar(conn, nome) if nome else nullcontext():
+                with conn.cursor() as cursor:
+                    cursor.execute(f"SELECT {funcao}()")
+                    total = cursor.fetchone()[0]
+                conn.commit()
+        return total
+
+    def processar_pendentes(self) -> Optional[int]:
+        """
+        Leva para o fato os itens gravados desde a última carga (no primário).
+        Chamado em segundo plano pelo feed de alterações, nunca na leitura das telas:
+        se outra estação já estiver carregando, não espera e retorna None.
+        Retorna quantos itens foram reprocessados.
+        """
+        itens = self._executar("etl_tentar_processar_fato", nome="etl.processar")
+        if itens:
+            # Garante que a leitura logo em seguida enxergue o fato atualizado
+            self.db.marcar_escrita()
+        return itens
+
+    def recarregar(self) -> int:
+        """Reconstrói o fato inteiro. Retorna o total de itens carregados."""
+        total = self._executar("etl_recarregar_fato")
+        self.db.marcar_escrita()
+        return total
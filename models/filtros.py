@@ -0,0 +1,67 @@
+# Tipos de coluna do compilador
+TEXTO = "texto"
+DATA = "data"
+VALOR = "valor"
+
+# Mesmo texto de views.formatacao.formatar_moeda ('R$ 1.234,56'), gerado no banco
+_SQL_MOEDA = "('R$ ' || translate(to_char(COALESCE({expr}, 0), 'FM999,999,999,990.00'), ',.', '.,'))"
+
+
+def _escapar(texto: str) -> str:
+    # Curingas digitados pelo usuário são literais
+    return texto.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def padrao_contem(texto: str) -> str:
+    return f"%{_escapar(texto)}%"
+
+
+def padrao_inicio(texto: str) -> str:
+    return f"{_escapar(texto)}%"
+
+
+class CompiladorFiltros:
+    """
+    Transforma a linha de filtros de uma tabela em SQL parametrizado, com a mesma
+    regra que era aplicada em memória sobre o texto exibido nas células:
+      - texto: contém, sem diferenciar maiúsculas (ILIKE, atendido por índice trigram);
+      - data com intervalo (date, date): BETWEEN na própria coluna (usa o índice da data);
+      - data ou valor com texto: contém, sobre 'dd/mm/aaaa' ou 'R$ 1.234,56';
+      - None: filtro incompleto (ex: intervalo ainda sendo digitado), não traz nada.
+
+    colunas: {campo: (expressão SQL, tipo)}. Campos fora do mapa são ignorados.
+    """
+
+    def __init__(self, colunas):
+        self.colunas = colunas
+
+    def compilar(self, filtros) -> tuple:
+        """
+        filtros: {campo: texto | (inicio, fim) | None}. Retorna (sql, params) para
+        compor um WHERE ('TRUE' sem filtros), com parâmetros nomeados %(filtro_N)s.
+        """
+        condicoes = []
+        params = {}
+        for i, (campo, valor) in enumerate((filtros or {}).items()):
+            if campo not in self.colunas:
+                continue
+            if valor is None:
+                return "FALSE", {}
+            expr, tipo = self.colunas[campo]
+            nome = f"filtro_{i}"
+
+            if isinstance(valor, tuple):
+                params[nome + "_de"], params[nome + "_ate"] = valor
+                condicoes.append(f"{expr} BETWEEN %({nome}_de)s AND %({nome}_ate)s")
+                continue
+
+            if tipo == DATA:
+                expr = f"to_char({expr}, 'DD/MM/YYYY')"
+            elif tipo == VALOR:
+                expr = _SQL_MOEDA.format(expr=expr)
+            params[nome] = padrao_contem(valor)
+            condicoes.append(f"{expr} ILIKE %({nome})s")
+
+        if not condicoes:
+            return "TRUE", {}
+        return " AND ".join(condicoes), params
@@ -1,20 +1,121 @@
 from datetime import datetime
 from database.connection import DatabaseConnection
+from database.consultas import registrar_consulta
 from dtos.lancamento_dto import NotaFiscalDTO, ItemNotaDTO
 from typing import List, Optional
 
+# Consultas disparadas a cada digitação/validação: preparadas uma vez por conexão
+registrar_consulta(
+    "lanc_cliente_nome",
+    "SELECT cliente FROM clientes WHERE cnpj = $1",
+    ("text",)
+)
+registrar_consulta(
+    "lanc_existe_produto",
+    "SELECT 1 FROM itens WHERE codigo_item = $1",
+    ("text",)
+)
+
 class LancamentoModel:
+    # O código de análise tem 6 dígitos por mês (A26-000001 .. A26-999999)
+    MAXIMO_SEQUENCIAL = 999999
+
+    # Reserva atômica de N códigos do mês: devolve o último número reservado.
+    # O UPDATE trava a linha do contador até o commit, então duas estações
+    # salvando ao mesmo tempo recebem faixas diferentes.
+    SQL_RESERVAR_CODIGOS = """
+        INSERT INTO sequencias_analise (ano, mes, ultimo) VALUES (%s, %s, %s)
+        ON CONFLICT (ano, mes) DO UPDATE SET ultimo = sequencias_analise.ultimo + EXCLUDED.ultimo
+        RETURNING ultimo
+    """
+
+    # Insere todas as unidades de todas as linhas da nota em um único comando:
+    # unnest() abre as linhas (na ordem da tela), generate_series() expande a
+    # quantidade e row_number() numera os códigos a partir do início da faixa reservada.
+    SQL_INSERIR_ITENS = """
+        INSERT INTO itens_notas
+        (id_nota_fiscal, codigo_item, valor_item, ressarcimento, codigo_analise, status, data_recebimento)
+        SELECT %(id_nota)s, l.codigo, l.valor, l.ressarcimento,
+               %(prefixo)s || lpad((%(primeiro)s + row_number() OVER (ORDER BY l.ordem, u.unidade) - 1)::text, 6, '0'),
+               'Pendente',
+               %(data_recebimento)s::date
+        FROM unnest(%(codigos)s::text[], %(quantidades)s::int[], %(valores)s::numeric[], %(ressarcimentos)s::numeric[])
+             WITH ORDINALITY AS l(codigo, quantidade, valor, ressarcimento, ordem)
+        CROSS JOIN LATERAL generate_series(1, l.quantidade) AS u(unidade)
+        ORDER BY l.ordem, u.unidade
+    """
+
     def __init__(self):
         self.db = DatabaseConnection()
 
+    @staticmethod
+    def prefixo_codigo_analise(ano: int, mes: int) -> str:
+        """Letra do mês (A = Jan, B = Fev...) + ano com 2 dígitos. Ex: A26-"""
+        return f"{chr(ord('A') + mes - 1)}{ano % 100:02d}-"
+
+    @classmethod
+    def formatar_codigo_analise(cls, ano: int, mes: int, sequencial: int) -> str:
+        """Prefixo do mês + sequencial de 6 dígitos. Ex: A26-000052"""
+        return f"{cls.prefixo_codigo_analise(ano, mes)}{sequencial:06d}"
+
+    @classmethod
+    def reservar_faixa_analise(cls, cursor, ano: int, mes: int, quantidade: int):
+        """
+        Reserva `quantidade` sequenciais consecutivos de (ano, mês) em uma única ida ao banco,
+        dentro da transação do cursor (um rollback devolve a faixa). Retorna (primeiro, ultimo).
+        Falha se a faixa passar de MAXIMO_SEQUENCIAL (o código perderia dígitos e repetiria).
+        """
+        cursor.execute(cls.SQL_RESERVAR_CODIGOS, (ano, mes, quantidade))
+        ultimo = cursor.fetchone()[0]
+        if ultimo > cls.MAXIMO_SEQUENCIAL:
+            raise ValueError(
+                f"Erro: Os códigos de análise de {mes:02d}/{ano} se esgotaram "
+                f"(limite de {cls.MAXIMO_SEQUENCIAL} por mês; a reserva chegaria a {ultimo})."
+            )
+        return ultimo - quantidade + 1, ultimo
+
+    @classmethod
+    def reservar_codigos_analise(cls, cursor, ano: int, mes: int, quantidade: int) -> List[str]:
+        """Como reservar_faixa_analise, mas já devolve os códigos formatados."""
+        if quantidade <= 0:
+            return []
+        primeiro, ultimo = cls.reservar_faixa_analise(cursor, ano, mes, quantidade)
+        return [cls.formatar_codigo_analise(ano, mes, seq) for seq in range(primeiro, ultimo + 1)]
+
+    @classmethod
+    def inserir_itens(cls, cursor, id_nota: int, itens: List[ItemNotaDTO], data_lancamento,
+                      data_recebimento) -> int:
+        """
+        Grava uma linha em itens_notas por unidade física, com códigos de análise
+        em sequência, usando um número constante de comandos (reserva + INSERT).
+        `data_recebimento` é a da nota (obrigatória: é a chave do particionamento).
+        Retorna a quantidade de unidades inseridas.
+        """
+        total_unidades = sum(item.quantidade for item in itens)
+        if total_unidades <= 0:
+            return 0
+
+        primeiro, _ = cls.reservar_faixa_analise(
+            cursor, data_lancamento.year, data_lancamento.month, total_unidades
+        )
+        cursor.execute(cls.SQL_INSERIR_ITENS, {
+            'id_nota': id_nota,
+            'prefixo': cls.prefixo_codigo_analise(data_lancamento.year, data_lancamento.month),
+            'primeiro': primeiro,
+            'codigos': [item.codigo for item in itens],
+            'quantidades': [item.quantidade for item in itens],
+            'valores': [item.valor for item in itens],
+            'ressarcimentos': [item.ressarcimento for item in itens],
+            'data_recebimento': data_recebimento,
+        })
+        return cursor.rowcount
+
     def buscar_cliente_nome(self, cnpj: str) -> Optional[str]:
-        query = "SELECT cliente FROM clientes WHERE cnpj = %s"
-        result = self.db.execute_query(query, (cnpj,), fetch=True)
+        result = self.db.executar_preparada("lanc_cliente_nome", (cnpj,))
         return result[0]['cliente'] if result else None
 
     def existe_produto(self, codigo: str) -> bool:
-        query = "SELECT codigo_item FROM itens WHERE codigo_item = %s"
-        result = self.db.execute_query(query, (codigo,), fetch=True)
+        result = self.db.executar_preparada("lanc_existe_produto", (codigo,))
         return True if result else False
 
     def salvar_entrada_completa(self, nota: NotaFiscalDTO, itens: List[ItemNotaDTO]):
@@ -41,30 +142,8 @@ class LancamentoModel:
                 ))
                 id_nota = cursor.fetchone()[0]
 
-                # 2. Gerar Sequencial de Análise (A = Jan, B = Fev...)
-                data_atual = datetime.now()
-                letra_mes = chr(ord('A') + data_atual.month - 1) 
-
-                sql_seq = "SELECT MAX(codigo_analise) FROM itens_notas WHERE codigo_analise LIKE %s"
-                cursor.execute(sql_seq, (f"{letra_mes}%",))
-                resultado = cursor.fetchone()
-                ultimo_codigo = resultado[0] if resultado else None
-                
-                sequencial_atual = int(ultimo_codigo[1:]) + 1 if ultimo_codigo else 1
-
-                # 3. Inserir Itens
-                sql_item = """
-                    INSERT INTO itens_notas
-                    (id_nota_fiscal, codigo_item, valor_item, ressarcimento, codigo_analise, status)
-                    VALUES (%s, %s, %s, %s, %s, 'Pendente')
-                """
-                
-                for item in itens:
-                    for _ in range(item.quantidade):
-                        cod_analise = f"{letra_mes}{sequencial_atual:04d}"
-                        cursor.execute(sql_item, (
-                            id_nota, item.codigo, item.valor, item.ressarcimento, cod_analise
-                        ))
-                        sequencial_atual += 1
+                # 2. Inserir Itens (uma linha por unidade, códigos reservados em faixa)
+                self.inserir_itens(cursor, id_nota, itens, data_lancamento_sistema, nota.recebimento)
             
-            conn.commit()
\ No newline at end of file
+            conn.commit()
+        self.db.marcar_escrita()
\ No newline at end of file
@@ -0,0 +1,120 @@
+import functools
+
+
+class PaginacaoPorChave:
+    """
+    Paginação por chave (keyset) sobre uma ordenação fixa.
+
+    Em vez de OFFSET, cada página começa depois da chave da última linha da
+    anterior, então o custo de buscar uma página não depende de quantas linhas
+    vêm antes dela nem do tamanho da tabela (com um índice na mesma ordem).
+
+    colunas: lista de (expressão SQL, atributo do DTO, descendente). A última
+    coluna precisa ser única (ex: id) para não haver empates entre páginas.
+    Expressões de texto devem vir com COALESCE(..., ''): o DTO guarda '' no lugar
+    de NULL e a chave tem que bater com o que foi ordenado. Nulos restantes (datas)
+    seguem o padrão do PostgreSQL: primeiro em ordem descendente, por último na ascendente.
+    """
+
+    def __init__(self, colunas):
+        self.colunas = colunas
+
+    def order_by(self) -> str:
+        return ", ".join(f"{expr} {'DESC' if desc else 'ASC'}" for expr, _, desc in self.colunas)
+
+    def chave(self, dto) -> tuple:
+        return tuple(getattr(dto, atributo) for _, atributo, _ in self.colunas)
+
+    def condicao(self, apos) -> tuple:
+        """
+        (sql, params) que seleciona as linhas depois da chave `apos`, ou ('TRUE', {})
+        para a primeira página. Os parâmetros são nomeados (%(chave_N)s).
+        """
+        if apos is None:
+            return "TRUE", {}
+
+        params = {}
+        iguais = []
+        alternativas = []
+        for i, ((expr, _, desc), valor) in enumerate(zip(self.colunas, apos)):
+            nome = f"chave_{i}"
+            if valor is None:
+                # Nulos vêm antes de tudo na descendente e depois de tudo na ascendente
+                depois = f"{expr} IS NOT NULL" if desc else None
+                igual = f"{expr} IS NULL"
+            else:
+                params[nome] = valor
+                if desc:
+                    depois = f"{expr} < %({nome})s"
+                else:
+                    depois = f"({expr} > %({nome})s OR {expr} IS NULL)"
+                igual = f"{expr} = %({nome})s"
+            if depois:
+                alternativas.append(" AND ".join(iguais + [depois]))
+            iguais.append(igual)
+
+        sql = "(" + " OR ".join(f"({a})" for a in alternativas) + ")" if alternativas else "FALSE"
+
+        # Limite redundante na primeira coluna: deixa o índice começar na chave em vez do início
+        expr, _, desc = self.colunas[0]
+        if apos[0] is not None:
+            limite = f"{expr} <= %(chave_0)s" if desc else f"({expr} >= %(chave_0)s OR {expr} IS NULL)"
+            sql = f"{limite} AND {sql}"
+        return sql, params
+
+    def comparar(self, a, b) -> int:
+        """Compara duas chaves na ordem da consulta (-1, 0 ou 1)."""
+        for (_, _, desc), x, y in zip(self.colunas, a, b):
+            if x == y:
+                continue
+            # Nulos: primeiro na descendente, por último na ascendente (padrão do PostgreSQL)
+            if x is None:
+                return -1 if desc else 1
+            if y is None:
+                return 1 if desc else -1
+            if desc:
+                return 1 if x < y else -1
+            return -1 if x < y else 1
+        return 0
+
+    def mesclar(self, paginas, chaves, tem_mais, ids, atuais, id_de) -> tuple:
+        """
+        Aplica alterações de linhas às páginas já carregadas, sem refazer a consulta.
+
+        paginas: {página: DTOs em ordem}, alterado no lugar. chaves e tem_mais são os
+        da paginação (chave da última linha de cada página / se existe a seguinte).
+        ids: ids alterados; atuais: DTOs atuais desses ids que ainda entram na consulta.
+        id_de: função DTO -> id.
+
+        As linhas alteradas saem de onde estavam e entram na página carregada cujo
+        intervalo contém a chave atual. Os limites entre páginas (chaves) não mudam,
+        então uma página pode ficar com mais ou menos linhas até a próxima recarga;
+        linha que cai em página não carregada aparece quando ela for buscada.
+        Texto é comparado pela ordem do Python, que pode diferir da collation do banco
+        em casos raros (ex: acentos); a posição se corrige na próxima recarga.
+        Retorna (páginas alteradas, linhas que entraram menos as que saíram).
+        """
+        alteradas = set()
+        saldo = 0
+        for pagina, dtos in paginas.items():
+            restantes = [dto for dto in dtos if id_de(dto) not in ids]
+            if len(restantes) != len(dtos):
+                paginas[pagina] = restantes
+                alteradas.add(pagina)
+                saldo -= len(dtos) - len(restantes)
+
+        ordem = functools.cmp_to_key(self.comparar)
+        for dto in atuais:
+            chave = ordem(self.chave(dto))
+            for pagina, dtos in paginas.items():
+                depois_da_anterior = pagina == 1 or (
+                    pagina - 1 in chaves and ordem(chaves[pagina - 1]) < chave)
+                ate_o_fim = not tem_mais.get(pagina) or (
+                    pagina in chaves and not ordem(chaves[pagina]) < chave)
+                if depois_da_anterior and ate_o_fim:
+                    posicao = sum(1 for atual in dtos if not chave < ordem(self.chave(atual)))
+                    dtos.insert(posicao, dto)
+                    alteradas.add(pagina)
+                    saldo += 1
+                    break
+        return alteradas, saldo
@@ -1,48 +1,179 @@
 import pandas as pd
-from database.connection import DatabaseConnection
+from database.connection import DatabaseConnection, MapeadorLinhas, TAMANHO_LOTE_PADRAO
 from dtos.relatorio_dto import RelatorioItemDTO
+from models.filtros import CompiladorFiltros, DATA, TEXTO, VALOR
+from models.paginacao import PaginacaoPorChave
 
 class RelatorioModel:
+    # Tuplas do cursor -> RelatorioItemDTO (função compilada por conjunto de colunas)
+    MAPEADOR = MapeadorLinhas(RelatorioItemDTO)
+
+    # Ordem do relatório, com o id do item desempatando (paginação por chave).
+    # Índice correspondente: idx_fato_itens_pagina (migração 0012_paginacao_relatorio).
+    ORDEM = PaginacaoPorChave([
+        ("f.data_lancamento", "data_lancamento", True),
+        ("COALESCE(f.nf_entrada, '')", "nf_entrada", True),
+        ("COALESCE(f.codigo_analise, '')", "codigo_analise", False),
+        ("f.id_item", "id_item", False),
+    ])
+
+    # Lê o esquema estrela (migração 0008_relatorio_estrela): fato por item com os
+    # retornos já consolidados + dimensões, em vez do join das tabelas operacionais.
+    # Itens arquivados (migração 0011_arquivo) só entram na leitura histórica.
+    SQL_BASE = """
+        SELECT 
+            f.id_item,
+            f.status, 
+            f.codigo_analise, 
+            f.data_lancamento,
+            f.data_recebimento,
+            f.data_analise,
+            c.cnpj,
+            c.cliente as nome_cliente,
+            c.grupo as grupo_cliente,
+            c.cidade, c.estado, c.regiao,
+            f.cnpj_remetente,
+            cr.cliente as nome_remetente,
+            f.data_emissao,
+            f.nf_entrada,
+            f.codigo_item, i.grupo_item, f.numero_serie,
+            f.codigo_avaria, a.descricao_avaria,
+            f.valor_item, f.ressarcimento,
+            f.nf_retorno,
+            f.tipo_retorno,
+            f.data_retorno
+
+        FROM fato_itens f
+        LEFT JOIN dim_cliente c ON f.cnpj_cliente = c.cnpj
+        LEFT JOIN dim_cliente cr ON f.cnpj_remetente = cr.cnpj
+        LEFT JOIN dim_item i ON f.codigo_item = i.codigo_item
+        LEFT JOIN dim_avaria a ON f.codigo_avaria = a.codigo_avaria
+        WHERE {filtro}
+        ORDER BY {ordem}
+    """
+    FILTRO_ATIVOS = "NOT f.arquivado"
+    SQL_RELATORIO = SQL_BASE.format(filtro=FILTRO_ATIVOS, ordem=ORDEM.order_by())
+
+    # Filtros da tela (campo do DTO -> coluna). Texto usa os índices trigram e datas os
+    # índices comuns de fato_itens (migração 0013_filtros_relatorio).
+    FILTROS = CompiladorFiltros({
+        "data_lancamento": ("f.data_lancamento", DATA),
+        "data_recebimento": ("f.data_recebimento", DATA),
+        "data_analise": ("f.data_analise", DATA),
+        "status": ("f.status", TEXTO),
+        "codigo_analise": ("f.codigo_analise", TEXTO),
+        "cnpj_remetente": ("f.cnpj_remetente", TEXTO),
+        "nome_remetente": ("cr.cliente", TEXTO),
+        "cnpj": ("f.cnpj_cliente", TEXTO),
+        "nome_cliente": ("c.cliente", TEXTO),
+        "grupo_cliente": ("c.grupo", TEXTO),
+        "cidade": ("c.cidade", TEXTO),
+        "estado": ("c.estado", TEXTO),
+        "regiao": ("c.regiao", TEXTO),
+        "data_emissao": ("f.data_emissao", DATA),
+        "nf_entrada": ("f.nf_entrada", TEXTO),
+        "codigo_item": ("f.codigo_item", TEXTO),
+        "grupo_item": ("i.grupo_item", TEXTO),
+        "numero_serie": ("f.numero_serie", TEXTO),
+        "codigo_avaria": ("f.codigo_avaria", TEXTO),
+        "descricao_avaria": ("a.descricao_avaria", TEXTO),
+        "valor_item": ("f.valor_item", VALOR),
+        "ressarcimento": ("f.ressarcimento", VALOR),
+        "data_retorno": ("f.data_retorno", DATA),
+        "nf_retorno": ("f.nf_retorno", TEXTO),
+        "tipo_retorno": ("f.tipo_retorno", TEXTO),
+    })
+
+    # Até aqui o total filtrado é contado de verdade; acima, fica a estimativa do planejador
+    LIMITE_CONTAGEM = 5000
+
+    # Maior data já arquivada em cada coluna de data do Relatório
+    SQL_LIMITES_ARQUIVO = """
+        SELECT MAX(ate_lancamento) as lancamento,
+               MAX(ate_recebimento) as recebimento,
+               MAX(ate_analise) as analise,
+               MAX(ate_emissao) as emissao,
+               MAX(ate_retorno) as retorno
+        FROM arquivo_execucoes
+    """
+
     def __init__(self):
         self.db = DatabaseConnection()
 
     def get_dados_relatorio(self):
-        # (Mantém a sua query SQL original igualzinha estava antes)
-        sql = """
-            SELECT 
-                l.status, 
-                l.codigo_analise, 
-                to_char(n.data_lancamento, 'DD/MM/YYYY') as data_lancamento,
-                to_char(n.data_recebimento, 'DD/MM/YYYY') as data_recebimento,
-                to_char(l.data_analise, 'DD/MM/YYYY') as data_analise,
-                c.cnpj,
-                c.cliente as nome_cliente,
-                c.grupo as grupo_cliente,
-                c.cidade, c.estado, c.regiao,
-                n.cnpj_remetente,
-                cr.cliente as nome_remetente,
-                to_char(n.data_nota, 'DD/MM/YYYY') as data_emissao,
-                n.numero_nota as nf_entrada,
-                l.codigo_item, i.grupo_item, l.numero_serie,
-                l.codigo_avaria, a.descricao_avaria,
-                l.valor_item, l.ressarcimento,
-                nr.numero_nota as nf_retorno,
-                nr.tipo_retorno,
-                to_char(nr.data_emissao, 'DD/MM/YYYY') as data_retorno
-
-            FROM itens_notas l
-            JOIN notas_fiscais n ON l.id_nota_fiscal = n.id
-            LEFT JOIN clientes c ON n.cnpj_cliente = c.cnpj
-            LEFT JOIN clientes cr ON n.cnpj_remetente = cr.cnpj
-            LEFT JOIN itens i ON l.codigo_item = i.codigo_item
-            LEFT JOIN avarias a ON l.codigo_avaria = a.codigo_avaria
-            LEFT JOIN conciliacao conc ON l.id = conc.id_item_entrada
-            LEFT JOIN notas_retorno nr ON conc.id_nota_retorno = nr.id
-            
-            ORDER BY n.data_lancamento DESC, n.numero_nota DESC, l.codigo_analise ASC
+        return [dto for lote in self.iter_dados_relatorio() for dto in lote]
+
+    def _montar_sql(self, incluir_arquivo=False, filtros=None, apos=None, ids=None) -> tuple:
+        """
+        SELECT ordenado (sql, params) com arquivo, filtros da tela e chave de paginação.
+        ids: restringe a esses itens (alterações avisadas pelo feed).
+        """
+        condicao_filtros, params = self.FILTROS.compilar(filtros)
+        condicao_chave, params_chave = self.ORDEM.condicao(apos)
+        params.update(params_chave)
+        arquivo = "TRUE" if incluir_arquivo else self.FILTRO_ATIVOS
+        filtro = f"{arquivo} AND {condicao_filtros} AND {condicao_chave}"
+        if ids is not None:
+            filtro += " AND f.id_item = ANY(%(ids)s)"
+            params["ids"] = list(ids)
+        sql = self.SQL_BASE.format(filtro=filtro, ordem=self.ORDEM.order_by())
+        return sql, params
+
+    def iter_dados_relatorio(self, tamanho_lote=TAMANHO_LOTE_PADRAO, incluir_arquivo=False, filtros=None):
+        """
+        Gera os DTOs do relatório em lotes (cursor server-side), permitindo
+        renderizar/exportar antes de a última linha chegar.
+        incluir_arquivo: traz também os itens já movidos para o arquivo.
+        filtros: {campo: texto | (inicio, fim) | None}, ver CompiladorFiltros.
+        """
+        sql, params = self._montar_sql(incluir_arquivo, filtros)
+        nome = "relatorio.dados_historico" if incluir_arquivo else "relatorio.dados"
+        yield from self.db.stream_query(sql, params or None, tamanho_lote=tamanho_lote,
+                                        mapeador=self.MAPEADOR, nome=nome)
+
+    def get_pagina(self, apos=None, tamanho=50, incluir_arquivo=False, filtros=None):
+        """
+        Uma página do relatório a partir da chave `apos` (None = primeira página).
+        Retorna (dtos, tem_mais). A chave da próxima página é ORDEM.chave(dtos[-1]).
+        """
+        sql, params = self._montar_sql(incluir_arquivo, filtros, apos)
+        # Uma linha a mais só para saber se existe próxima página
+        params["limite"] = tamanho + 1
+        dtos = self.db.execute_query(sql + " LIMIT %(limite)s", params, fetch=True,
+                                     mapeador=self.MAPEADOR, nome="relatorio.pagina")
+        return dtos[:tamanho], len(dtos) > tamanho
+
+    def get_itens(self, ids, incluir_arquivo=False, filtros=None):
+        """DTOs atuais dos itens `ids` que ainda entram na consulta da tela (mesmos filtros)."""
+        sql, params = self._montar_sql(incluir_arquivo, filtros, ids=ids)
+        return self.db.execute_query(sql, params, fetch=True, mapeador=self.MAPEADOR, nome="relatorio.itens")
+
+    def estimar_total(self, incluir_arquivo=False, filtros=None) -> tuple:
+        """
+        Total de linhas sem contar a tabela inteira: (total, exato).
+        Resultados pequenos (até LIMITE_CONTAGEM) são contados; os demais ficam
+        com a estimativa do planejador.
+        """
+        sql, params = self._montar_sql(incluir_arquivo, filtros)
+        estimativa = self.db.estimar_linhas(sql, params or None, nome="relatorio.estimativa")
+        if estimativa > self.LIMITE_CONTAGEM:
+            return estimativa, False
+
+        params["limite_contagem"] = self.LIMITE_CONTAGEM + 1
+        res = self.db.execute_query(f"SELECT COUNT(*) AS total FROM ({sql} LIMIT %(limite_contagem)s) x",
+                                    params, fetch=True, nome="relatorio.contagem")
+        total = res[0]["total"]
+        if total > self.LIMITE_CONTAGEM:
+            return max(estimativa, total), False
+        return total, True
+
+    def get_limites_arquivo(self) -> dict:
+        """
+        Datas até onde há itens arquivados, por coluna ('lancamento', 'recebimento',
+        'analise', 'emissao', 'retorno'). Valores None quando nada foi arquivado.
         """
-        dados_brutos = self.db.execute_query(sql, fetch=True)
-        return [RelatorioItemDTO.from_dict(d) for d in dados_brutos]
+        res = self.db.execute_query(self.SQL_LIMITES_ARQUIVO, fetch=True, nome="relatorio.limites_arquivo")
+        return dict(res[0]) if res else {}
 
     # --- NOVO MÉTODO DE EXPORTAÇÃO ---
     def gerar_excel_da_lista(self, caminho, dados_lista, colunas_lista):
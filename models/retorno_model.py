@@ -1,115 +1,198 @@
+import psycopg2
+
 from database import DatabaseConnection
+from database.cancelamento import ConsultaCancelada, TempoConsultaEsgotado
+from database.connection import MapeadorLinhas
 from dtos.retorno_dto import ItemPendenteDTO, RetornoHeaderDTO
 
 class RetornoModel:
+    MAPEADOR_PENDENTES = MapeadorLinhas(ItemPendenteDTO)
+
+    # Abatimento em massa: um UPDATE para todos os itens do retorno, guiado pelos arrays
+    # (id, valor). Itens cujo saldo ficaria negativo não são atualizados nem devolvidos
+    # pelo RETURNING, o que permite recusar o retorno inteiro na mesma transação.
+    SQL_ABATER_SALDOS = """
+        UPDATE itens_notas i
+        SET saldo_financeiro = i.saldo_financeiro - v.valor
+        FROM unnest(%(ids)s::int[], %(valores)s::numeric[]) AS v(id, valor)
+        WHERE i.id = v.id
+          AND i.saldo_financeiro - v.valor >= 0
+        RETURNING i.id, i.data_recebimento
+    """
+
+    # Trava os itens do retorno antes de abater. A ordem por id faz duas estações
+    # disputando os mesmos itens esperarem uma pela outra em vez de entrarem em deadlock;
+    # quem chega depois lê o saldo já abatido pela primeira e é recusado na conferência.
+    SQL_TRAVAR_SALDOS = """
+        SELECT id, saldo_financeiro
+        FROM itens_notas
+        WHERE id = ANY(%s::int[])
+        ORDER BY id
+        FOR UPDATE
+    """
+
+    # Tempo máximo esperando outra estação liberar os itens
+    ESPERA_TRAVA = '5s'
+
+    SQL_INSERIR_CONCILIACAO = """
+        INSERT INTO conciliacao (id_nota_retorno, id_item_entrada, valor_abatido, data_recebimento_item)
+        SELECT %(id_retorno)s, v.id, v.valor, v.data_recebimento
+        FROM unnest(%(ids)s::int[], %(valores)s::numeric[], %(datas)s::date[]) AS v(id, valor, data_recebimento)
+    """
+
     def __init__(self):
         self.db = DatabaseConnection()
 
-    def buscar_itens_pendentes(self, filtro_valor, tipo_filtro, lista_notas=None) -> list[ItemPendenteDTO]:
+    def montar_consulta_busca(self, filtro_valor, tipo_filtro, lista_notas=None, ids=None):
+            """
+            Monta a query (e os parâmetros) da busca de itens com saldo em aberto.
+            O filtro de saldo casa com o índice parcial idx_itens_notas_saldo_aberto.
+            ids: restringe a esses itens (alterações avisadas pelo feed).
+            """
             query = """
                 SELECT 
-                    i.id, nf.numero_nota, nf.data_nota, 
-                    i.codigo_item, i.valor_item, i.saldo_financeiro,
+                    -- Aliases = campos do ItemPendenteDTO (mapeamento posicional direto)
+                    i.id, nf.numero_nota as numero_nota_origem, nf.data_nota as data_nota_origem, 
+                    i.codigo_item, '' as descricao_item,
+                    i.valor_item as valor_original, i.saldo_financeiro,
                     COALESCE(c.cliente, 'CLIENTE SEM CADASTRO') as nome_cliente, 
-                    COALESCE(c.grupo, '-') as grupo,
+                    COALESCE(c.grupo, '-') as grupo_economico,
                     i.codigo_analise  
                 FROM itens_notas i
                 JOIN notas_fiscais nf ON i.id_nota_fiscal = nf.id
-                -- JOIN ESTREITO: Liga o cliente apenas por uma coluna para não duplicar linhas
-                LEFT JOIN clientes c ON REGEXP_REPLACE(COALESCE(c.cnpj, ''), '[^0-9]', '', 'g') = REGEXP_REPLACE(COALESCE(nf.cnpj_cliente, ''), '[^0-9]', '', 'g')
-                WHERE COALESCE(i.saldo_financeiro, 0) > 0 
+                -- JOIN ESTREITO: Liga o cliente apenas pela chave normalizada (indexada) para não duplicar linhas
+                LEFT JOIN clientes c ON c.cnpj_digitos = nf.cnpj_cliente_digitos
+                WHERE i.saldo_financeiro > 0 
                 AND i.status IN ('Pendente', 'Procedente', 'Improcedente')
             """
             params = []
 
             if tipo_filtro == 'CNPJ':
                 # Busca o CNPJ independentemente de onde a importação o salvou
+                cnpj_digitos = ''.join(filter(str.isdigit, filtro_valor or ''))
                 query += """ AND (
-                    REGEXP_REPLACE(COALESCE(nf.cnpj_remetente, ''), '[^0-9]', '', 'g') = %s 
-                    OR REGEXP_REPLACE(COALESCE(nf.cnpj_cliente, ''), '[^0-9]', '', 'g') = %s
+                    nf.cnpj_remetente_digitos = %s 
+                    OR nf.cnpj_cliente_digitos = %s
                 )"""
-                params.extend([filtro_valor, filtro_valor])
+                params.extend([cnpj_digitos, cnpj_digitos])
                 
                 if lista_notas and len(lista_notas) > 0:
-                    # Trata notas com zero ('001') e sem zero ('1')
-                    notas_limpas = [n.lstrip('0') for n in lista_notas]
-                    notas_limpas = [n if n else '0' for n in notas_limpas]
-                    placeholders = ', '.join(['%s'] * len(notas_limpas))
-                    
-                    query += f""" AND (
-                        nf.numero_nota IN ({placeholders}) 
-                        OR LTRIM(COALESCE(nf.numero_nota, ''), '0') IN ({placeholders})
-                    )"""
-                    params.extend(lista_notas)
-                    params.extend(notas_limpas)
+                    # Trata notas com zero ('001') e sem zero ('1') pela mesma regra da coluna numero_nota_norm
+                    notas_norm = [n.lstrip('0') or '0' for n in lista_notas]
+                    query += " AND nf.numero_nota_norm = ANY(%s)"
+                    params.append(notas_norm)
             
             elif tipo_filtro == 'GRUPO':
+                # Índice de trigramas (idx_clientes_grupo_trgm) atende o ILIKE com curinga
                 query += " AND c.grupo ILIKE %s"
                 params.append(f"%{filtro_valor}%")
 
+            if ids is not None:
+                query += " AND i.id = ANY(%s)"
+                params.append(list(ids))
+
             query += " ORDER BY nf.data_nota ASC"
+            return query, params
+
+    def buscar_itens_pendentes(self, filtro_valor, tipo_filtro, lista_notas=None, ids=None) -> list[ItemPendenteDTO]:
+            query, params = self.montar_consulta_busca(filtro_valor, tipo_filtro, lista_notas, ids)
 
             try:
-                resultados = self.db.execute_query(query, params, fetch=True)
-                
-                lista_dto = []
-                for r in resultados:
-                    cod_analise_db = r['codigo_analise'] if r['codigo_analise'] else ""
-                    
-                    lista_dto.append(ItemPendenteDTO(
-                        id=r['id'],
-                        numero_nota_origem=r['numero_nota'],
-                        data_nota_origem=r['data_nota'],
-                        codigo_item=r['codigo_item'],
-                        descricao_item="", 
-                        valor_original=float(r['valor_item']),
-                        saldo_financeiro=float(r['saldo_financeiro']),
-                        nome_cliente=r['nome_cliente'],
-                        grupo_economico=r['grupo'],
-                        codigo_analise=cod_analise_db 
-                    ))
-                return lista_dto
+                return self.db.execute_query(query, params, fetch=True, mapeador=self.MAPEADOR_PENDENTES,
+                                             nome=f"retorno.busca_{tipo_filtro.lower()}")
+            except (ConsultaCancelada, TempoConsultaEsgotado):
+                # A tela precisa saber que a busca não terminou (lista vazia diria "sem pendências")
+                raise
             except Exception as e:
                 print(f"Erro ao buscar no banco: {e}")
                 return []
                         
+    @staticmethod
+    def _listar_itens(itens, limite=10) -> str:
+        lista = ", ".join(f"{i.codigo_item} (NF {i.numero_nota_origem})" for i in itens[:limite])
+        if len(itens) > limite:
+            lista += f" e mais {len(itens) - limite}"
+        return lista
+
+    def conferir_saldos(self, cursor, itens: list[ItemPendenteDTO]) -> list[ItemPendenteDTO]:
+        """
+        Trava as linhas dos itens (até o fim da transação) e devolve os que mudaram
+        desde a busca: saldo diferente do carregado na tela ou item que não existe mais.
+        """
+        cursor.execute(self.SQL_TRAVAR_SALDOS, ([item.id for item in itens],))
+        atuais = {id_item: saldo for id_item, saldo in cursor.fetchall()}
+        alterados = []
+        for item in itens:
+            saldo = atuais.get(item.id)
+            if saldo is None or saldo != item.saldo_financeiro:
+                alterados.append(item)
+        return alterados
+
     def salvar_retorno(self, header: RetornoHeaderDTO, itens: list[ItemPendenteDTO]):
+        """
+        Grava a nota de retorno com um número fixo de comandos, qualquer que seja a
+        quantidade de itens: trava + conferência, cabeçalho, UPDATE dos saldos e
+        INSERT da conciliação.
+        Se outra estação mexeu em algum saldo desde a busca, ou se algum saldo
+        fosse ficar negativo, nada é gravado (rollback) e os itens são listados.
+        """
+        ids = [item.id for item in itens]
+        valores = [item.valor_a_abater for item in itens]
+        if len(set(ids)) != len(ids):
+            return False, "Há itens repetidos na seleção."
+
         conn_manager = self.db.get_connection()
         with conn_manager as conn:
             try:
-                cursor = conn.cursor()
-                
-                sql_head = """
-                    INSERT INTO notas_retorno 
-                    (numero_nota, data_emissao, tipo_retorno, cnpj_emitente, cnpj_remetente, grupo_economico, valor_total_nota)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s) RETURNING id
-                """
-                
-                cursor.execute(sql_head, (
-                    header.numero_nota, 
-                    header.data_emissao, 
-                    header.tipo_retorno,
-                    header.cnpj_emitente,
-                    header.cnpj_remetente,
-                    header.grupo, 
-                    header.valor_total
-                ))
-                id_retorno = cursor.fetchone()[0]
-
-                for item in itens:
-                    # Atualiza o saldo
-                    sql_upd = "UPDATE itens_notas SET saldo_financeiro = saldo_financeiro - %s WHERE id = %s"
-                    cursor.execute(sql_upd, (item.valor_a_abater, item.id))
-
-                    # CORRIGIDO: Removido 'codigo_analise' pois não existe na tabela 'conciliacao'
-                    sql_con = """
-                        INSERT INTO conciliacao (id_nota_retorno, id_item_entrada, valor_abatido) 
-                        VALUES (%s, %s, %s)
+                with conn.cursor() as cursor:
+                    # Parâmetro ligado; is_local=true equivale ao SET LOCAL (só esta transação)
+                    cursor.execute("SELECT set_config('lock_timeout', %s, true)", (self.ESPERA_TRAVA,))
+
+                    alterados = self.conferir_saldos(cursor, itens)
+                    if alterados:
+                        conn.rollback()
+                        return False, (
+                            f"{len(alterados)} item(ns) foram alterados por outra estação desde a busca: "
+                            f"{self._listar_itens(alterados)}. Refaça a busca para carregar os saldos atuais."
+                        )
+
+                    sql_head = """
+                        INSERT INTO notas_retorno 
+                        (numero_nota, data_emissao, tipo_retorno, cnpj_emitente, cnpj_remetente, grupo_economico, valor_total_nota)
+                        VALUES (%s, %s, %s, %s, %s, %s, %s) RETURNING id
                     """
-                    cursor.execute(sql_con, (id_retorno, item.id, item.valor_a_abater))
-                
-                conn.commit()
-                return True, "Nota de Retorno gravada com sucesso!"
+
+                    cursor.execute(sql_head, (
+                        header.numero_nota, 
+                        header.data_emissao, 
+                        header.tipo_retorno,
+                        header.cnpj_emitente,
+                        header.cnpj_remetente,
+                        header.grupo, 
+                        header.valor_total
+                    ))
+                    id_retorno = cursor.fetchone()[0]
+
+                    # Abate todos os saldos de uma vez; a trava de saldo negativo fica no WHERE
+                    cursor.execute(self.SQL_ABATER_SALDOS, {'ids': ids, 'valores': valores})
+                    # id -> data de recebimento do item (chave composta da conciliação)
+                    abatidos = dict(cursor.fetchall())
+                    if len(abatidos) != len(ids):
+                        recusados = [item for item in itens if item.id not in abatidos]
+                        conn.rollback()
+                        return False, f"Saldo insuficiente para abater {len(recusados)} item(ns): {self._listar_itens(recusados)}"
+
+                    cursor.execute(self.SQL_INSERIR_CONCILIACAO, {
+                        'id_retorno': id_retorno, 'ids': ids, 'valores': valores,
+                        'datas': [abatidos[i] for i in ids]
+                    })
+
+                    conn.commit()
+                    self.db.marcar_escrita()
+                    return True, "Nota de Retorno gravada com sucesso!"
+            except psycopg2.errors.LockNotAvailable:
+                conn.rollback()
+                return False, "Os itens estão sendo gravados por outra estação. Aguarde alguns segundos e tente novamente."
             except Exception as e:
                 conn.rollback()
-                return False, f"Erro ao gravar no banco: {str(e)}"
\ No newline at end of file
+                return False, f"Erro ao gravar no banco: {str(e)}"
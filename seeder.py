@@ -2,6 +2,9 @@ import random
 from datetime import datetime, timedelta, date
 from collections import defaultdict
 from database.connection import DatabaseConnection
+from models.lancamento_model import LancamentoModel
+from models.dashboard_model import DashboardModel
+from models.fato_model import FatoModel
 
 class DatabaseSeeder:
     def __init__(self):
@@ -19,6 +22,23 @@ class DatabaseSeeder:
             "DROP TABLE IF EXISTS itens CASCADE;",
             "DROP TABLE IF EXISTS clientes CASCADE;",
             "DROP TABLE IF EXISTS avarias CASCADE;",
+            "DROP TABLE IF EXISTS sequencias_analise CASCADE;",
+            "DROP TABLE IF EXISTS kpi_entradas_mes CASCADE;",
+            "DROP TABLE IF EXISTS kpi_status_mes CASCADE;",
+            "DROP TABLE IF EXISTS kpi_retornos_mes CASCADE;",
+            "DROP TABLE IF EXISTS kpi_meses_pendentes CASCADE;",
+            "DROP TABLE IF EXISTS conciliacao_arquivo CASCADE;",
+            "DROP TABLE IF EXISTS itens_notas_arquivo CASCADE;",
+            "DROP TABLE IF EXISTS notas_fiscais_arquivo CASCADE;",
+            "DROP TABLE IF EXISTS arquivo_execucoes CASCADE;",
+            "DROP TABLE IF EXISTS fato_itens CASCADE;",
+            "DROP TABLE IF EXISTS dim_cliente CASCADE;",
+            "DROP TABLE IF EXISTS dim_item CASCADE;",
+            "DROP TABLE IF EXISTS dim_avaria CASCADE;",
+            "DROP TABLE IF EXISTS dim_calendario CASCADE;",
+            "DROP TABLE IF EXISTS etl_itens_alterados CASCADE;",
+            "DROP TABLE IF EXISTS etl_controle CASCADE;",
+            "DROP TABLE IF EXISTS schema_version CASCADE;",
         ]
         
         with self.db.get_connection() as conn:
@@ -30,7 +50,7 @@ class DatabaseSeeder:
                         print(f"Aviso ao dropar tabela: {e}")
                 conn.commit()
 
-        # Chama o setup do banco real (criação das tabelas)
+        # Chama o setup do banco real (reaplica todas as migrações)
         sucesso = self.db.setup_database()
         
         if sucesso:
@@ -127,7 +147,6 @@ class DatabaseSeeder:
 
         cnpj_minha_empresa = "00000000000100" 
         
-        contadores_mes = {m: 1 for m in range(1, 13)}
         total_notas = 0
         total_itens = 0
 
@@ -142,7 +161,6 @@ class DatabaseSeeder:
                 mes_fim = hoje.month
             
             for mes in range(mes_inicio, mes_fim + 1):
-                letra_mes = chr(ord('A') + mes - 1)
                 max_dia = 28
                 if ano == ano_final and mes == hoje.month:
                     max_dia = hoje.day
@@ -184,14 +202,17 @@ class DatabaseSeeder:
 
                             # Itens da Nota
                             qtd_itens = random.randint(3, 8) 
+
+                            # Códigos pelo mesmo gerador da aplicação (ano/mês do lançamento)
+                            codigos = iter(LancamentoModel.reservar_codigos_analise(
+                                cursor, data_lancamento.year, data_lancamento.month, qtd_itens
+                            ))
                             
                             for _ in range(qtd_itens):
                                 cod_prod = random.choice(lista_produtos)
                                 valor = round(random.uniform(100.00, 1500.00), 2)
                                 
-                                seq = contadores_mes[mes]
-                                cod_analise = f"{letra_mes}{seq:04d}"
-                                contadores_mes[mes] += 1
+                                cod_analise = next(codigos)
                                 
                                 rand_status = random.random()
                                 is_pendente = rand_status < 0.30 
@@ -227,8 +248,8 @@ class DatabaseSeeder:
                                         id_nota_fiscal, codigo_item, valor_item, ressarcimento, 
                                         status, codigo_analise, data_analise, numero_serie,
                                         codigo_avaria, descricao_avaria, procedente_improcedente,
-                                        produzido_revenda, fornecedor, saldo_financeiro
-                                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                                        produzido_revenda, fornecedor, saldo_financeiro, data_recebimento
+                                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
                                 """
                                 
                                 valores_item = (
@@ -238,7 +259,8 @@ class DatabaseSeeder:
                                     cod_avaria, desc_avaria, proc_improc,
                                     random.choice(['Produzido', 'Revenda']),
                                     "Fornecedor Padrão LTDA",
-                                    saldo_financeiro 
+                                    saldo_financeiro,
+                                    data_recebimento
                                 )
                                 cursor.execute(sql_item, valores_item)
                                 total_itens += 1
@@ -359,6 +381,16 @@ class DatabaseSeeder:
         print(f"   Total Notas Retorno: {total_notas_retorno}")
         print(f"   Itens Conciliados: {total_conciliados}")
 
+    def recalcular_kpis(self):
+        """Reconstrói os rollups do Dashboard de uma vez (mais barato que consumir a fila da carga)."""
+        meses = DashboardModel().recalcular_tudo()
+        print(f"✅ Indicadores do Dashboard recalculados ({meses} meses).")
+
+    def recarregar_fato(self):
+        """Carrega o esquema estrela do Relatório com os dados gerados."""
+        itens = FatoModel().recarregar()
+        print(f"✅ Base do Relatório carregada ({itens} itens).")
+
     def run(self):
         try:
             self.limpar_banco()
@@ -367,6 +399,8 @@ class DatabaseSeeder:
             self.seed_avarias()
             self.seed_movimentacao() 
             self.seed_retornos()    
+            self.recalcular_kpis()
+            self.recarregar_fato()
             print("\n✅ Banco de dados populado com sucesso!")
         except Exception as e:
             print(f"\n❌ Erro ao popular banco: {e}")
@@ -0,0 +1,26 @@
+from styles.theme import *
+
+# Barra de busca global (topo da janela principal) e lista de resultados
+BUSCA_STYLES = f"""
+QLineEdit#BuscaGlobal {{
+    background-color: {COLOR_INPUT_BG};
+    border: 1px solid {COLOR_INPUT_BORDER};
+    border-radius: 4px;
+    padding: 7px 10px;
+    color: {COLOR_TEXT};
+    font-size: 13px;
+}}
+QLineEdit#BuscaGlobal:focus {{ border: 1px solid {COLOR_FOCUS}; background-color: #1a202c; }}
+
+QListWidget#ResultadosBusca {{
+    background-color: {COLOR_CARD_BG};
+    border: 1px solid {COLOR_FOCUS};
+    border-radius: 4px;
+    color: {COLOR_TEXT};
+    font-size: 13px;
+    outline: none;
+}}
+QListWidget#ResultadosBusca::item {{ padding: 6px 8px; }}
+QListWidget#ResultadosBusca::item:selected {{ background-color: {COLOR_SELECTION}; color: white; }}
+QListWidget#ResultadosBusca::item:hover {{ background-color: {COLOR_HOVER_ROW}; }}
+"""
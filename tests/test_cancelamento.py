@@ -0,0 +1,55 @@
+import pytest
+
+from database.cancelamento import (
+    EXPORTACAO, INTERATIVA, RELATORIO, ConsultaCancelada, PoliticaTimeouts, TokenCancelamento,
+)
+
+POLITICA = PoliticaTimeouts(
+    [("dashboard.*", RELATORIO), ("relatorio.contagem", RELATORIO), ("relatorio.*", EXPORTACAO)],
+    {INTERATIVA: 15, RELATORIO: 120, EXPORTACAO: 1800},
+)
+
+
+@pytest.mark.parametrize("nome, em_lotes, classe", [
+    ("dashboard.kpis", False, RELATORIO),
+    ("dashboard.", False, RELATORIO),
+    ("relatorio.contagem", False, RELATORIO),   # o primeiro padrão que casa vale
+    ("relatorio.pagina", False, EXPORTACAO),
+    ("Dashboard.kpis", False, INTERATIVA),      # fnmatchcase: diferencia maiúsculas
+    ("dashboard", False, INTERATIVA),
+    ("busca.global", False, INTERATIVA),
+    ("busca.global", True, EXPORTACAO),         # sem padrão: em lotes é exportação
+    ("dashboard.kpis", True, RELATORIO),        # padrão vale mesmo em lotes
+    (None, False, INTERATIVA),
+    (None, True, EXPORTACAO),
+    ("", False, INTERATIVA),
+])
+def test_classe_da_consulta(nome, em_lotes, classe):
+    assert POLITICA.classe(nome, em_lotes) == classe
+
+
+def test_limite_em_milissegundos():
+    assert POLITICA.limite_ms(INTERATIVA) == 15000
+    assert POLITICA.limite_ms(EXPORTACAO) == 1800000
+    politica = PoliticaTimeouts(limites={INTERATIVA: 0.25, RELATORIO: None})
+    assert politica.limite_ms(INTERATIVA) == 250
+    assert politica.limite_ms(RELATORIO) is None
+    assert politica.limite_ms(EXPORTACAO) is None
+
+
+def test_politica_configurada():
+    from database.connection import TIMEOUTS
+    assert TIMEOUTS.classe("dashboard.status_mes") == RELATORIO
+    assert TIMEOUTS.classe("relatorio.contagem") == RELATORIO
+    assert TIMEOUTS.classe("relatorio.pagina") == INTERATIVA
+    assert TIMEOUTS.classe("relatorio.exportar", em_lotes=True) == EXPORTACAO
+    assert TIMEOUTS.classe("etl.processar") == RELATORIO
+
+
+def test_token_cancelado_recusa_novas_consultas():
+    token = TokenCancelamento()
+    token.cancelar()
+    assert token.cancelado
+    with pytest.raises(ConsultaCancelada):
+        with token.vincular(object()):
+            pass
@@ -0,0 +1,73 @@
+from datetime import date
+
+from models.filtros import DATA, TEXTO, VALOR, CompiladorFiltros, padrao_contem, padrao_inicio
+
+COLUNAS = {
+    "cliente": ("f.cliente", TEXTO),
+    "data_analise": ("f.data_analise", DATA),
+    "valor_item": ("f.valor_item", VALOR),
+}
+
+
+def test_padrao_contem_escapa_curingas():
+    assert padrao_contem("abc") == "%abc%"
+    assert padrao_contem("10%") == "%10\\%%"
+    assert padrao_contem("A_1") == "%A\\_1%"
+    assert padrao_contem("c:\\x") == "%c:\\\\x%"
+
+
+def test_padrao_contem_escapa_barra_antes_dos_curingas():
+    # A barra digitada não pode virar escape do curinga seguinte
+    assert padrao_contem("\\%") == "%\\\\\\%%"
+
+
+def test_padrao_inicio_escapa_curingas():
+    assert padrao_inicio("ns1") == "ns1%"
+    assert padrao_inicio("d2_") == "d2\\_%"
+
+
+def test_sem_filtros():
+    compilador = CompiladorFiltros(COLUNAS)
+    assert compilador.compilar({}) == ("TRUE", {})
+    assert compilador.compilar(None) == ("TRUE", {})
+
+
+def test_texto_vira_ilike_parametrizado():
+    sql, params = CompiladorFiltros(COLUNAS).compilar({"cliente": "50%_off"})
+    assert sql == "f.cliente ILIKE %(filtro_0)s"
+    assert params == {"filtro_0": "%50\\%\\_off%"}
+
+
+def test_intervalo_de_datas_vira_between():
+    inicio, fim = date(2026, 1, 1), date(2026, 1, 31)
+    sql, params = CompiladorFiltros(COLUNAS).compilar({"data_analise": (inicio, fim)})
+    assert sql == "f.data_analise BETWEEN %(filtro_0_de)s AND %(filtro_0_ate)s"
+    assert params == {"filtro_0_de": inicio, "filtro_0_ate": fim}
+
+
+def test_data_e_valor_como_texto_usam_o_formato_exibido():
+    sql, params = CompiladorFiltros(COLUNAS).compilar({"data_analise": "03/2026", "valor_item": "1.234"})
+    data, valor = sql.split(" AND ")
+    assert data == "to_char(f.data_analise, 'DD/MM/YYYY') ILIKE %(filtro_0)s"
+    assert valor.startswith("('R$ ' || translate(to_char(COALESCE(f.valor_item, 0)")
+    assert valor.endswith("ILIKE %(filtro_1)s")
+    assert params == {"filtro_0": "%03/2026%", "filtro_1": "%1.234%"}
+
+
+def test_filtro_incompleto_nao_traz_nada():
+    filtros = {"cliente": "abc", "data_analise": None}
+    assert CompiladorFiltros(COLUNAS).compilar(filtros) == ("FALSE", {})
+
+
+def test_campos_fora_do_mapa_sao_ignorados():
+    sql, params = CompiladorFiltros(COLUNAS).compilar({"inexistente": "x", "cliente": "abc"})
+    assert sql == "f.cliente ILIKE %(filtro_1)s"
+    assert params == {"filtro_1": "%abc%"}
+
+
+def test_varios_filtros_combinados_com_and():
+    inicio, fim = date(2026, 1, 1), date(2026, 2, 1)
+    sql, params = CompiladorFiltros(COLUNAS).compilar({"cliente": "abc", "data_analise": (inicio, fim)})
+    assert sql == ("f.cliente ILIKE %(filtro_0)s AND "
+                   "f.data_analise BETWEEN %(filtro_1_de)s AND %(filtro_1_ate)s")
+    assert params == {"filtro_0": "%abc%", "filtro_1_de": inicio, "filtro_1_ate": fim}
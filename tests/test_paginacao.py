@@ -0,0 +1,171 @@
+import functools
+import re
+import sqlite3
+from dataclasses import dataclass
+from datetime import date
+from typing import Optional
+
+import pytest
+
+from models.paginacao import PaginacaoPorChave
+
+
+@dataclass
+class Linha:
+    data: Optional[date]
+    nota: str
+    id: int
+
+
+DESC = PaginacaoPorChave([("data", "data", True), ("nota", "nota", False), ("id", "id", False)])
+ASC = PaginacaoPorChave([("data", "data", False), ("nota", "nota", False), ("id", "id", False)])
+
+LINHAS = [
+    Linha(None, "", 1),
+    Linha(None, "10", 2),
+    Linha(date(2026, 3, 1), "10", 3),
+    Linha(date(2026, 3, 1), "10", 4),
+    Linha(date(2026, 3, 1), "20", 5),
+    Linha(date(2026, 2, 1), "", 6),
+    Linha(date(2026, 2, 1), "05", 7),
+    Linha(date(2026, 1, 15), "30", 8),
+]
+POR_ID = {l.id: l for l in LINHAS}
+
+# Ordem dos ids de LINHAS em cada consulta: nulos primeiro na descendente, por último na ascendente
+ORDEM_DESC = [1, 2, 3, 4, 5, 6, 7, 8]
+ORDEM_ASC = [8, 6, 7, 3, 4, 5, 1, 2]
+
+
+def filtrar(paginacao, linhas, apos):
+    """Aplica o WHERE de condicao() às linhas (SQLite: mesma lógica de NULL do PostgreSQL)."""
+    sql, params = paginacao.condicao(apos)
+    banco = sqlite3.connect(":memory:")
+    banco.execute("CREATE TABLE t (data TEXT, nota TEXT, id INTEGER)")
+    banco.executemany("INSERT INTO t VALUES (?, ?, ?)",
+                      [(l.data and l.data.isoformat(), l.nota, l.id) for l in linhas])
+    sql = re.sub(r"%\((\w+)\)s", r":\1", sql)
+    params = {k: v.isoformat() if isinstance(v, date) else v for k, v in params.items()}
+    return {row[0] for row in banco.execute(f"SELECT id FROM t WHERE {sql}", params)}
+
+
+def test_primeira_pagina_sem_condicao():
+    assert DESC.condicao(None) == ("TRUE", {})
+
+
+@pytest.mark.parametrize("paginacao, ordem", [(DESC, ORDEM_DESC), (ASC, ORDEM_ASC)], ids=["desc", "asc"])
+def test_condicao_seleciona_exatamente_as_linhas_seguintes(paginacao, ordem):
+    for posicao, id_linha in enumerate(ordem):
+        esperadas = set(ordem[posicao + 1:])
+        assert filtrar(paginacao, LINHAS, paginacao.chave(POR_ID[id_linha])) == esperadas, id_linha
+
+
+def test_condicao_com_chave_nula_nao_usa_limite_na_primeira_coluna():
+    sql, params = DESC.condicao((None, "10", 2))
+    assert "chave_0" not in params
+    assert not sql.startswith("data <=")
+
+    sql, params = ASC.condicao((None, "10", 2))
+    assert "chave_0" not in params
+    assert "data IS NOT NULL" not in sql
+
+
+def test_condicao_ultima_linha_ascendente_nula_nao_traz_nada():
+    ultima = POR_ID[ORDEM_ASC[-1]]
+    assert filtrar(ASC, LINHAS, ASC.chave(ultima)) == set()
+
+
+def ordenar(paginacao, linhas):
+    ordem = functools.cmp_to_key(paginacao.comparar)
+    return sorted(linhas, key=lambda linha: ordem(paginacao.chave(linha)))
+
+
+def test_comparar_nulos_primeiro_na_descendente():
+    ordem = [l.id for l in ordenar(DESC, LINHAS)]
+    assert ordem == ORDEM_DESC
+
+
+def test_comparar_nulos_por_ultimo_na_ascendente():
+    ordem = [l.id for l in ordenar(ASC, LINHAS)]
+    assert ordem == ORDEM_ASC
+
+
+def paginar(paginacao, linhas, tamanho):
+    ordenadas = ordenar(paginacao, linhas)
+    paginas, chaves, tem_mais = {}, {}, {}
+    for numero, inicio in enumerate(range(0, len(ordenadas), tamanho), start=1):
+        paginas[numero] = ordenadas[inicio:inicio + tamanho]
+        chaves[numero] = paginacao.chave(paginas[numero][-1])
+        tem_mais[numero] = inicio + tamanho < len(ordenadas)
+    return paginas, chaves, tem_mais
+
+
+def ids(paginas):
+    return {numero: [l.id for l in dtos] for numero, dtos in paginas.items()}
+
+
+def test_mesclar_move_linha_para_outra_pagina():
+    paginas, chaves, tem_mais = paginar(DESC, LINHAS, 3)
+    movida = Linha(date(2026, 3, 1), "30", 3)
+
+    alteradas, saldo = DESC.mesclar(paginas, chaves, tem_mais, {3}, [movida], lambda l: l.id)
+
+    assert ids(paginas) == {1: [1, 2], 2: [4, 5, 3, 6], 3: [7, 8]}
+    assert alteradas == {1, 2}
+    assert saldo == 0
+
+
+def test_mesclar_linha_depois_da_chave_da_pagina_vai_para_a_seguinte():
+    paginas, chaves, tem_mais = paginar(DESC, LINHAS, 3)
+    # Mesma data da última linha da página 2 (id 6, nota ''), mas nota maior
+    movida = Linha(date(2026, 2, 1), "01", 3)
+
+    alteradas, saldo = DESC.mesclar(paginas, chaves, tem_mais, {3}, [movida], lambda l: l.id)
+
+    assert ids(paginas) == {1: [1, 2], 2: [4, 5, 6], 3: [3, 7, 8]}
+    assert alteradas == {1, 3}
+    assert saldo == 0
+
+
+def test_mesclar_remove_linha_que_saiu_da_consulta():
+    paginas, chaves, tem_mais = paginar(DESC, LINHAS, 3)
+
+    alteradas, saldo = DESC.mesclar(paginas, chaves, tem_mais, {5}, [], lambda l: l.id)
+
+    assert ids(paginas) == {1: [1, 2, 3], 2: [4, 6], 3: [7, 8]}
+    assert alteradas == {2}
+    assert saldo == -1
+
+
+def test_mesclar_chave_nula_entra_no_inicio_na_descendente():
+    paginas, chaves, tem_mais = paginar(DESC, LINHAS, 3)
+    sem_data = Linha(None, "", 7)
+
+    alteradas, saldo = DESC.mesclar(paginas, chaves, tem_mais, {7}, [sem_data], lambda l: l.id)
+
+    assert ids(paginas) == {1: [1, 7, 2, 3], 2: [4, 5, 6], 3: [8]}
+    assert alteradas == {1, 3}
+    assert saldo == 0
+
+
+def test_mesclar_chave_nula_vai_para_a_ultima_pagina_na_ascendente():
+    paginas, chaves, tem_mais = paginar(ASC, LINHAS, 3)
+    sem_data = Linha(None, "99", 8)
+
+    alteradas, saldo = ASC.mesclar(paginas, chaves, tem_mais, {8}, [sem_data], lambda l: l.id)
+
+    assert ids(paginas) == {1: [6, 7], 2: [3, 4, 5], 3: [1, 2, 8]}
+    assert alteradas == {1, 3}
+    assert saldo == 0
+
+
+def test_mesclar_descarta_linha_de_pagina_nao_carregada():
+    paginas, chaves, tem_mais = paginar(DESC, LINHAS, 3)
+    del paginas[3]
+    fora = Linha(date(2020, 1, 1), "", 9)
+
+    alteradas, saldo = DESC.mesclar(paginas, chaves, tem_mais, {9}, [fora], lambda l: l.id)
+
+    assert ids(paginas) == {1: [1, 2, 3], 2: [4, 5, 6]}
+    assert alteradas == set()
+    assert saldo == 0
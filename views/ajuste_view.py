@@ -1,6 +1,6 @@
 import sys
 import math
-from datetime import datetime, date
+from datetime import date
 import qtawesome as qta
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, 
                                QFrame, QTableWidget, QTableWidgetItem, QHeaderView,
@@ -9,7 +9,9 @@ from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushB
 from PySide6.QtCore import Qt
 
 from controllers.ajuste_controller import AjusteController
+from controllers.alteracoes import get_feed
 from styles.ajuste_styles import AJUSTE_STYLES
+from views.formatacao import formatar_celula, para_decimal, interpretar_intervalo_datas
 
 # --- POPUP DE EDIÇÃO ---
 class EdicaoPopup(QDialog):
@@ -133,23 +135,18 @@ class EdicaoPopup(QDialog):
         self.txt_nf.setText(self.dto.nf_entrada)
         
         if self.dto.data_emissao:
-            try:
-                dt = datetime.strptime(self.dto.data_emissao, "%d/%m/%Y").date()
-                self.dt_emissao.setDate(dt)
-            except: pass
+            self.dt_emissao.setDate(self.dto.data_emissao)
             
         self.txt_cnpj_rem.setText(self.dto.cnpj_remetente)
         self.txt_cod_item.setText(self.dto.codigo_item)
         self.txt_cod_avaria.setText(self.dto.codigo_avaria)
         self.txt_cod_analise.setText(self.dto.codigo_analise)
-        self.spin_valor.setValue(self.dto.valor_item)
+        self.spin_valor.setValue(float(self.dto.valor_item))
         self.txt_serie.setText(self.dto.numero_serie)
 
     def get_dados(self):
         """Retorna dicionário com os dados editados"""
-        data_emissao_str = self.dt_emissao.date().toString("dd/MM/yyyy")
-        # Para salvar no banco geralmente precisa converter para object date python ou string ISO
-        # O model lá está esperando o formato para update. Vamos passar objeto date
+        # Tipos nativos (date/Decimal) direto para o model
         data_emissao_obj = self.dt_emissao.date().toPython()
 
         return {
@@ -159,7 +156,7 @@ class EdicaoPopup(QDialog):
             'codigo_item': self.txt_cod_item.text(),
             'codigo_avaria': self.txt_cod_avaria.text(),
             'codigo_analise': self.txt_cod_analise.text(),
-            'valor_item': self.spin_valor.value(),
+            'valor_item': para_decimal(self.spin_valor.value()),
             'numero_serie': self.txt_serie.text()
         }
     
@@ -180,17 +177,39 @@ class PageAjustes(QWidget):
         self.setWindowTitle("Módulo de Ajustes e Correções")
         self.setStyleSheet(AJUSTE_STYLES)
         
-        self.todos_dados = []
+        # Com filtro: tudo em memória e filtrado aqui
+        self.todos_dados_dtos = []
+        self.todos_dados_lista = []
         self.dados_filtrados = []
+        self.tarefa_carga = None
+        self.carga_completa = False
+        self.ids_durante_carga = set()   # avisados enquanto a carga completa chegava
+
+        # Sem filtro: páginas de DTOs buscadas no servidor (paginação por chave)
+        self.paginas = {}          # página -> DTOs
+        self.chaves = {}           # página -> chave da última linha (onde começa a seguinte)
+        self.tem_mais = {}         # página -> existe página seguinte
+        self.tarefas_pagina = {}   # página -> Tarefa em andamento (carga ou pré-busca)
+        self.total_estimado = None
+        self.total_exato = None
+        self.tarefa_estimativa = None
+        self.tarefas_alteracao = {}   # leitura de itens avisados pelo feed -> ids que ela cobre
         
         self.pagina_atual = 1
         self.itens_por_pagina = 50 
         self.total_paginas = 1
         self.filtros_widgets = {}
 
+        # 0=Lançamento, 1=Recebimento, 2=Análise, 13=Emissão
+        self.colunas_data = [0, 1, 2, 13]
+
         self.setup_ui()
         self.carregar_dados()
 
+        # Itens alterados (nesta ou em outra estação) entram nos dados já carregados,
+        # avisados só depois que a carga do fato (esquema estrela) os incluiu
+        get_feed().fato_alterado.connect(self.receber_alteracoes)
+
     def setup_ui(self):
         main_layout = QVBoxLayout(self)
         main_layout.setContentsMargins(20, 20, 20, 20)
@@ -253,7 +272,17 @@ class PageAjustes(QWidget):
 
         pag_layout.addWidget(self.btn_prev)
         pag_layout.addStretch()
+        # Só aparece enquanto uma consulta longa (carga completa ou da página) está no banco
+        self.btn_cancelar = QPushButton(" Cancelar")
+        self.btn_cancelar.setObjectName("btn_pag")
+        self.btn_cancelar.setCursor(Qt.PointingHandCursor)
+        self.btn_cancelar.setIcon(qta.icon('fa5s.times', color='white'))
+        self.btn_cancelar.setToolTip("Interromper a consulta em andamento")
+        self.btn_cancelar.clicked.connect(self.cancelar_consulta)
+        self.btn_cancelar.setVisible(False)
+
         pag_layout.addWidget(self.lbl_paginacao)
+        pag_layout.addWidget(self.btn_cancelar)
         pag_layout.addStretch()
         pag_layout.addWidget(self.btn_next)
 
@@ -276,33 +305,180 @@ class PageAjustes(QWidget):
             self.filtros_widgets[col_idx] = inp
             self.table.setCellWidget(0, col_idx, inp)
 
+    def montar_linha(self, item):
+        return [
+            item.data_lancamento, item.data_recebimento, item.data_analise,
+            item.status, item.codigo_analise,
+            item.cnpj_remetente, item.nome_remetente,
+            item.cnpj, item.nome_cliente, item.grupo_cliente, item.cidade, item.estado, item.regiao,
+            item.data_emissao, item.nf_entrada,
+            item.codigo_item, item.grupo_item, item.numero_serie,
+            item.codigo_avaria, item.descricao_avaria,
+            item.valor_item, item.ressarcimento,
+            item.nf_retorno if item.nf_retorno else ""
+        ]
+
+    def filtros_ativos(self):
+        return any(widget.text().strip() for widget in self.filtros_widgets.values())
+
+    def modo_paginado(self):
+        return not self.filtros_ativos()
+
+    def cancelar_cargas(self):
+        for tarefa in [self.tarefa_carga, self.tarefa_estimativa, *self.tarefas_pagina.values(),
+                       *self.tarefas_alteracao]:
+            if tarefa:
+                tarefa.cancelar()
+        self.tarefa_carga = None
+        self.tarefa_estimativa = None
+        self.tarefas_pagina = {}
+        self.tarefas_alteracao = {}
+        self.ids_durante_carga = set()
+        self.atualizar_botao_cancelar()
+
     def carregar_dados(self):
-        try:
-            self.todos_dados_dtos = self.controller.buscar_dados() # Guarda lista de objetos
-            self.todos_dados_lista = [] # Guarda lista de listas para exibição na table
-            
-            for item in self.todos_dados_dtos:
-                linha = [
-                    item.data_lancamento, item.data_recebimento, item.data_analise,
-                    item.status, item.codigo_analise,
-                    item.cnpj_remetente, item.nome_remetente,
-                    item.cnpj, item.nome_cliente, item.grupo_cliente, item.cidade, item.estado, item.regiao,
-                    item.data_emissao, item.nf_entrada,
-                    item.codigo_item, item.grupo_item, item.numero_serie,
-                    item.codigo_avaria, item.descricao_avaria,
-                    f"R$ {item.valor_item:.2f}", f"R$ {item.ressarcimento:.2f}",
-                    item.nf_retorno if item.nf_retorno else ""
-                ]
-                self.todos_dados_lista.append(linha)
-
-            self.dados_filtrados = list(self.todos_dados_lista)
-            self.calcular_paginacao()
+        # Uma recarga nova (ex: após salvar) cancela a que estiver em andamento
+        self.cancelar_cargas()
+        self.todos_dados_dtos = []
+        self.todos_dados_lista = []
+        self.dados_filtrados = []
+        self.carga_completa = False
+        self.paginas = {}
+        self.chaves = {}
+        self.tem_mais = {}
+        self.total_estimado = None
+        self.total_exato = None
+        self.lbl_paginacao.setText("Carregando...")
+
+        if self.filtros_ativos():
+            self.carregar_tudo()
+        else:
+            # Após salvar/excluir volta para a primeira página (as chaves mudaram)
+            self.pagina_atual = 1
+            self.buscar_pagina(1)
+            self.buscar_estimativa()
+
+    # --- PÁGINAS DO SERVIDOR (SEM FILTRO) ---
+    def buscar_pagina(self, pagina):
+        if pagina in self.paginas or pagina in self.tarefas_pagina:
+            return
+        apos = self.chaves.get(pagina - 1) if pagina > 1 else None
+        tarefa = self.controller.buscar_pagina_async(apos, self.itens_por_pagina)
+        tarefa.concluido.connect(lambda resultado, pagina=pagina: self.receber_pagina(pagina, resultado))
+        tarefa.erro.connect(lambda mensagem, pagina=pagina: self.falha_pagina(pagina, mensagem))
+        self.tarefas_pagina[pagina] = tarefa
+        tarefa.iniciar()
+        self.atualizar_botao_cancelar()
+
+    def receber_pagina(self, pagina, resultado):
+        self.tarefas_pagina.pop(pagina, None)
+        self.atualizar_botao_cancelar()
+        dtos, tem_mais = resultado
+        self.paginas[pagina] = dtos
+        self.tem_mais[pagina] = tem_mais
+        if dtos:
+            self.chaves[pagina] = self.controller.chave_pagina(dtos)
+        if not tem_mais:
+            self.total_exato = (pagina - 1) * self.itens_por_pagina + len(dtos)
+        if pagina == self.pagina_atual and self.modo_paginado():
             self.atualizar_tabela()
-        except Exception as e:
-            QMessageBox.critical(self, "Erro", f"Erro ao carregar dados: {e}")
+
+    def falha_pagina(self, pagina, mensagem):
+        self.tarefas_pagina.pop(pagina, None)
+        self.falha_carga(mensagem)
+
+    def atualizar_botao_cancelar(self):
+        esperando = self.tarefa_carga is not None or (
+            self.modo_paginado() and self.pagina_atual in self.tarefas_pagina)
+        self.btn_cancelar.setVisible(esperando)
+
+    def cancelar_consulta(self):
+        """Interrompe no servidor a carga completa (filtro) ou a carga da página em tela."""
+        if self.tarefa_carga:
+            self.tarefa_carga.cancelar()
+            self.tarefa_carga = None
+            self.ids_durante_carga = set()
+            # Filtra o que já chegou; um novo filtro recomeça a carga
+            self.filtrar_em_memoria()
+            self.lbl_paginacao.setText(f"Carga cancelada: filtrando {len(self.todos_dados_lista)} registros já recebidos")
+        elif self.modo_paginado():
+            tarefa = self.tarefas_pagina.pop(self.pagina_atual, None)
+            if tarefa:
+                tarefa.cancelar()
+            if self.pagina_atual in self.paginas:
+                self.atualizar_rodape()
+            else:
+                self.lbl_paginacao.setText("Consulta cancelada")
+                self.btn_prev.setDisabled(self.pagina_atual == 1)
+                self.btn_next.setDisabled(True)
+        self.atualizar_botao_cancelar()
+
+    def buscar_estimativa(self):
+        tarefa = self.controller.estimar_total_async()
+        tarefa.concluido.connect(self.receber_estimativa)
+        tarefa.erro.connect(lambda mensagem: print(f"Erro ao estimar o total de ajustes: {mensagem}"))
+        self.tarefa_estimativa = tarefa
+        tarefa.iniciar()
+
+    def receber_estimativa(self, total):
+        self.tarefa_estimativa = None
+        self.total_estimado = total
+        if self.modo_paginado() and self.pagina_atual in self.paginas:
+            self.atualizar_rodape()
+
+    # --- CARGA COMPLETA (COM FILTRO) ---
+    def carregar_tudo(self):
+        self.todos_dados_dtos = [] # Guarda lista de objetos
+        self.todos_dados_lista = [] # Guarda lista de listas para exibição na table
+        self.lotes_recebidos = 0
+        self.lbl_paginacao.setText("Carregando...")
+
+        # Lotes do cursor server-side, consultados fora da thread da interface
+        self.tarefa_carga = self.controller.buscar_dados_async()
+        self.tarefa_carga.lote.connect(self.receber_lote)
+        self.tarefa_carga.concluido.connect(self.finalizar_carga)
+        self.tarefa_carga.erro.connect(self.falha_carga)
+        self.tarefa_carga.iniciar()
+        self.atualizar_botao_cancelar()
+
+    def receber_lote(self, lote):
+        self.todos_dados_dtos.extend(lote)
+        self.todos_dados_lista.extend(self.montar_linha(item) for item in lote)
+        self.lotes_recebidos += 1
+        if self.lotes_recebidos == 1:
+            # A primeira página aparece com o primeiro lote
+            self.processar_filtragem()
+        else:
+            self.lbl_paginacao.setText(f"Carregando... {len(self.todos_dados_lista)} registros")
+
+    def finalizar_carga(self, _):
+        self.tarefa_carga = None
+        self.carga_completa = True
+        self.atualizar_botao_cancelar()
+        pagina = self.pagina_atual
+        self.processar_filtragem()
+        self.pagina_atual = min(pagina, self.total_paginas)
+        self.atualizar_tabela()
+        if self.ids_durante_carga:
+            # Linhas que podem ter vindo antes da alteração
+            ids, self.ids_durante_carga = self.ids_durante_carga, set()
+            self.atualizar_itens(ids)
+
+    def falha_carga(self, mensagem):
+        self.tarefa_carga = None
+        self.atualizar_botao_cancelar()
+        QMessageBox.critical(self, "Erro", f"Erro ao carregar dados: {mensagem}")
 
     def abrir_edicao(self, row, col):
         if row == 0: return # Clicou no filtro
+
+        if self.modo_paginado():
+            # Sem filtro a tabela mostra exatamente a página de DTOs em cache
+            dtos_pagina = self.paginas.get(self.pagina_atual, [])
+            if row - 1 >= len(dtos_pagina):
+                return
+            self.editar_dto(dtos_pagina[row - 1])
+            return
         
         # Precisamos achar o DTO correspondente.
         # Como temos paginação e filtro, o índice visual 'row' não bate com o índice da lista 'todos_dados_dtos'.
@@ -332,7 +508,22 @@ class PageAjustes(QWidget):
         
         if not dto_selecionado:
             return
+        self.editar_dto(dto_selecionado)
+
+    def focar_item(self, id_item):
+        """Abre a edição de um item escolhido na busca global (lido fora da thread da interface)."""
+        tarefa = self.controller.buscar_item_async(id_item)
+        tarefa.concluido.connect(self.abrir_item_focado)
+        tarefa.erro.connect(lambda mensagem: QMessageBox.critical(self, "Erro", f"Erro ao buscar o item: {mensagem}"))
+        tarefa.iniciar()
+
+    def abrir_item_focado(self, dto):
+        if dto is None:
+            QMessageBox.information(self, "Busca", "Item não encontrado na listagem de ajustes (pode ter sido arquivado).")
+            return
+        self.editar_dto(dto)
 
+    def editar_dto(self, dto_selecionado):
         dialog = EdicaoPopup(dto_selecionado, self)
         resultado = dialog.exec()
         
@@ -340,8 +531,8 @@ class PageAjustes(QWidget):
             novos_dados = dialog.get_dados()
             try:
                 self.controller.salvar_edicao(dto_selecionado, novos_dados)
+                # A linha (e as demais da mesma nota) chega pelo feed, depois da carga do fato
                 QMessageBox.information(self, "Sucesso", "Registro atualizado!")
-                self.carregar_dados() # Recarrega tudo
             except Exception as e:
                 QMessageBox.critical(self, "Erro", str(e))
                 
@@ -351,40 +542,112 @@ class PageAjustes(QWidget):
                 try:
                     self.controller.excluir_registro(dto_selecionado.id_item)
                     QMessageBox.information(self, "Sucesso", "Item excluído.")
-                    self.carregar_dados()
                 except Exception as e:
                     QMessageBox.critical(self, "Erro", str(e))
 
-    # Métodos de Paginação e Filtro (Idênticos ao Relatorio, omitidos para brevidade mas devem estar aqui)
+    # --- ALTERAÇÕES AVISADAS PELO FEED ---
+    def receber_alteracoes(self, tabela, ids):
+        if tabela != "itens_notas":
+            return
+        if ids is None:
+            self.carregar_dados()
+        else:
+            self.atualizar_itens(ids)
+
+    def atualizar_itens(self, ids):
+        """Relê só os itens `ids` e os aplica às páginas (ou à lista filtrada) em memória."""
+        if self.tarefa_carga is not None:
+            self.ids_durante_carga.update(ids)
+            return
+        # Uma leitura mais antiga dos mesmos itens poderia terminar depois com dados velhos
+        for anterior, ids_anterior in list(self.tarefas_alteracao.items()):
+            if not ids_anterior.isdisjoint(ids):
+                anterior.cancelar()
+                del self.tarefas_alteracao[anterior]
+                ids = ids | ids_anterior
+        tarefa = self.controller.buscar_itens_async(ids)
+        tarefa.concluido.connect(lambda atuais, ids=ids, tarefa=tarefa: self.aplicar_alteracoes(tarefa, ids, atuais))
+        tarefa.erro.connect(lambda mensagem, tarefa=tarefa: self.falha_alteracao(tarefa, mensagem))
+        self.tarefas_alteracao[tarefa] = ids
+        tarefa.iniciar()
+
+    def aplicar_alteracoes(self, tarefa, ids, atuais):
+        if self.tarefas_alteracao.pop(tarefa, None) is None:
+            return  # Substituída por uma leitura mais nova ou por uma recarga
+
+        # Páginas do servidor (as distantes já saíram do cache; voltam atualizadas)
+        alteradas, saldo = self.controller.mesclar_alteracoes(self.paginas, self.chaves, self.tem_mais, ids, atuais)
+        if self.total_exato is not None:
+            self.total_exato += saldo
+        elif self.total_estimado is not None:
+            self.total_estimado += saldo
+
+        # Conjunto completo da filtragem em memória: uma única "página" sem vizinhas
+        if self.carga_completa:
+            todos = {1: self.todos_dados_dtos}
+            self.controller.mesclar_alteracoes(todos, {}, {1: False}, ids, atuais)
+            self.todos_dados_dtos = todos[1]
+            self.todos_dados_lista = [self.montar_linha(item) for item in self.todos_dados_dtos]
+
+        if self.modo_paginado():
+            if self.pagina_atual in alteradas:
+                self.atualizar_tabela()
+            elif self.pagina_atual in self.paginas:
+                self.atualizar_rodape()
+        elif self.carga_completa:
+            pagina = self.pagina_atual
+            self.processar_filtragem()
+            self.pagina_atual = min(pagina, self.total_paginas)
+            self.atualizar_tabela()
+
+    def falha_alteracao(self, tarefa, mensagem):
+        self.tarefas_alteracao.pop(tarefa, None)
+        print(f"Erro ao atualizar itens de ajustes: {mensagem}")
+
+    # Métodos de Paginação e Filtro
     def processar_filtragem(self):
-        filtros_ativos = {}
+        if self.modo_paginado():
+            # Filtros limpos: volta para as páginas do servidor
+            self.pagina_atual = 1
+            if self.total_estimado is None and self.tarefa_estimativa is None:
+                self.buscar_estimativa()
+            self.atualizar_tabela()
+            return
+        if not self.carga_completa and self.tarefa_carga is None:
+            # Primeiro filtro: traz o conjunto completo (a filtragem roda no primeiro lote)
+            self.carregar_tudo()
+            return
+        self.filtrar_em_memoria()
+
+    def filtrar_em_memoria(self):
+        filtros_texto = {}
+        filtros_data = {}
         for col_idx, widget in self.filtros_widgets.items():
             texto = widget.text().lower().strip()
-            if texto:
-                filtros_ativos[col_idx] = texto
-        
-        if not filtros_ativos:
-            self.dados_filtrados = list(self.todos_dados)
-        else:
-            self.dados_filtrados = []
-            for linha in self.todos_dados:
-                match = True
-                for col_idx, texto_filtro in filtros_ativos.items():
-                    valor_celula = str(linha[col_idx]).lower() if linha[col_idx] else ""
-                    
-                    # Verifica se é coluna de data e tenta lógica de range
-                    if col_idx in self.colunas_data and ("-" in texto_filtro or " a " in texto_filtro):
-                        is_match_data = self.verificar_range_data(valor_celula, texto_filtro)
-                        if not is_match_data:
-                            match = False
-                            break
-                    else:
-                        # Lógica padrão (texto contém texto)
-                        if texto_filtro not in valor_celula:
-                            match = False
-                            break
-                if match:
-                    self.dados_filtrados.append(linha)
+            if not texto:
+                continue
+            if col_idx in self.colunas_data and ("-" in texto or " a " in texto):
+                # Intervalo incompleto/inválido (usuário ainda digitando) esconde tudo
+                filtros_data[col_idx] = interpretar_intervalo_datas(texto)
+            else:
+                filtros_texto[col_idx] = texto
+
+        self.dados_filtrados = []
+        for linha in self.todos_dados_lista:
+            match = True
+            for col_idx, intervalo in filtros_data.items():
+                valor = linha[col_idx]
+                if intervalo is None or valor is None or not (intervalo[0] <= valor <= intervalo[1]):
+                    match = False
+                    break
+            if match:
+                for col_idx, texto_filtro in filtros_texto.items():
+                    # Lógica padrão (texto contém texto)
+                    if texto_filtro not in formatar_celula(linha[col_idx]).lower():
+                        match = False
+                        break
+            if match:
+                self.dados_filtrados.append(linha)
 
         self.pagina_atual = 1
         self.calcular_paginacao()
@@ -396,9 +659,26 @@ class PageAjustes(QWidget):
         if self.total_paginas < 1: self.total_paginas = 1
 
     def atualizar_tabela(self):
-        inicio = (self.pagina_atual - 1) * self.itens_por_pagina
-        fim = inicio + self.itens_por_pagina
-        dados_da_pagina = self.dados_filtrados[inicio:fim]
+        if self.modo_paginado():
+            dtos_pagina = self.paginas.get(self.pagina_atual)
+            if dtos_pagina is None:
+                # Ainda chegando: mantém a página anterior na tela até lá
+                self.buscar_pagina(self.pagina_atual)
+                self.atualizar_botao_cancelar()
+                self.lbl_paginacao.setText("Carregando...")
+                self.btn_prev.setDisabled(True)
+                self.btn_next.setDisabled(True)
+                return
+            # Pré-busca da seguinte; as distantes saem do cache (as chaves ficam)
+            if self.tem_mais.get(self.pagina_atual):
+                self.buscar_pagina(self.pagina_atual + 1)
+            for pagina in [p for p in self.paginas if abs(p - self.pagina_atual) > 5]:
+                del self.paginas[pagina]
+            dados_da_pagina = [self.montar_linha(dto) for dto in dtos_pagina]
+        else:
+            inicio = (self.pagina_atual - 1) * self.itens_por_pagina
+            fim = inicio + self.itens_por_pagina
+            dados_da_pagina = self.dados_filtrados[inicio:fim]
 
         qtd_linhas_necessarias = 1 + len(dados_da_pagina)
         self.table.setRowCount(qtd_linhas_necessarias)
@@ -406,16 +686,42 @@ class PageAjustes(QWidget):
         for i, row_data in enumerate(dados_da_pagina):
             table_row = i + 1 
             for col_idx, valor in enumerate(row_data):
-                item = QTableWidgetItem(str(valor) if valor is not None else "")
+                item = QTableWidgetItem(formatar_celula(valor))
                 item.setTextAlignment(Qt.AlignCenter)
                 item.setFlags(Qt.ItemIsEnabled | Qt.ItemIsSelectable)
                 self.table.setItem(table_row, col_idx, item)
 
+        self.atualizar_rodape()
+
+    def atualizar_rodape(self):
+        self.atualizar_botao_cancelar()
+        if self.modo_paginado():
+            # Total exato só depois de chegar à última página; antes, a estimativa do banco
+            if self.total_exato is not None:
+                total = str(self.total_exato)
+            else:
+                conhecidas = max(self.tem_mais, default=0) * self.itens_por_pagina + 1
+                total = f"~{max(self.total_estimado or 0, conhecidas)}"
+            if self.tem_mais.get(self.pagina_atual):
+                estimado = int(total.lstrip("~"))
+                paginas = f"~{max(math.ceil(estimado / self.itens_por_pagina), self.pagina_atual + 1)}"
+            else:
+                paginas = self.pagina_atual
+            self.lbl_paginacao.setText(f"Página {self.pagina_atual} de {paginas} (Total: {total})")
+            self.btn_prev.setDisabled(self.pagina_atual == 1)
+            self.btn_next.setDisabled(not self.tem_mais.get(self.pagina_atual))
+            return
+
         self.lbl_paginacao.setText(f"Página {self.pagina_atual} de {self.total_paginas} (Total: {len(self.dados_filtrados)})")
         self.btn_prev.setDisabled(self.pagina_atual == 1)
         self.btn_next.setDisabled(self.pagina_atual >= self.total_paginas)
     
     def avancar_pagina(self):
+        if self.modo_paginado():
+            if self.tem_mais.get(self.pagina_atual):
+                self.pagina_atual += 1
+                self.atualizar_tabela()
+            return
         if self.pagina_atual < self.total_paginas:
             self.pagina_atual += 1
             self.atualizar_tabela()
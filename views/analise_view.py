@@ -1,4 +1,6 @@
 import sys
+import bisect
+from datetime import date
 import qtawesome as qta
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, 
                                QComboBox, QPushButton, QFrame, QTableWidget, QTableWidgetItem, 
@@ -7,6 +9,8 @@ from PySide6.QtCore import Qt
 from PySide6.QtGui import QIntValidator
 
 from controllers import AnaliseController
+from controllers.alteracoes import get_feed
+from views.formatacao import formatar_data, formatar_moeda
 from styles.analise_styles import ANALISE_STYLES
 
 class PageAnalise(QWidget):
@@ -23,6 +27,8 @@ class PageAnalise(QWidget):
             "004": {"desc": "Ruído Excessivo", "status": "Procedente"},
         }
         self.item_atual = None
+        self.itens = []   # DTOs na ordem da tabela
+        self.tarefas_alteracao = {}   # leitura de itens avisados pelo feed -> ids que ela cobre
 
         layout = QVBoxLayout(self) 
         layout.setContentsMargins(20, 20, 20, 20)
@@ -153,6 +159,9 @@ class PageAnalise(QWidget):
         self.carregar_dados_tabela()
         self.bloquear_form(True)
 
+        # Outras estações (e as outras telas) avisam quais itens mudaram
+        get_feed().alterado.connect(self.receber_alteracoes)
+
     def verificar_origem(self, texto):
         if texto == "Revenda":
             self.txt_fornecedor.setEnabled(True)
@@ -182,6 +191,27 @@ class PageAnalise(QWidget):
         self.combo_cod_avaria.setCurrentIndex(0)
         self.txt_serie.setFocus()
 
+    def focar_item(self, id_item):
+        """Seleciona um item escolhido na busca global e abre o formulário de análise."""
+        linha = self.localizar_linha(id_item)
+        if linha is None:
+            # Lançado depois da última carga da tabela
+            self.carregar_dados_tabela()
+            linha = self.localizar_linha(id_item)
+        if linha is None:
+            QMessageBox.information(self, "Busca", "O item não está mais aguardando análise.")
+            return
+        item = self.table.item(linha, 0)
+        self.table.selectRow(linha)
+        self.table.scrollToItem(item, QTableWidget.PositionAtCenter)
+        self.carregar_item_para_analise(item)
+
+    def localizar_linha(self, id_item):
+        for row in range(self.table.rowCount()):
+            if self.table.item(row, 0).data(Qt.UserRole) == id_item:
+                return row
+        return None
+
     def atualizar_detalhes_avaria(self, text):
         if not text: return
         codigo_puro = text.split(" ")[0]
@@ -239,19 +269,29 @@ class PageAnalise(QWidget):
         }
 
         try:
+            id_item = int(self.item_atual)
             self.controller.salvar_analise(self.item_atual, dados)
             QMessageBox.information(self, "Sucesso", "Análise salva!")
-            self.bloquear_form(True)
-            self.txt_id_item.clear()
-            self.txt_peca_nome.clear()
-            self.txt_desc_avaria.clear()
-            self.lbl_status_resultado.setText("AGUARDANDO")
-            self.lbl_status_resultado.setObjectName("StatusNeutro")
-            self.lbl_status_resultado.style().unpolish(self.lbl_status_resultado)
-            self.lbl_status_resultado.style().polish(self.lbl_status_resultado)
-            self.carregar_dados_tabela()
+            self.limpar_formulario()
+            # O item saiu da fila: basta tirar a linha, sem recarregar a tabela.
+            # Leituras anteriores ao salvamento ainda o trariam como pendente.
+            outros = self.cancelar_alteracoes({id_item}) - {id_item}
+            self.aplicar_alteracoes({id_item}, [])
+            if outros:
+                self.atualizar_itens(outros)
         except Exception as e:
             QMessageBox.critical(self, "Erro", str(e))
+
+    def limpar_formulario(self):
+        self.item_atual = None
+        self.bloquear_form(True)
+        self.txt_id_item.clear()
+        self.txt_peca_nome.clear()
+        self.txt_desc_avaria.clear()
+        self.lbl_status_resultado.setText("AGUARDANDO")
+        self.lbl_status_resultado.setObjectName("StatusNeutro")
+        self.lbl_status_resultado.style().unpolish(self.lbl_status_resultado)
+        self.lbl_status_resultado.style().polish(self.lbl_status_resultado)
     
     def criar_item_tabela(self, texto):
         item = QTableWidgetItem(str(texto) if texto else "")
@@ -259,19 +299,87 @@ class PageAnalise(QWidget):
         return item
 
     def carregar_dados_tabela(self):
-        itens_dto = self.controller.listar_pendentes()
+        # A recarga já traz tudo: leituras de itens ainda em andamento ficam obsoletas
+        self.cancelar_alteracoes()
+        self.itens = self.controller.listar_pendentes()
         self.table.setRowCount(0)
-        for item in itens_dto:
+        for item in self.itens:
             row = self.table.rowCount()
             self.table.insertRow(row)
-            val_entrada = self.criar_item_tabela(item.data_fmt)
-            val_entrada.setData(Qt.UserRole, item.id) 
-            self.table.setItem(row, 0, val_entrada)
-            self.table.setItem(row, 1, self.criar_item_tabela(item.codigo_item))
-            self.table.setItem(row, 2, self.criar_item_tabela(item.codigo_analise))
-            self.table.setItem(row, 3, self.criar_item_tabela(item.numero_nota))
-            if item.ressarcimento is not None:
-                valor_fmt = f"{item.ressarcimento:.2f}".replace('.', ',')
-            else:
-                valor_fmt = "0,00"
-            self.table.setItem(row, 4, self.criar_item_tabela(valor_fmt))
\ No newline at end of file
+            self.preencher_linha(row, item)
+
+    def preencher_linha(self, row, item):
+        val_entrada = self.criar_item_tabela(formatar_data(item.data_lancamento))
+        val_entrada.setData(Qt.UserRole, item.id) 
+        self.table.setItem(row, 0, val_entrada)
+        self.table.setItem(row, 1, self.criar_item_tabela(item.codigo_item))
+        self.table.setItem(row, 2, self.criar_item_tabela(item.codigo_analise))
+        self.table.setItem(row, 3, self.criar_item_tabela(item.numero_nota))
+        self.table.setItem(row, 4, self.criar_item_tabela(formatar_moeda(item.ressarcimento, prefixo="")))
+
+    # --- Alterações avisadas pelo feed ---
+
+    def receber_alteracoes(self, tabela, ids):
+        if tabela != "itens_notas":
+            return
+        if ids is None:
+            self.carregar_dados_tabela()
+            return
+        self.atualizar_itens(ids)
+
+    def atualizar_itens(self, ids):
+        # Uma leitura mais antiga dos mesmos itens poderia terminar depois e reinserir
+        # dados velhos: ela é cancelada e seus ids passam para a nova
+        ids = set(ids) | self.cancelar_alteracoes(ids)
+        tarefa = self.controller.listar_pendentes_async(ids)
+        tarefa.concluido.connect(lambda atuais, tarefa=tarefa, ids=ids: self.concluir_alteracao(tarefa, ids, atuais))
+        tarefa.erro.connect(lambda msg, tarefa=tarefa: self.falha_alteracao(tarefa, msg))
+        self.tarefas_alteracao[tarefa] = ids
+        tarefa.iniciar()
+
+    def cancelar_alteracoes(self, ids=None) -> set:
+        """Cancela as leituras que cobrem algum dos `ids` (todas, sem ids); retorna os ids que elas cobriam."""
+        cobertos = set()
+        for tarefa, ids_tarefa in list(self.tarefas_alteracao.items()):
+            if ids is None or not ids_tarefa.isdisjoint(ids):
+                tarefa.cancelar()
+                del self.tarefas_alteracao[tarefa]
+                cobertos |= ids_tarefa
+        return cobertos
+
+    def concluir_alteracao(self, tarefa, ids, atuais):
+        if self.tarefas_alteracao.pop(tarefa, None) is None:
+            return  # Substituída por uma leitura mais nova ou por uma recarga
+        self.aplicar_alteracoes(ids, atuais)
+
+    def falha_alteracao(self, tarefa, mensagem):
+        self.tarefas_alteracao.pop(tarefa, None)
+        print(f"Erro ao atualizar pendentes: {mensagem}")
+
+    @staticmethod
+    def chave_ordem(item):
+        # Mesma ordem de AnaliseModel.SQL_BASE (datas nulas por último, como no ASC do banco)
+        data = item.data_lancamento
+        return (data is None, data or date.min, item.numero_nota or "", item.codigo_analise or "")
+
+    def aplicar_alteracoes(self, ids, atuais):
+        """
+        Tira as linhas dos itens avisados e reinsere, na posição da ordenação, os que
+        continuam pendentes (`atuais`). O resto da tabela, seleção e rolagem ficam como estão.
+        """
+        for row in reversed(range(len(self.itens))):
+            if self.itens[row].id in ids:
+                del self.itens[row]
+                self.table.removeRow(row)
+
+        for item in atuais:
+            chave = self.chave_ordem(item)
+            row = bisect.bisect_right([self.chave_ordem(i) for i in self.itens], chave)
+            self.itens.insert(row, item)
+            self.table.insertRow(row)
+            self.preencher_linha(row, item)
+
+        # O item aberto no formulário foi analisado em outra estação
+        if self.item_atual and int(self.item_atual) in ids and \
+                not any(item.id == int(self.item_atual) for item in atuais):
+            self.limpar_formulario()
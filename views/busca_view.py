@@ -0,0 +1,138 @@
+import qtawesome as qta
+from PySide6.QtWidgets import QWidget, QHBoxLayout, QLineEdit, QListWidget, QListWidgetItem
+from PySide6.QtCore import Qt, QEvent, QPoint, QTimer, Signal
+
+from controllers.busca_controller import BuscaController, MIN_CARACTERES, ANALISE, AJUSTES, RETORNO
+from styles.busca_styles import BUSCA_STYLES
+from views.formatacao import formatar_data
+
+class BarraBusca(QWidget):
+    """
+    Busca global da janela principal: notas, códigos de análise, séries, CNPJ e clientes.
+    Os resultados aparecem em uma lista sobre a página enquanto o usuário digita;
+    escolher um emite `resultado_escolhido(destino, resultado)`.
+    """
+    resultado_escolhido = Signal(str, object)
+
+    NOMES_DESTINO = {ANALISE: "Análise", AJUSTES: "Ajustes", RETORNO: "Retorno"}
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.controller = BuscaController()
+        self.tarefa_busca = None
+        self.setStyleSheet(BUSCA_STYLES)
+
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(20, 12, 20, 0)
+
+        self.txt_busca = QLineEdit(objectName="BuscaGlobal")
+        self.txt_busca.setPlaceholderText("Buscar nota, código de análise, série, CNPJ ou cliente...")
+        self.txt_busca.addAction(qta.icon('fa5s.search', color='#a0aec0'), QLineEdit.LeadingPosition)
+        self.txt_busca.setClearButtonEnabled(True)
+        self.txt_busca.installEventFilter(self)
+        layout.addWidget(self.txt_busca)
+
+        # Lista flutuante: filha da janela (fica por cima das páginas sem tirar o foco do campo)
+        self.lista = QListWidget(objectName="ResultadosBusca")
+        self.lista.setStyleSheet(BUSCA_STYLES)
+        self.lista.setFocusPolicy(Qt.NoFocus)
+        self.lista.itemClicked.connect(self.escolher)
+        self.lista.hide()
+
+        # A consulta só sai quando a digitação para por um instante
+        self.timer_busca = QTimer(self)
+        self.timer_busca.setSingleShot(True)
+        self.timer_busca.setInterval(250)
+        self.timer_busca.timeout.connect(self.buscar)
+        self.txt_busca.textChanged.connect(self.timer_busca.start)
+
+    def buscar(self):
+        # Uma busca nova cancela a anterior (resultado de um termo já apagado não aparece)
+        if self.tarefa_busca:
+            self.tarefa_busca.cancelar()
+            self.tarefa_busca = None
+
+        termo = self.txt_busca.text().strip()
+        if len(termo) < MIN_CARACTERES:
+            self.esconder_resultados()
+            return
+
+        self.tarefa_busca = self.controller.buscar_async(termo)
+        self.tarefa_busca.concluido.connect(self.mostrar_resultados)
+        self.tarefa_busca.erro.connect(self.falha_busca)
+        self.tarefa_busca.iniciar()
+
+    def falha_busca(self, mensagem):
+        self.tarefa_busca = None
+        print(f"Erro na busca global: {mensagem}")
+
+    def descrever(self, resultado):
+        """Texto de uma linha da lista de resultados."""
+        if resultado.tipo == "item":
+            partes = [f"Análise {resultado.codigo_analise}", f"Item {resultado.codigo_item}"]
+            if resultado.numero_serie:
+                partes.append(f"Série {resultado.numero_serie}")
+            partes += [f"NF {resultado.numero_nota}", resultado.cliente, resultado.status]
+        elif resultado.tipo == "nota":
+            partes = [f"NF {resultado.numero_nota}", resultado.cliente, formatar_data(resultado.data_lancamento),
+                      f"{resultado.itens_abertos} item(ns) em aberto"]
+        else:
+            partes = [resultado.cliente or "Cliente sem nome", f"CNPJ {resultado.cnpj}"]
+        destino = self.NOMES_DESTINO[self.controller.destino(resultado)]
+        return "  ·  ".join(p for p in partes if p) + f"   →  {destino}"
+
+    def mostrar_resultados(self, resultados):
+        self.tarefa_busca = None
+        self.lista.clear()
+        if not resultados:
+            self.lista.addItem(QListWidgetItem("Nenhum resultado."))
+            self.lista.item(0).setFlags(Qt.NoItemFlags)
+        for resultado in resultados:
+            item = QListWidgetItem(self.descrever(resultado))
+            item.setData(Qt.UserRole, resultado)
+            self.lista.addItem(item)
+        self.lista.setCurrentRow(0)
+
+        # Posiciona logo abaixo do campo, por cima da página atual
+        janela = self.window()
+        if self.lista.parent() is not janela:
+            self.lista.setParent(janela)
+        posicao = self.txt_busca.mapTo(janela, QPoint(0, self.txt_busca.height() + 2))
+        altura = self.lista.sizeHintForRow(0) * min(self.lista.count(), 10) + 6
+        self.lista.setGeometry(posicao.x(), posicao.y(), self.txt_busca.width(), altura)
+        self.lista.raise_()
+        self.lista.show()
+
+    def esconder_resultados(self):
+        self.lista.hide()
+        self.lista.clear()
+
+    def escolher(self, item=None):
+        item = item or self.lista.currentItem()
+        resultado = item.data(Qt.UserRole) if item else None
+        if resultado is None:
+            return
+        self.esconder_resultados()
+        self.txt_busca.clearFocus()
+        self.resultado_escolhido.emit(self.controller.destino(resultado), resultado)
+
+    def eventFilter(self, obj, event):
+        # Setas, Enter e Esc no campo comandam a lista de resultados
+        if obj is self.txt_busca:
+            if event.type() == QEvent.KeyPress and self.lista.isVisible():
+                tecla = event.key()
+                if tecla in (Qt.Key_Down, Qt.Key_Up):
+                    passo = 1 if tecla == Qt.Key_Down else -1
+                    linha = max(0, min(self.lista.count() - 1, self.lista.currentRow() + passo))
+                    self.lista.setCurrentRow(linha)
+                    return True
+                if tecla in (Qt.Key_Return, Qt.Key_Enter):
+                    self.escolher()
+                    return True
+                if tecla == Qt.Key_Escape:
+                    self.esconder_resultados()
+                    return True
+            elif event.type() == QEvent.FocusOut:
+                # Adiado: um clique na lista chega depois da perda de foco do campo
+                QTimer.singleShot(150, self.esconder_resultados)
+        return super().eventFilter(obj, event)
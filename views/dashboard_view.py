@@ -28,6 +28,7 @@ class PageDashboard(QWidget):
     def __init__(self):
         super().__init__()
         self.controller = DashboardController()
+        self.tarefa_kpis = None
         self.setWindowTitle("Dashboard Garantia")
         self.setStyleSheet(DASHBOARD_STYLES)
 
@@ -40,6 +41,9 @@ class PageDashboard(QWidget):
         lbl_titulo = QLabel("Visão Geral - Indicadores")
         lbl_titulo.setObjectName("DashboardTitle")
         
+        self.lbl_status = QLabel("")
+        self.lbl_status.setObjectName("CardTitle")
+
         btn_refresh = QPushButton(" Atualizar")
         btn_refresh.setObjectName("btn_nav")
         btn_refresh.setIcon(qta.icon('fa5s.sync-alt', color='white'))
@@ -47,6 +51,7 @@ class PageDashboard(QWidget):
 
         top_bar.addWidget(lbl_titulo)
         top_bar.addStretch()
+        top_bar.addWidget(self.lbl_status)
         top_bar.addWidget(btn_refresh)
         main_layout.addLayout(top_bar)
 
@@ -61,12 +66,30 @@ class PageDashboard(QWidget):
         self.carregar_dados()
 
     def carregar_dados(self):
+        # As consultas rodam fora da thread da interface; os gráficos atuais
+        # continuam na tela até os novos dados chegarem.
+        if self.tarefa_kpis:
+            self.tarefa_kpis.cancelar()
+
+        self.lbl_status.setText("Atualizando...")
+        self.tarefa_kpis = self.controller.get_kpis_async()
+        self.tarefa_kpis.concluido.connect(self.montar_graficos)
+        self.tarefa_kpis.erro.connect(self.falha_carga)
+        self.tarefa_kpis.iniciar()
+
+    def falha_carga(self, mensagem):
+        self.tarefa_kpis = None
+        self.lbl_status.setText("Falha ao atualizar")
+        print(f"Erro ao carregar indicadores: {mensagem}")
+
+    def montar_graficos(self, kpis):
+        self.tarefa_kpis = None
+        self.lbl_status.setText("")
+
         while self.grid.count():
             item = self.grid.takeAt(0)
             if item.widget(): item.widget().deleteLater()
 
-        kpis = self.controller.get_kpis()
-        
         # 1. Financeiro (Safra)
         fig1 = self.criar_grafico_financeiro(kpis.comparativo_financeiro)
         self.grid.addWidget(self.criar_card("Qualidade da Safra (Recebido x Devolvido)", fig1), 0, 0)
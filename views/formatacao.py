@@ -0,0 +1,72 @@
+"""
+Formatação de valores para exibição.
+
+Models e DTOs trabalham com tipos nativos (date, Decimal); o texto só é
+gerado aqui, na hora de pintar a célula. Filtros, ordenação e exportação
+continuam usando os valores tipados, sem converter texto de volta.
+"""
+from datetime import date, datetime
+from decimal import Decimal, ROUND_HALF_UP
+
+CENTAVOS = Decimal("0.01")
+
+FORMATO_DATA = "%d/%m/%Y"
+
+
+def para_decimal(valor) -> Decimal:
+    """Converte o valor de um QDoubleSpinBox (float) em Decimal com centavos."""
+    if valor is None:
+        return Decimal("0.00")
+    if isinstance(valor, Decimal):
+        return valor.quantize(CENTAVOS, rounding=ROUND_HALF_UP)
+    return Decimal(str(valor)).quantize(CENTAVOS, rounding=ROUND_HALF_UP)
+
+
+def formatar_moeda(valor, prefixo="R$ ") -> str:
+    """Decimal -> 'R$ 1.234,56'. None vira 'R$ 0,00'."""
+    texto = f"{valor or 0:,.2f}".translate(str.maketrans(",.", ".,"))
+    return f"{prefixo}{texto}"
+
+
+def formatar_data(valor) -> str:
+    """date -> 'dd/mm/aaaa'. None vira ''."""
+    if valor is None:
+        return ""
+    if isinstance(valor, (date, datetime)):
+        return valor.strftime(FORMATO_DATA)
+    return str(valor)
+
+
+def formatar_celula(valor) -> str:
+    """Texto de exibição de qualquer valor de DTO, pelo tipo."""
+    if valor is None:
+        return ""
+    if isinstance(valor, Decimal):
+        return formatar_moeda(valor)
+    if isinstance(valor, (date, datetime)):
+        return formatar_data(valor)
+    return str(valor)
+
+
+def _ler_data(texto: str):
+    texto = texto.strip()
+    fmt = "%d/%m/%Y" if len(texto.split("/")[-1]) == 4 else "%d/%m/%y"
+    return datetime.strptime(texto, fmt).date()
+
+
+def interpretar_intervalo_datas(texto: str):
+    """
+    Lê um filtro 'dd/mm/aa - dd/mm/aa' (ou 'dd/mm/aaaa a dd/mm/aaaa').
+    Retorna (inicio, fim) ou None se o texto ainda não for um intervalo válido
+    (ex: enquanto o usuário digita).
+    """
+    if " a " in texto:
+        partes = texto.split(" a ")
+    else:
+        partes = texto.split("-")
+    if len(partes) != 2:
+        return None
+    try:
+        return _ler_data(partes[0]), _ler_data(partes[1])
+    except ValueError:
+        return None
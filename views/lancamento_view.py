@@ -1,4 +1,5 @@
 import sys
+from decimal import Decimal
 import qtawesome as qta
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, 
                                QPushButton, QFrame, QTableWidget, QTableWidgetItem, 
@@ -8,6 +9,7 @@ from PySide6.QtCore import Qt, QDate
 
 from controllers import LancamentoController
 from styles.lancamento_styles import LANCAMENTO_STYLES
+from views.formatacao import formatar_moeda, para_decimal
 
 class PageLancamento(QWidget):
     def __init__(self):
@@ -189,7 +191,7 @@ class PageLancamento(QWidget):
             return
 
         qtd = self.spin_qtd.value()
-        vlr_unit = self.spin_valor.value()
+        vlr_unit = para_decimal(self.spin_valor.value())
         
         if qtd <= 0:
              QMessageBox.warning(self, "Aviso", "A quantidade deve ser maior que zero.")
@@ -216,7 +218,7 @@ class PageLancamento(QWidget):
         total = qtd * vlr_unit
         
         tem_ressarc = self.chk_ressarcimento.isChecked()
-        vlr_ressarc = self.spin_vlr_ressarc.value() if tem_ressarc else 0.0
+        vlr_ressarc = para_decimal(self.spin_vlr_ressarc.value()) if tem_ressarc else Decimal("0.00")
 
         row = self.table_itens.rowCount()
         self.table_itens.insertRow(row)
@@ -226,17 +228,20 @@ class PageLancamento(QWidget):
             item.setTextAlignment(Qt.AlignCenter)
             return item
 
-        self.table_itens.setItem(row, 0, criar_item_centro(codigo))
+        item_codigo = criar_item_centro(codigo)
+        # Valores tipados guardados na linha; a coluna mostra só o texto formatado
+        item_codigo.setData(Qt.UserRole, (vlr_unit, vlr_ressarc))
+        self.table_itens.setItem(row, 0, item_codigo)
         self.table_itens.setItem(row, 1, criar_item_centro(qtd))
-        self.table_itens.setItem(row, 2, criar_item_centro(f"R$ {vlr_unit:.2f}"))
-        self.table_itens.setItem(row, 3, criar_item_centro(f"R$ {total:.2f}"))
+        self.table_itens.setItem(row, 2, criar_item_centro(formatar_moeda(vlr_unit)))
+        self.table_itens.setItem(row, 3, criar_item_centro(formatar_moeda(total)))
         
         status_ressarc = "SIM" if tem_ressarc else "NÃO"
         item_status = criar_item_centro(status_ressarc)
         item_status.setForeground(Qt.green if tem_ressarc else Qt.gray)
         self.table_itens.setItem(row, 4, item_status)
         
-        self.table_itens.setItem(row, 5, criar_item_centro(f"R$ {vlr_ressarc:.2f}"))
+        self.table_itens.setItem(row, 5, criar_item_centro(formatar_moeda(vlr_ressarc)))
 
         self.txt_cod_item.clear()
         self.spin_qtd.setValue(0)
@@ -269,11 +274,13 @@ class PageLancamento(QWidget):
         
         lista_itens = []
         for row in range(qtd_itens):
+            item_codigo = self.table_itens.item(row, 0)
+            vlr_unit, vlr_ressarc = item_codigo.data(Qt.UserRole)
             lista_itens.append({
-                'codigo': self.table_itens.item(row, 0).text(),
+                'codigo': item_codigo.text(),
                 'qtd': self.table_itens.item(row, 1).text(),
-                'valor': float(self.table_itens.item(row, 2).text().replace("R$ ", "").replace(",", ".")),
-                'ressarcimento': float(self.table_itens.item(row, 5).text().replace("R$ ", "").replace(",", "."))
+                'valor': vlr_unit,
+                'ressarcimento': vlr_ressarc
             })
             
         try:
@@ -1,15 +1,17 @@
 import sys
 import math
-from datetime import date, datetime # Importado datetime para conversão
+from datetime import date
 import qtawesome as qta
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, 
                                QFrame, QTableWidget, QTableWidgetItem, 
                                QFileDialog, QMessageBox, QAbstractItemView,
                                QDialog, QDateEdit, QLineEdit)
-from PySide6.QtCore import Qt, QPoint
+from PySide6.QtCore import Qt, QPoint, QTimer
 
 from controllers.relatorio_controller import RelatorioController
+from controllers.alteracoes import get_feed
 from styles.relatorio_styles import RELATORIO_STYLES
+from views.formatacao import formatar_celula, interpretar_intervalo_datas
 
 class PageRelatorio(QWidget):
     def __init__(self):
@@ -21,22 +23,59 @@ class PageRelatorio(QWidget):
         self.setWindowTitle("Relatório Geral de Garantias")
         self.setStyleSheet(RELATORIO_STYLES)
         
-        self.todos_dados = []
-        self.dados_filtrados = []
+        # Páginas buscadas no servidor sob demanda, já filtradas (paginação por chave)
+        self.paginas = {}          # página -> DTOs
+        self.chaves = {}           # página -> chave da última linha (onde começa a seguinte)
+        self.tem_mais = {}         # página -> existe página seguinte
+        self.tarefas_pagina = {}   # página -> Tarefa em andamento (carga ou pré-busca)
+        self.total_estimado = None
+        self.total_exato = None    # conhecido ao chegar na última página
+        self.tarefa_estimativa = None
+        self.tarefa_exportacao = None
+        self.tarefas_alteracao = {}   # leitura de itens avisados pelo feed -> ids que ela cobre
         
         self.pagina_atual = 1
         self.itens_por_pagina = 50 
-        self.total_paginas = 1
 
         self.filtros_widgets = {}
+        # Filtros aplicados na consulta atual: {campo do DTO: texto | (inicio, fim) | None}
+        self.filtros_atuais = {}
+
+        # A consulta só é refeita quando a digitação para por um instante
+        self.timer_filtro = QTimer(self)
+        self.timer_filtro.setSingleShot(True)
+        self.timer_filtro.setInterval(300)
+        self.timer_filtro.timeout.connect(self.processar_filtragem)
+
+        # Campo do DTO de cada coluna (mesma ordem de montar_linha)
+        self.campos = [
+            "data_lancamento", "data_recebimento", "data_analise", "status", "codigo_analise",
+            "cnpj_remetente", "nome_remetente",
+            "cnpj", "nome_cliente", "grupo_cliente", "cidade", "estado", "regiao",
+            "data_emissao", "nf_entrada",
+            "codigo_item", "grupo_item", "numero_serie", "codigo_avaria", "descricao_avaria",
+            "valor_item", "ressarcimento",
+            "data_retorno", "nf_retorno", "tipo_retorno"
+        ]
 
         # Mapeamento dos índices das colunas que são DATAS
         # 0=Lançamento, 1=Recebimento, 2=Análise, 13=Emissão, 22=Retorno
         self.colunas_data = [0, 1, 2, 13, 22]
 
+        # Itens antigos e encerrados ficam no arquivo; a carga só os traz quando
+        # algum filtro de data alcança o período arquivado
+        self.incluir_arquivo = False
+        self.campos_limite_arquivo = {"data_lancamento": "lancamento", "data_recebimento": "recebimento",
+                                      "data_analise": "analise", "data_emissao": "emissao",
+                                      "data_retorno": "retorno"}
+
         self.setup_ui()
         self.carregar_dados()
 
+        # Itens alterados (nesta ou em outra estação) entram nas páginas já carregadas,
+        # avisados só depois que a carga do fato (esquema estrela) os incluiu
+        get_feed().fato_alterado.connect(self.receber_alteracoes)
+
     def setup_ui(self):
         main_layout = QVBoxLayout(self)
         main_layout.setContentsMargins(20, 20, 20, 20)
@@ -106,6 +145,16 @@ class PageRelatorio(QWidget):
         self.lbl_paginacao.setAlignment(Qt.AlignCenter)
         pag_layout.addWidget(self.lbl_paginacao)
 
+        # Só aparece enquanto uma consulta longa (carga da página ou exportação) está no banco
+        self.btn_cancelar = QPushButton(" Cancelar")
+        self.btn_cancelar.setObjectName("btn_pag")
+        self.btn_cancelar.setCursor(Qt.PointingHandCursor)
+        self.btn_cancelar.setIcon(qta.icon('fa5s.times', color='white'))
+        self.btn_cancelar.setToolTip("Interromper a consulta em andamento")
+        self.btn_cancelar.clicked.connect(self.cancelar_consulta)
+        self.btn_cancelar.setVisible(False)
+        pag_layout.addWidget(self.btn_cancelar)
+
         pag_layout.addStretch()
 
         self.btn_excel = QPushButton(" Exportar Excel") 
@@ -147,162 +196,265 @@ class PageRelatorio(QWidget):
                 }
                 QLineEdit:focus { border: 1px solid #3a5f8a; }
             """)
-            inp.textChanged.connect(self.processar_filtragem)
+            inp.textChanged.connect(self.timer_filtro.start)
             self.filtros_widgets[col_idx] = inp
             self.table.setCellWidget(0, col_idx, inp)
 
-    def carregar_dados(self):
-        try:
-            lista_dtos = self.controller.buscar_dados()
-            self.todos_dados = []
-            
-            for item in lista_dtos:
-                def fmt_moeda(val): 
-                    if val is None: return "R$ 0,00"
-                    return f"R$ {val:.2f}"
-
-                linha = [
-                    item.data_lancamento,     # 0
-                    item.data_recebimento,    # 1
-                    item.data_analise,        # 2
-                    item.status,              # 3
-                    item.codigo_analise,      # 4
-                    item.cnpj_remetente,      # 5
-                    item.nome_remetente,      # 6
-                    item.cnpj,                # 7
-                    item.nome_cliente,        # 8
-                    item.grupo_cliente,       # 9
-                    item.cidade,              # 10
-                    item.estado,              # 11
-                    item.regiao,              # 12
-                    item.data_emissao,        # 13
-                    item.nf_entrada,          # 14
-                    item.codigo_item,         # 15
-                    item.grupo_item,          # 16
-                    item.numero_serie,        # 17
-                    item.codigo_avaria,       # 18
-                    item.descricao_avaria,    # 19
-                    fmt_moeda(item.valor_item),    # 20
-                    fmt_moeda(item.ressarcimento), # 21
-                    item.data_retorno,        # 22
-                    item.nf_retorno,          # 23
-                    item.tipo_retorno         # 24
-                ]
-                self.todos_dados.append(linha)
-
-            self.dados_filtrados = list(self.todos_dados)
-            self.calcular_paginacao()
+    def montar_linha(self, item):
+        # Valores tipados (date/Decimal): o texto só é gerado ao pintar a célula
+        return [
+            item.data_lancamento,     # 0
+            item.data_recebimento,    # 1
+            item.data_analise,        # 2
+            item.status,              # 3
+            item.codigo_analise,      # 4
+            item.cnpj_remetente,      # 5
+            item.nome_remetente,      # 6
+            item.cnpj,                # 7
+            item.nome_cliente,        # 8
+            item.grupo_cliente,       # 9
+            item.cidade,              # 10
+            item.estado,              # 11
+            item.regiao,              # 12
+            item.data_emissao,        # 13
+            item.nf_entrada,          # 14
+            item.codigo_item,         # 15
+            item.grupo_item,          # 16
+            item.numero_serie,        # 17
+            item.codigo_avaria,       # 18
+            item.descricao_avaria,    # 19
+            item.valor_item,          # 20
+            item.ressarcimento,       # 21
+            item.data_retorno,        # 22
+            item.nf_retorno,          # 23
+            item.tipo_retorno         # 24
+        ]
+
+    def cancelar_cargas(self):
+        for tarefa in [self.tarefa_estimativa, *self.tarefas_pagina.values(), *self.tarefas_alteracao]:
+            if tarefa:
+                tarefa.cancelar()
+        self.tarefa_estimativa = None
+        self.tarefas_pagina = {}
+        self.tarefas_alteracao = {}
+        self.atualizar_botao_cancelar()
+
+    def carregar_dados(self, atualizar=True):
+        """
+        Refaz a consulta com os filtros atuais a partir da primeira página.
+        atualizar: relê antes os limites do arquivo (abertura da tela, recarga completa).
+        """
+        # Uma recarga nova cancela a anterior (ex: trocar de página e voltar)
+        self.cancelar_cargas()
+        self.paginas = {}
+        self.chaves = {}
+        self.tem_mais = {}
+        self.total_estimado = None
+        self.total_exato = None
+        self.pagina_atual = 1
+        self.lbl_paginacao.setText("Carregando...")
+
+        # Só a primeira página: o tempo de abertura não depende do tamanho da base
+        self.buscar_pagina(1, atualizar=atualizar)
+        self.buscar_estimativa()
+
+    def buscar_pagina(self, pagina, atualizar=False):
+        if pagina in self.paginas or pagina in self.tarefas_pagina:
+            return
+        apos = self.chaves.get(pagina - 1) if pagina > 1 else None
+        tarefa = self.controller.buscar_pagina_async(apos, self.incluir_arquivo, self.itens_por_pagina,
+                                                     atualizar, self.filtros_atuais)
+        tarefa.concluido.connect(lambda resultado, pagina=pagina: self.receber_pagina(pagina, resultado))
+        tarefa.erro.connect(lambda mensagem, pagina=pagina: self.falha_pagina(pagina, mensagem))
+        self.tarefas_pagina[pagina] = tarefa
+        tarefa.iniciar()
+        self.atualizar_botao_cancelar()
+
+    def receber_pagina(self, pagina, resultado):
+        self.tarefas_pagina.pop(pagina, None)
+        self.atualizar_botao_cancelar()
+        dtos, tem_mais = resultado
+        self.paginas[pagina] = dtos
+        self.tem_mais[pagina] = tem_mais
+        if dtos:
+            self.chaves[pagina] = self.controller.chave_pagina(dtos)
+        if not tem_mais:
+            self.total_exato = (pagina - 1) * self.itens_por_pagina + len(dtos)
+        if pagina == self.pagina_atual:
             self.atualizar_tabela()
-            
-        except Exception as e:
-            print(f"Erro ao carregar dados na View: {e}")
-            import traceback
-            traceback.print_exc()
 
-    # --- LÓGICA DE FILTRO ATUALIZADA ---
-    def processar_filtragem(self):
-        filtros_ativos = {}
-        for col_idx, widget in self.filtros_widgets.items():
-            texto = widget.text().lower().strip()
-            if texto:
-                filtros_ativos[col_idx] = texto
-        
-        if not filtros_ativos:
-            self.dados_filtrados = list(self.todos_dados)
+    def falha_pagina(self, pagina, mensagem):
+        self.tarefas_pagina.pop(pagina, None)
+        self.atualizar_botao_cancelar()
+        self.falha_carga(mensagem)
+
+    def atualizar_botao_cancelar(self):
+        esperando = self.tarefa_exportacao is not None or self.pagina_atual in self.tarefas_pagina
+        self.btn_cancelar.setVisible(esperando)
+
+    def cancelar_consulta(self):
+        """Interrompe no servidor a exportação ou a carga da página em tela."""
+        if self.tarefa_exportacao:
+            self.tarefa_exportacao.cancelar()
+            self.tarefa_exportacao = None
+            self.btn_excel.setDisabled(False)
+        tarefa = self.tarefas_pagina.pop(self.pagina_atual, None)
+        if tarefa:
+            tarefa.cancelar()
+        self.atualizar_botao_cancelar()
+        if self.pagina_atual in self.paginas:
+            self.atualizar_rodape()
+        else:
+            # Fica a página anterior na tela; dá para voltar ou refazer o filtro
+            self.lbl_paginacao.setText("Consulta cancelada")
+            self.btn_prev.setDisabled(self.pagina_atual == 1)
+            self.btn_next.setDisabled(True)
+
+    def falha_carga(self, mensagem):
+        print(f"Erro ao carregar dados na View: {mensagem}")
+        self.lbl_paginacao.setText("Erro ao carregar dados")
+
+    def buscar_estimativa(self):
+        tarefa = self.controller.estimar_total_async(self.incluir_arquivo, self.filtros_atuais)
+        tarefa.concluido.connect(self.receber_estimativa)
+        tarefa.erro.connect(lambda mensagem: print(f"Erro ao estimar o total do relatório: {mensagem}"))
+        self.tarefa_estimativa = tarefa
+        tarefa.iniciar()
+
+    def receber_estimativa(self, resultado):
+        self.tarefa_estimativa = None
+        total, exato = resultado
+        if exato:
+            self.total_exato = total
         else:
-            self.dados_filtrados = []
-            for linha in self.todos_dados:
-                match = True
-                for col_idx, texto_filtro in filtros_ativos.items():
-                    valor_celula = str(linha[col_idx]).lower() if linha[col_idx] else ""
-                    
-                    # Verifica se é coluna de data e tenta lógica de range
-                    if col_idx in self.colunas_data and ("-" in texto_filtro or " a " in texto_filtro):
-                        is_match_data = self.verificar_range_data(valor_celula, texto_filtro)
-                        if not is_match_data:
-                            match = False
-                            break
-                    else:
-                        # Lógica padrão (texto contém texto)
-                        if texto_filtro not in valor_celula:
-                            match = False
-                            break
-                if match:
-                    self.dados_filtrados.append(linha)
+            self.total_estimado = total
+        if self.pagina_atual in self.paginas:
+            self.atualizar_rodape()
 
-        self.pagina_atual = 1
-        self.calcular_paginacao()
-        self.atualizar_tabela()
+    # --- ALTERAÇÕES AVISADAS PELO FEED ---
+    def receber_alteracoes(self, tabela, ids):
+        if tabela != "itens_notas":
+            return
+        if ids is None:
+            self.carregar_dados()
+            return
+        # Uma leitura mais antiga dos mesmos itens poderia terminar depois com dados velhos
+        for anterior, ids_anterior in list(self.tarefas_alteracao.items()):
+            if not ids_anterior.isdisjoint(ids):
+                anterior.cancelar()
+                del self.tarefas_alteracao[anterior]
+                ids = ids | ids_anterior
+        tarefa = self.controller.buscar_itens_async(ids, self.incluir_arquivo, self.filtros_atuais)
+        tarefa.concluido.connect(lambda atuais, ids=ids, tarefa=tarefa: self.aplicar_alteracoes(tarefa, ids, atuais))
+        tarefa.erro.connect(lambda mensagem, tarefa=tarefa: self.falha_alteracao(tarefa, mensagem))
+        self.tarefas_alteracao[tarefa] = ids
+        tarefa.iniciar()
+
+    def aplicar_alteracoes(self, tarefa, ids, atuais):
+        if self.tarefas_alteracao.pop(tarefa, None) is None:
+            return  # Substituída por uma leitura mais nova ou pela recarga da consulta
+        alteradas, saldo = self.controller.mesclar_alteracoes(self.paginas, self.chaves, self.tem_mais, ids, atuais)
+        if self.total_exato is not None:
+            self.total_exato += saldo
+        elif self.total_estimado is not None:
+            self.total_estimado += saldo
+        if self.pagina_atual in alteradas:
+            self.atualizar_tabela()
+        elif self.pagina_atual in self.paginas:
+            self.atualizar_rodape()
 
-    def verificar_range_data(self, data_celula_str, filtro_str):
-        """
-        Tenta comparar data_celula (dd/mm/yyyy) com um range no filtro (ex: '01/01/2023 - 31/01/2023')
-        Retorna True se estiver dentro, False se fora.
-        Se o filtro estiver mal formatado, retorna False (ou True se quiser fallback).
-        """
-        try:
-            # 1. Converte a data da célula
-            # data_celula_str vem do banco, ex: "28/01/2026"
-            dt_celula = datetime.strptime(data_celula_str.strip(), "%d/%m/%Y").date()
-            
-            # 2. Separa o filtro (aceita "-" ou " a ")
-            if " a " in filtro_str:
-                partes = filtro_str.split(" a ")
-            else:
-                partes = filtro_str.split("-")
-            
-            if len(partes) != 2:
-                return False # Formato inválido, não bate
+    def falha_alteracao(self, tarefa, mensagem):
+        self.tarefas_alteracao.pop(tarefa, None)
+        print(f"Erro ao atualizar itens do relatório: {mensagem}")
 
-            ini_str = partes[0].strip()
-            fim_str = partes[1].strip()
-            
-            # 3. Converte as datas do filtro
-            # Tenta formatos com 4 digitos no ano ou 2 digitos
-            fmt = "%d/%m/%Y" if len(ini_str.split("/")[-1]) == 4 else "%d/%m/%y"
-            dt_ini = datetime.strptime(ini_str, fmt).date()
-            
-            fmt = "%d/%m/%Y" if len(fim_str.split("/")[-1]) == 4 else "%d/%m/%y"
-            dt_fim = datetime.strptime(fim_str, fmt).date()
-            
-            # 4. Compara
-            return dt_ini <= dt_celula <= dt_fim
-
-        except ValueError:
-            # Se deu erro de conversão (data inválida ou incompleta), 
-            # assumimos que não é um range válido ainda (enquanto o user digita)
-            # Retornamos False para esconder, ou poderiamos tentar fallback textual.
-            return False
-        except Exception:
-            return False
-
-    def calcular_paginacao(self):
-        total_itens = len(self.dados_filtrados)
-        self.total_paginas = math.ceil(total_itens / self.itens_por_pagina)
-        if self.total_paginas < 1: self.total_paginas = 1
+    # --- FILTROS (APLICADOS NO BANCO) ---
+    def montar_filtros(self):
+        """Linha de filtros -> {campo: texto | (inicio, fim) | None}, com as datas já interpretadas."""
+        filtros = {}
+        for col_idx, widget in self.filtros_widgets.items():
+            texto = widget.text().lower().strip()
+            if not texto:
+                continue
+            if col_idx in self.colunas_data and ("-" in texto or " a " in texto):
+                # Intervalo incompleto/inválido (usuário ainda digitando) vira None e esconde tudo
+                filtros[self.campos[col_idx]] = interpretar_intervalo_datas(texto)
+            else:
+                filtros[self.campos[col_idx]] = texto
+        return filtros
 
+    def processar_filtragem(self):
+        filtros = self.montar_filtros()
+        if filtros == self.filtros_atuais:
+            return
+        self.filtros_atuais = filtros
+        # Recalculado a cada filtro: o histórico só é lido enquanto o intervalo o alcança
+        self.incluir_arquivo = self.filtro_alcanca_arquivo()
+        self.carregar_dados(atualizar=False)
+
+    def filtro_alcanca_arquivo(self):
+        """True se um intervalo de datas começa dentro do período já arquivado."""
+        limites = self.controller.limites_arquivo
+        for campo, chave_limite in self.campos_limite_arquivo.items():
+            limite = limites.get(chave_limite)
+            intervalo = self.filtros_atuais.get(campo)
+            if limite is not None and isinstance(intervalo, tuple) and intervalo[0] <= limite:
+                return True
+        return False
+
+    # --- TABELA E PAGINAÇÃO ---
     def atualizar_tabela(self):
-        inicio = (self.pagina_atual - 1) * self.itens_por_pagina
-        fim = inicio + self.itens_por_pagina
-        dados_da_pagina = self.dados_filtrados[inicio:fim]
+        dados_da_pagina = self.paginas.get(self.pagina_atual)
+        if dados_da_pagina is None:
+            # Ainda chegando: mantém a página anterior na tela até lá
+            self.buscar_pagina(self.pagina_atual)
+            self.atualizar_botao_cancelar()
+            self.lbl_paginacao.setText("Carregando...")
+            self.btn_prev.setDisabled(True)
+            self.btn_next.setDisabled(True)
+            return
+        # Pré-busca da seguinte; as distantes saem do cache (as chaves ficam)
+        if self.tem_mais.get(self.pagina_atual):
+            self.buscar_pagina(self.pagina_atual + 1)
+        for pagina in [p for p in self.paginas if abs(p - self.pagina_atual) > 5]:
+            del self.paginas[pagina]
 
         qtd_linhas_necessarias = 1 + len(dados_da_pagina)
         self.table.setRowCount(qtd_linhas_necessarias)
 
-        for i, row_data in enumerate(dados_da_pagina):
+        for i, dto in enumerate(dados_da_pagina):
             table_row = i + 1 
-            for col_idx, valor in enumerate(row_data):
-                item = QTableWidgetItem(str(valor) if valor is not None else "")
+            for col_idx, valor in enumerate(self.montar_linha(dto)):
+                item = QTableWidgetItem(formatar_celula(valor))
                 item.setTextAlignment(Qt.AlignCenter)
                 item.setFlags(Qt.ItemIsEnabled | Qt.ItemIsSelectable)
                 self.table.setItem(table_row, col_idx, item)
 
-        self.lbl_paginacao.setText(f"Página {self.pagina_atual} de {self.total_paginas} (Total: {len(self.dados_filtrados)})")
+        self.atualizar_rodape()
+
+    def texto_total(self):
+        """Total exato quando conhecido (contado ou última página alcançada); senão estimado."""
+        if self.total_exato is not None:
+            return str(self.total_exato)
+        conhecidas = max(self.tem_mais, default=0) * self.itens_por_pagina + 1
+        return f"~{max(self.total_estimado or 0, conhecidas)}"
+
+    def atualizar_rodape(self):
+        self.atualizar_botao_cancelar()
+        historico = " + arquivo" if self.incluir_arquivo else ""
+        total = self.texto_total()
+        if self.tem_mais.get(self.pagina_atual):
+            estimado = int(total.lstrip("~"))
+            paginas = max(math.ceil(estimado / self.itens_por_pagina), self.pagina_atual + 1)
+            if self.total_exato is None:
+                paginas = f"~{paginas}"
+        else:
+            paginas = self.pagina_atual
+        self.lbl_paginacao.setText(f"Página {self.pagina_atual} de {paginas} (Total: {total}{historico})")
         self.btn_prev.setDisabled(self.pagina_atual == 1)
-        self.btn_next.setDisabled(self.pagina_atual >= self.total_paginas)
+        self.btn_next.setDisabled(not self.tem_mais.get(self.pagina_atual))
 
     def avancar_pagina(self):
-        if self.pagina_atual < self.total_paginas:
+        if self.tem_mais.get(self.pagina_atual):
             self.pagina_atual += 1
             self.atualizar_tabela()
 
@@ -313,35 +465,55 @@ class PageRelatorio(QWidget):
 
     def abrir_formulario_exportacao(self):
         # 1. Verifica se tem algum dado para exportar
-        if not self.dados_filtrados:
+        if not self.paginas.get(self.pagina_atual):
             QMessageBox.warning(self, "Aviso", "Não há dados na tela para exportar.")
             return
 
-        # 2. Verifica se existe algum filtro ativo
-        tem_filtro_ativo = False
-        for widget in self.filtros_widgets.values():
-            if widget.text().strip():
-                tem_filtro_ativo = True
-                break
-        
-        # 3. Se NÃO tiver filtro, pede confirmação
-        if not tem_filtro_ativo:
+        # 2. Se NÃO tiver filtro, pede confirmação
+        if not self.filtros_atuais:
             resp = QMessageBox.question(
                 self, 
                 "Exportar Tudo?", 
-                f"Nenhum filtro aplicado. Deseja exportar TODOS os registros ({len(self.dados_filtrados)} linhas)?",
+                f"Nenhum filtro aplicado. Deseja exportar TODOS os registros ({self.texto_total()} linhas)?",
                 QMessageBox.Yes | QMessageBox.No
             )
             if resp == QMessageBox.No:
                 return
 
-        # 4. Seleciona onde salvar
+        # 3. Seleciona onde salvar
         nome_padrao = f"Relatorio_Garantias_{date.today()}.xlsx"
         path, _ = QFileDialog.getSaveFileName(self, "Salvar Excel", nome_padrao, "Excel Files (*.xlsx)")
         
         if path:
-            sucesso = self.controller.exportar_excel(path, self.dados_filtrados, self.colunas)
-            if sucesso:
-                QMessageBox.information(self, "Sucesso", "Planilha exportada com sucesso!")
-            else:
-                QMessageBox.critical(self, "Erro", "Falha ao gerar o arquivo Excel.")
\ No newline at end of file
+            # Só as páginas visitadas estão na memória: busca o resultado filtrado inteiro
+            self.exportar_tudo(path)
+
+    def exportar_tudo(self, path):
+        linhas = []
+        self.btn_excel.setDisabled(True)
+        self.lbl_paginacao.setText("Exportando...")
+        self.tarefa_exportacao = self.controller.buscar_dados_async(self.incluir_arquivo, self.filtros_atuais)
+        self.tarefa_exportacao.lote.connect(lambda lote: linhas.extend(self.montar_linha(item) for item in lote))
+        self.tarefa_exportacao.concluido.connect(lambda _: self.concluir_exportacao(path, linhas))
+        self.tarefa_exportacao.erro.connect(self.falha_exportacao)
+        self.tarefa_exportacao.iniciar()
+        self.atualizar_botao_cancelar()
+
+    def falha_exportacao(self, mensagem):
+        self.tarefa_exportacao = None
+        self.btn_excel.setDisabled(False)
+        self.atualizar_botao_cancelar()
+        self.atualizar_tabela()
+        QMessageBox.critical(self, "Erro", f"Falha ao buscar os dados: {mensagem}")
+
+    def concluir_exportacao(self, path, linhas):
+        if self.tarefa_exportacao:
+            self.tarefa_exportacao = None
+            self.btn_excel.setDisabled(False)
+            self.atualizar_botao_cancelar()
+            self.atualizar_tabela()
+        sucesso = self.controller.exportar_excel(path, linhas, self.colunas)
+        if sucesso:
+            QMessageBox.information(self, "Sucesso", "Planilha exportada com sucesso!")
+        else:
+            QMessageBox.critical(self, "Erro", "Falha ao gerar o arquivo Excel.")
@@ -1,4 +1,6 @@
 import sys
+from datetime import date
+from decimal import Decimal
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, 
                                QComboBox, QPushButton, QFrame, QTableWidget, QTableWidgetItem, 
                                QHeaderView, QDoubleSpinBox, QMessageBox, QRadioButton, 
@@ -7,20 +9,29 @@ from PySide6.QtCore import Qt, QDate
 from PySide6.QtGui import QColor
 
 from controllers.retorno_controller import RetornoController
+from controllers.alteracoes import get_feed
 from dtos.retorno_dto import RetornoHeaderDTO, ItemPendenteDTO
 from styles.common import get_date_edit_style
 from styles.retorno_styles import RETORNO_STYLES
 from styles.theme import *
+from views.formatacao import formatar_data, formatar_moeda, para_decimal
 
 class PageRetorno(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.controller = RetornoController()
         self.itens_carregados: list[ItemPendenteDTO] = []
+        self.tarefa_busca = None
+        self.busca_atual = None   # (termo, modo, notas) da tabela exibida
+        self.tarefa_alteracao = None
+        self.ids_alteracao = None
         
         self.setStyleSheet(RETORNO_STYLES + get_date_edit_style("views/icons/temp_calendar_icon.png"))
         self.init_ui()
 
+        # Saldos que mudam (outro retorno, ajuste, exclusão) são aplicados à tabela exibida
+        get_feed().alterado.connect(self.receber_alteracoes)
+
     def init_ui(self):
         layout = QVBoxLayout(self)
         layout.setSpacing(15)
@@ -139,13 +150,22 @@ class PageRetorno(QWidget):
         hbox_row2.addWidget(self.txt_busca_notas, stretch=1) 
 
         # C) Botão Buscar
-        btn_buscar = QPushButton("Buscar Pendências")
-        btn_buscar.setObjectName("btn_primary")
-        btn_buscar.setCursor(Qt.PointingHandCursor)
-        btn_buscar.setFixedWidth(180)
-        btn_buscar.setFixedHeight(34)
-        btn_buscar.clicked.connect(self.buscar)
-        hbox_row2.addWidget(btn_buscar)
+        self.btn_buscar = QPushButton("Buscar Pendências")
+        self.btn_buscar.setObjectName("btn_primary")
+        self.btn_buscar.setCursor(Qt.PointingHandCursor)
+        self.btn_buscar.setFixedWidth(180)
+        self.btn_buscar.setFixedHeight(34)
+        self.btn_buscar.clicked.connect(self.buscar)
+        hbox_row2.addWidget(self.btn_buscar)
+
+        # D) Cancelar (só durante a busca): interrompe a consulta no servidor
+        self.btn_cancelar_busca = QPushButton("Cancelar")
+        self.btn_cancelar_busca.setObjectName("btn_secondary")
+        self.btn_cancelar_busca.setCursor(Qt.PointingHandCursor)
+        self.btn_cancelar_busca.setFixedHeight(34)
+        self.btn_cancelar_busca.clicked.connect(self.cancelar_busca)
+        self.btn_cancelar_busca.setVisible(False)
+        hbox_row2.addWidget(self.btn_cancelar_busca)
 
         vbox.addLayout(hbox_row2)
         parent_layout.addWidget(frame)
@@ -193,8 +213,49 @@ class PageRetorno(QWidget):
             raw_notas = self.txt_busca_notas.text()
             lista_notas = [n.strip() for n in raw_notas.replace(",", " ").split() if n.strip()]
 
-        # 2. Busca
-        self.itens_carregados = self.controller.buscar_pendencias(termo_clean, modo, lista_notas)
+        # 2. Busca (fora da thread da interface; uma busca nova cancela a anterior)
+        if self.tarefa_busca:
+            self.tarefa_busca.cancelar()
+        if self.tarefa_alteracao:
+            self.tarefa_alteracao.cancelar()
+            self.tarefa_alteracao = None
+
+        self.btn_buscar.setText("Buscando...")
+        self.btn_cancelar_busca.setVisible(True)
+        self.busca_atual = (termo_clean, modo, lista_notas)
+        self.tarefa_busca = self.controller.buscar_pendencias_async(termo_clean, modo, lista_notas)
+        self.tarefa_busca.concluido.connect(self.receber_busca)
+        self.tarefa_busca.erro.connect(self.falha_busca)
+        self.tarefa_busca.iniciar()
+
+    def focar_cliente(self, cnpj, numero_nota=None):
+        """Busca as pendências de um cliente (e nota) escolhido na busca global."""
+        if self.combo_tipo.currentText() == "Itens de Giro":
+            self.rb_cnpj.setChecked(True)
+        self.atualizar_interface_dinamica()
+        self.txt_remetente_dinamico.setText(''.join(filter(str.isdigit, cnpj or '')))
+        self.txt_busca_notas.setText(numero_nota or "")
+        self.buscar()
+
+    def cancelar_busca(self):
+        if self.tarefa_busca:
+            self.tarefa_busca.cancelar()
+        self.tarefa_busca = None
+        self.busca_atual = None
+        self.btn_buscar.setText("Buscar Pendências")
+        self.btn_cancelar_busca.setVisible(False)
+
+    def falha_busca(self, mensagem):
+        self.tarefa_busca = None
+        self.btn_buscar.setText("Buscar Pendências")
+        self.btn_cancelar_busca.setVisible(False)
+        QMessageBox.critical(self, "Erro", f"Erro ao buscar pendências: {mensagem}")
+
+    def receber_busca(self, itens):
+        self.tarefa_busca = None
+        self.btn_buscar.setText("Buscar Pendências")
+        self.btn_cancelar_busca.setVisible(False)
+        self.itens_carregados = itens
 
         # 3. Validação de Retorno Vazio
         if not self.itens_carregados:
@@ -290,15 +351,18 @@ class PageRetorno(QWidget):
         layout.addWidget(wid)
         return val
 
-    def popular_tabela(self):
+    def popular_tabela(self, estado=None):
+        """estado: {id do item: (marcado, código digitado)} a manter nas linhas que continuam."""
+        estado = estado or {}
         self.table.blockSignals(True)
         self.table.setRowCount(0)
         for i, dto in enumerate(self.itens_carregados):
             self.table.insertRow(i)
+            marcado, codigo = estado.get(dto.id, (False, str(dto.codigo_analise)))
             
             chk = QTableWidgetItem()
             chk.setFlags(Qt.ItemIsUserCheckable | Qt.ItemIsEnabled | Qt.ItemIsSelectable)
-            chk.setCheckState(Qt.Unchecked)
+            chk.setCheckState(Qt.Checked if marcado else Qt.Unchecked)
             chk.setData(Qt.UserRole, dto)
             self.table.setItem(i, 0, chk)
             
@@ -307,8 +371,7 @@ class PageRetorno(QWidget):
             item_nf.setFlags(item_nf.flags() ^ Qt.ItemIsEditable)
             self.table.setItem(i, 1, item_nf)
 
-            data_s = dto.data_nota_origem.strftime("%d/%m/%Y") if hasattr(dto.data_nota_origem, 'strftime') else str(dto.data_nota_origem)
-            item_data = QTableWidgetItem(data_s)
+            item_data = QTableWidgetItem(formatar_data(dto.data_nota_origem))
             item_data.setFlags(item_data.flags() ^ Qt.ItemIsEditable)
             self.table.setItem(i, 2, item_data)
 
@@ -320,25 +383,67 @@ class PageRetorno(QWidget):
             item_cli.setFlags(item_cli.flags() ^ Qt.ItemIsEditable)
             self.table.setItem(i, 4, item_cli)
             
-            val = QTableWidgetItem(f"{dto.saldo_financeiro:.2f}")
+            val = QTableWidgetItem(formatar_moeda(dto.saldo_financeiro, prefixo=""))
             val.setForeground(QColor(COLOR_INFO))
             val.setFlags(val.flags() ^ Qt.ItemIsEditable)
             self.table.setItem(i, 5, val)
             
             # Coluna editável: Código de Análise
-            cod_analise = QTableWidgetItem(str(dto.codigo_analise)) 
+            cod_analise = QTableWidgetItem(codigo) 
             self.table.setItem(i, 6, cod_analise)
             
         self.table.blockSignals(False)
         self.recalcular_totais()
 
+    # --- ALTERAÇÕES AVISADAS PELO FEED ---
+    def receber_alteracoes(self, tabela, ids):
+        if tabela != "itens_notas" or self.busca_atual is None or self.tarefa_busca:
+            return
+        if self.tarefa_alteracao:
+            # Uma leitura por vez: a nova cobre também os ids da que foi cancelada
+            ids = None if ids is None or self.ids_alteracao is None else ids | self.ids_alteracao
+            self.tarefa_alteracao.cancelar()
+        termo, modo, lista_notas = self.busca_atual
+        tarefa = self.controller.buscar_pendencias_async(termo, modo, lista_notas, ids)
+        tarefa.concluido.connect(lambda atuais, tarefa=tarefa, ids=ids: self.aplicar_alteracoes(tarefa, ids, atuais))
+        tarefa.erro.connect(lambda mensagem: print(f"Erro ao atualizar pendências: {mensagem}"))
+        self.tarefa_alteracao = tarefa
+        self.ids_alteracao = ids
+        tarefa.iniciar()
+
+    def aplicar_alteracoes(self, tarefa, ids, atuais):
+        """
+        Troca os itens avisados pelos dados atuais (os que zeraram o saldo saem),
+        mantendo marcação e código digitado das linhas que continuam.
+        """
+        if tarefa is not self.tarefa_alteracao:
+            return
+        self.tarefa_alteracao = None
+
+        estado = {}
+        for r in range(self.table.rowCount()):
+            chk = self.table.item(r, 0)
+            estado[chk.data(Qt.UserRole).id] = (chk.checkState() == Qt.Checked, self.table.item(r, 6).text())
+
+        if ids is None:
+            itens = list(atuais)
+        else:
+            itens = [dto for dto in self.itens_carregados if dto.id not in ids] + list(atuais)
+            # Mesma ordem da busca (data da nota); sort estável mantém a ordem das demais
+            itens.sort(key=lambda dto: (dto.data_nota_origem is None, dto.data_nota_origem or date.min))
+        self.itens_carregados = itens
+
+        rolagem = self.table.verticalScrollBar().value()
+        self.popular_tabela(estado)
+        self.table.verticalScrollBar().setValue(rolagem)
+
     def on_table_change(self, item):
         # Monitora Checkbox (0) e Código de Análise (6)
         if item.column() in [0, 6]: self.recalcular_totais()
 
     def recalcular_totais(self):
-        val_nota = self.spin_valor_retorno.value()
-        total_sel = 0.0
+        val_nota = para_decimal(self.spin_valor_retorno.value())
+        total_sel = Decimal("0.00")
         linhas_marcadas = 0
         
         for r in range(self.table.rowCount()):
@@ -357,12 +462,12 @@ class PageRetorno(QWidget):
                 total_sel += dto.valor_a_abater
 
         diff = val_nota - total_sel
-        self.lbl_total_nota.setText(f"R$ {val_nota:,.2f}")
-        self.lbl_total_sel.setText(f"R$ {total_sel:,.2f}")
-        self.lbl_diff.setText(f"R$ {diff:,.2f}")
+        self.lbl_total_nota.setText(formatar_moeda(val_nota))
+        self.lbl_total_sel.setText(formatar_moeda(total_sel))
+        self.lbl_diff.setText(formatar_moeda(diff))
         
         # --- LÓGICA DE VALIDAÇÃO VISUAL ---
-        margem = 10.0 if self.combo_tipo.currentText() == "Itens de Giro" else 0.10
+        margem = Decimal("10.00") if self.combo_tipo.currentText() == "Itens de Giro" else Decimal("0.10")
         esta_no_prazo = abs(diff) <= margem
 
         # ALTERAÇÃO AQUI:
@@ -394,9 +499,9 @@ class PageRetorno(QWidget):
 
         header = RetornoHeaderDTO(
             numero_nota=self.txt_num_nota.text(),
-            data_emissao=self.date_emissao.date().toString("yyyy-MM-dd"),
+            data_emissao=self.date_emissao.date().toPython(),
             tipo_retorno=self.combo_tipo.currentText(),
-            valor_total=self.spin_valor_retorno.value(),
+            valor_total=para_decimal(self.spin_valor_retorno.value()),
             cnpj_emitente=cnpj_emitente_limpo,
             cnpj_remetente=cnpj_remetente,
             grupo=grupo
@@ -417,4 +522,8 @@ class PageRetorno(QWidget):
         self.spin_valor_retorno.setValue(0)
         self.table.setRowCount(0)
         self.itens_carregados = []
+        self.busca_atual = None
+        if self.tarefa_alteracao:
+            self.tarefa_alteracao.cancelar()
+            self.tarefa_alteracao = None
         self.recalcular_totais()
\ No newline at end of file